@@ -0,0 +1,144 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+Databases created before migrations existed (by create_all at startup) already
+have some or all of these objects, so every step checks before creating.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _has_column(table: str, column: str) -> bool:
+    return any(c["name"] == column for c in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def upgrade() -> None:
+    if not _has_table("user"):
+        op.create_table(
+            "user",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("username", sa.String(), nullable=False),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("password_hash", sa.String(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_user_id", "user", ["id"])
+        op.create_index("ix_user_username", "user", ["username"], unique=True)
+        op.create_index("ix_user_email", "user", ["email"], unique=True)
+
+    if not _has_table("group"):
+        op.create_table(
+            "group",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column("base_currency", sa.String(), nullable=False, server_default="USD"),
+            sa.Column("created_by", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_group_id", "group", ["id"])
+    elif not _has_column("group", "base_currency"):
+        op.add_column("group", sa.Column("base_currency", sa.String(), nullable=False, server_default="USD"))
+
+    if not _has_table("groupmember"):
+        op.create_table(
+            "groupmember",
+            sa.Column("group_id", sa.Integer(), sa.ForeignKey("group.id"), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), primary_key=True),
+            sa.Column("joined_at", sa.DateTime(), nullable=True),
+        )
+
+    if not _has_table("expense"):
+        op.create_table(
+            "expense",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("group_id", sa.Integer(), sa.ForeignKey("group.id"), nullable=True),
+            sa.Column("payer_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+            sa.Column("description", sa.String(), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("currency", sa.String(), nullable=False),
+            sa.Column("category", sa.String(), nullable=False, server_default="Others"),
+            sa.Column("date", sa.DateTime(), nullable=True),
+            sa.Column("receipt_image_url", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_expense_id", "expense", ["id"])
+    elif not _has_column("expense", "category"):
+        op.add_column("expense", sa.Column("category", sa.String(), nullable=False, server_default="Others"))
+
+    if not _has_table("expensesplit"):
+        op.create_table(
+            "expensesplit",
+            sa.Column("expense_id", sa.Integer(), sa.ForeignKey("expense.id"), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), primary_key=True),
+            sa.Column("amount_owed", sa.Float(), nullable=False),
+            sa.UniqueConstraint("expense_id", "user_id", name="unique_expense_user_split"),
+        )
+
+    if not _has_table("settlement"):
+        op.create_table(
+            "settlement",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("group_id", sa.Integer(), sa.ForeignKey("group.id"), nullable=False),
+            sa.Column("payer_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+            sa.Column("payee_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("currency", sa.String(), nullable=False, server_default="USD"),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_settlement_id", "settlement", ["id"])
+    elif not _has_column("settlement", "currency"):
+        op.add_column("settlement", sa.Column("currency", sa.String(), nullable=False, server_default="USD"))
+
+    if not _has_table("notification"):
+        op.create_table(
+            "notification",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+            sa.Column("message", sa.String(), nullable=False),
+            sa.Column("type", sa.String(), nullable=False),
+            sa.Column("is_read", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_notification_id", "notification", ["id"])
+
+    if not _has_table("recurringexpense"):
+        op.create_table(
+            "recurringexpense",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("group_id", sa.Integer(), sa.ForeignKey("group.id"), nullable=False),
+            sa.Column("payer_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+            sa.Column("description", sa.String(), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("currency", sa.String(), nullable=False),
+            sa.Column("category", sa.String(), nullable=False),
+            sa.Column("frequency", sa.String(), nullable=False),
+            sa.Column("next_spawn_date", sa.DateTime(), nullable=True),
+            sa.Column("last_spawned_at", sa.DateTime(), nullable=True),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("splits", sa.JSON(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_recurringexpense_id", "recurringexpense", ["id"])
+
+
+def downgrade() -> None:
+    for table in ("recurringexpense", "notification", "settlement", "expensesplit",
+                  "expense", "groupmember", "group", "user"):
+        op.drop_table(table)
@@ -0,0 +1,143 @@
+"""analytics rollups, expense search, rate limit buckets
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(merchant, '') || ' ' || coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(receipt_text, '')), 'C')"
+)
+
+
+# settlement_service.get_exchange_rate as of this revision; unknown pairs convert at 1.0
+RATES = {
+    ("USD", "EUR"): 0.92,
+    ("EUR", "USD"): 1.09,
+    ("USD", "GBP"): 0.79,
+    ("GBP", "USD"): 1.27,
+    ("USD", "INR"): 83.0,
+    ("INR", "USD"): 0.012,
+    ("EUR", "GBP"): 0.86,
+    ("GBP", "EUR"): 1.16,
+}
+
+group = sa.table("group", sa.column("id"), sa.column("base_currency"))
+expense = sa.table(
+    "expense", sa.column("id"), sa.column("group_id"), sa.column("payer_id"), sa.column("amount"),
+    sa.column("currency"), sa.column("category"), sa.column("date"), sa.column("created_at"),
+)
+expensesplit = sa.table("expensesplit", sa.column("expense_id"), sa.column("user_id"), sa.column("amount_owed"))
+spendrollup = sa.table(
+    "spendrollup", sa.column("group_id"), sa.column("period"), sa.column("category"), sa.column("user_id"),
+    sa.column("paid_amount"), sa.column("share_amount"), sa.column("expense_count"),
+)
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _has_column(table: str, column: str) -> bool:
+    return any(c["name"] == column for c in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def _populate_rollups() -> None:
+    """
+    Aggregate existing expenses into the new table with one INSERT ... SELECT, as
+    analytics_service.rebuild_group_rollups would for every group.
+    """
+    bind = op.get_bind()
+    when = sa.func.coalesce(expense.c.date, expense.c.created_at, sa.func.current_timestamp())
+    if bind.dialect.name == "postgresql":
+        period = sa.func.to_char(when, "YYYY-MM")
+    else:
+        period = sa.func.strftime("%Y-%m", when)
+    category = sa.func.coalesce(expense.c.category, "Others")
+    from_curr = sa.func.upper(expense.c.currency)
+    to_curr = sa.func.upper(sa.func.coalesce(group.c.base_currency, "USD"))
+    rate = sa.case(
+        *[(sa.and_(from_curr == f, to_curr == t), r) for (f, t), r in RATES.items()],
+        else_=1.0,
+    )
+    source = expense.join(group, group.c.id == expense.c.group_id)
+    cells = sa.union_all(
+        sa.select(expense.c.group_id.label("group_id"), period.label("period"), category.label("category"),
+                  expense.c.payer_id.label("user_id"), (expense.c.amount * rate).label("paid_amount"),
+                  sa.literal(0.0).label("share_amount"), sa.literal(1).label("expense_count"))
+        .select_from(source),
+        sa.select(expense.c.group_id, period, category, expensesplit.c.user_id,
+                  sa.literal(0.0), expensesplit.c.amount_owed * rate, sa.literal(0))
+        .select_from(source.join(expensesplit, expensesplit.c.expense_id == expense.c.id)),
+    ).subquery()
+    totals = (
+        sa.select(cells.c.group_id, cells.c.period, cells.c.category, cells.c.user_id,
+                  sa.func.sum(cells.c.paid_amount), sa.func.sum(cells.c.share_amount),
+                  sa.func.sum(cells.c.expense_count))
+        .group_by(cells.c.group_id, cells.c.period, cells.c.category, cells.c.user_id)
+    )
+    bind.execute(spendrollup.insert().from_select(
+        ["group_id", "period", "category", "user_id", "paid_amount", "share_amount", "expense_count"], totals,
+    ))
+
+
+def upgrade() -> None:
+    if not _has_table("spendrollup"):
+        op.create_table(
+            "spendrollup",
+            sa.Column("group_id", sa.Integer(), sa.ForeignKey("group.id"), primary_key=True),
+            sa.Column("period", sa.String(7), primary_key=True),
+            sa.Column("category", sa.String(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), primary_key=True),
+            sa.Column("paid_amount", sa.Float(), nullable=False),
+            sa.Column("share_amount", sa.Float(), nullable=False),
+            sa.Column("expense_count", sa.Integer(), nullable=False),
+        )
+        op.create_index("ix_spendrollup_group_user", "spendrollup", ["group_id", "user_id"])
+        # Analytics reads only the rollups, so past spending is aggregated here
+        _populate_rollups()
+
+    if not _has_column("expense", "merchant"):
+        op.add_column("expense", sa.Column("merchant", sa.String(), nullable=True))
+    if not _has_column("expense", "receipt_text"):
+        op.add_column("expense", sa.Column("receipt_text", sa.Text(), nullable=True))
+    # Full-text search is Postgres-only; other databases fall back to LIKE matching
+    if op.get_bind().dialect.name == "postgresql" and not _has_column("expense", "search_vector"):
+        op.add_column(
+            "expense",
+            sa.Column("search_vector", postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True)),
+        )
+        op.create_index("ix_expense_search_vector", "expense", ["search_vector"], postgresql_using="gin")
+
+    if not _has_table("ratelimitbucket"):
+        op.create_table(
+            "ratelimitbucket",
+            sa.Column("key", sa.String(), primary_key=True),
+            sa.Column("tokens", sa.Float(), nullable=False),
+            sa.Column("updated_at", sa.Float(), nullable=False),
+            sa.Column("allowed", sa.Boolean(), nullable=False),
+            prefixes=["UNLOGGED"] if op.get_bind().dialect.name == "postgresql" else [],
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("ratelimitbucket")
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_expense_search_vector", table_name="expense")
+        op.drop_column("expense", "search_vector")
+    op.drop_column("expense", "receipt_text")
+    op.drop_column("expense", "merchant")
+    op.drop_table("spendrollup")
@@ -0,0 +1,48 @@
+"""trigram indexes for user search
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00
+
+Postgres only, and only when the pg_trgm extension is available on the server.
+Without it user search still works, with a sequential scan.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def _trigram_available() -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    return bind.execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ).scalar() is not None
+
+
+def upgrade() -> None:
+    if not _trigram_available():
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_user_username_trgm", "user", ["username"], if_not_exists=True,
+        postgresql_using="gin", postgresql_ops={"username": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_user_email_trgm", "user", ["email"], if_not_exists=True,
+        postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index("ix_user_email_trgm", table_name="user", if_exists=True)
+    op.drop_index("ix_user_username_trgm", table_name="user", if_exists=True)
@@ -0,0 +1,43 @@
+"""receipts
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    if _has_table("receipt"):
+        return
+    op.create_table(
+        "receipt",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sha256", sa.String(64), nullable=False),
+        sa.Column("content_type", sa.String(), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("uploaded_by", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("expense_id", sa.Integer(), sa.ForeignKey("expense.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_receipt_id", "receipt", ["id"])
+    op.create_index("ix_receipt_sha256", "receipt", ["sha256"])
+    op.create_index("ix_receipt_uploaded_by", "receipt", ["uploaded_by"])
+    op.create_index("ix_receipt_expense_id", "receipt", ["expense_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("receipt")
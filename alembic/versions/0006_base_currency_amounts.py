@@ -0,0 +1,104 @@
+"""base currency amounts
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    ("expense", "fx_rate"),
+    ("expense", "base_amount"),
+    ("expensesplit", "base_amount_owed"),
+    ("settlement", "fx_rate"),
+    ("settlement", "base_amount"),
+)
+
+# settlement_service.get_exchange_rate as of this revision; frozen here so later changes
+# to the service don't change what this migration writes
+RATES = {
+    ("USD", "EUR"): 0.92,
+    ("EUR", "USD"): 1.09,
+    ("USD", "GBP"): 0.79,
+    ("GBP", "USD"): 1.27,
+    ("USD", "INR"): 83.0,
+    ("INR", "USD"): 0.012,
+    ("EUR", "GBP"): 0.86,
+    ("GBP", "EUR"): 1.16,
+}
+
+group = sa.table("group", sa.column("id"), sa.column("base_currency"))
+expense = sa.table(
+    "expense", sa.column("id"), sa.column("group_id"), sa.column("amount"),
+    sa.column("currency"), sa.column("fx_rate"), sa.column("base_amount"),
+)
+expensesplit = sa.table("expensesplit", sa.column("expense_id"), sa.column("amount_owed"), sa.column("base_amount_owed"))
+settlement = sa.table(
+    "settlement", sa.column("id"), sa.column("group_id"), sa.column("amount"),
+    sa.column("currency"), sa.column("fx_rate"), sa.column("base_amount"),
+)
+
+
+def _has_column(table: str, column: str) -> bool:
+    return any(c["name"] == column for c in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def _rate(from_curr: str, to_curr: str) -> float:
+    from_curr, to_curr = from_curr.upper(), to_curr.upper()
+    if from_curr == to_curr:
+        return 1.0
+    return RATES.get((from_curr, to_curr), 1.0)
+
+
+def _backfill(table: sa.sql.TableClause) -> None:
+    """One UPDATE per (base currency, currency) pair in use, at the fixed mock rates."""
+    bind = op.get_bind()
+    base_currency = sa.func.coalesce(group.c.base_currency, "USD")
+    pairs = bind.execute(
+        sa.select(base_currency, table.c.currency).distinct()
+        .select_from(table.outerjoin(group, group.c.id == table.c.group_id))
+        .where(table.c.base_amount.is_(None))
+    ).all()
+    for base, currency in pairs:
+        rate = _rate(currency, base)
+        group_ids = sa.select(group.c.id).where(base_currency == base)
+        in_base = table.c.group_id.in_(group_ids)
+        if base == "USD":
+            # expenses without a group were converted to USD
+            in_base = sa.or_(in_base, table.c.group_id.is_(None))
+        bind.execute(
+            table.update()
+            .where(table.c.base_amount.is_(None), table.c.currency == currency, in_base)
+            .values(fx_rate=rate, base_amount=table.c.amount * rate)
+        )
+
+
+def upgrade() -> None:
+    for table, column in COLUMNS:
+        if not _has_column(table, column):
+            op.add_column(table, sa.Column(column, sa.Float(), nullable=True))
+
+    # Balances sum only the stored amounts, so existing rows are converted here
+    # (scripts/backfill_base_amounts.py does the same for rows written by an older deploy)
+    _backfill(expense)
+    fx_rate = sa.select(expense.c.fx_rate).where(expense.c.id == expensesplit.c.expense_id).scalar_subquery()
+    op.get_bind().execute(
+        expensesplit.update()
+        .where(expensesplit.c.base_amount_owed.is_(None))
+        .values(base_amount_owed=expensesplit.c.amount_owed * fx_rate)
+    )
+    _backfill(settlement)
+
+
+def downgrade() -> None:
+    for table, column in reversed(COLUMNS):
+        op.drop_column(table, column)
@@ -0,0 +1,75 @@
+"""user pair balances
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+group = sa.table("group", sa.column("id"), sa.column("base_currency"))
+expense = sa.table("expense", sa.column("id"), sa.column("group_id"), sa.column("payer_id"))
+expensesplit = sa.table("expensesplit", sa.column("expense_id"), sa.column("user_id"), sa.column("base_amount_owed"))
+settlement = sa.table(
+    "settlement", sa.column("group_id"), sa.column("payer_id"), sa.column("payee_id"), sa.column("base_amount"),
+)
+userpairbalance = sa.table(
+    "userpairbalance", sa.column("user_id"), sa.column("counterparty_id"), sa.column("currency"), sa.column("amount"),
+)
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _populate() -> None:
+    """Same INSERT ... SELECT as pair_balance_service.rebuild, over the amounts 0006 stored."""
+    split = expensesplit.join(expense, expense.c.id == expensesplit.c.expense_id).join(group, group.c.id == expense.c.group_id)
+    paid = settlement.join(group, group.c.id == settlement.c.group_id)
+    movements = sa.union_all(
+        # split holder owes the payer
+        sa.select(expense.c.payer_id.label("user_id"), expensesplit.c.user_id.label("counterparty_id"),
+                  group.c.base_currency.label("currency"), expensesplit.c.base_amount_owed.label("amount"))
+        .select_from(split).where(expensesplit.c.user_id != expense.c.payer_id),
+        sa.select(expensesplit.c.user_id, expense.c.payer_id, group.c.base_currency, -expensesplit.c.base_amount_owed)
+        .select_from(split).where(expensesplit.c.user_id != expense.c.payer_id),
+        # payee owes the payer what was paid back
+        sa.select(settlement.c.payer_id, settlement.c.payee_id, group.c.base_currency, settlement.c.base_amount)
+        .select_from(paid).where(settlement.c.payer_id != settlement.c.payee_id),
+        sa.select(settlement.c.payee_id, settlement.c.payer_id, group.c.base_currency, -settlement.c.base_amount)
+        .select_from(paid).where(settlement.c.payer_id != settlement.c.payee_id),
+    ).subquery()
+    totals = (
+        sa.select(movements.c.user_id, movements.c.counterparty_id, movements.c.currency,
+                  sa.func.coalesce(sa.func.sum(movements.c.amount), 0.0))
+        .group_by(movements.c.user_id, movements.c.counterparty_id, movements.c.currency)
+    )
+    op.get_bind().execute(
+        userpairbalance.insert().from_select(["user_id", "counterparty_id", "currency", "amount"], totals)
+    )
+
+
+def upgrade() -> None:
+    if _has_table("userpairbalance"):
+        return
+    op.create_table(
+        "userpairbalance",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), primary_key=True),
+        sa.Column("counterparty_id", sa.Integer(), sa.ForeignKey("user.id"), primary_key=True),
+        sa.Column("currency", sa.String(), primary_key=True),
+        sa.Column("amount", sa.Float(), nullable=False),
+    )
+    # Built from existing data here; after that every write keeps it up to date
+    _populate()
+
+
+def downgrade() -> None:
+    op.drop_table("userpairbalance")
@@ -0,0 +1,39 @@
+"""indexes for per-user debt lookups
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+# Everything one user paid, owes or settled, across all their groups (cross-group netting)
+INDEXES = (
+    ("ix_expense_payer_id", "expense", ["payer_id"]),
+    ("ix_expensesplit_user_id", "expensesplit", ["user_id"]),
+    ("ix_settlement_payer_id", "settlement", ["payer_id"]),
+    ("ix_settlement_payee_id", "settlement", ["payee_id"]),
+)
+
+
+def _has_index(table: str, name: str) -> bool:
+    return any(i["name"] == name for i in sa.inspect(op.get_bind()).get_indexes(table))
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        if not _has_index(table, name):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
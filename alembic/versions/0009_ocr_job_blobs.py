@@ -0,0 +1,33 @@
+"""ocr jobs reference the receipt store
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def _has_column(table: str, column: str) -> bool:
+    return any(c["name"] == column for c in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def upgrade() -> None:
+    # New jobs keep their image in the receipt store; jobs already queued still carry
+    # the bytes in ocrjob.image and are processed from there
+    if not _has_column("ocrjob", "sha256"):
+        op.add_column("ocrjob", sa.Column("sha256", sa.String(64), nullable=True))
+        op.create_index("ix_ocrjob_sha256", "ocrjob", ["sha256"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ocrjob_sha256", table_name="ocrjob")
+    op.drop_column("ocrjob", "sha256")
@@ -1,7 +1,7 @@
 from typing import AsyncGenerator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+from jose import JWTError
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,6 +11,7 @@ from app.db.session import AsyncSessionLocal
 from app.models.user import User
 from app.crud import crud_user
 from app.schemas.user import TokenData
+from app.services import user_cache
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
@@ -24,16 +25,26 @@ async def get_current_user(
     db: AsyncSession = Depends(get_db), token: str = Depends(reusable_oauth2)
 ) -> User:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = security.decode_access_token(token)
         token_data = TokenData(**payload)
     except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = await crud_user.get_user_by_username(db, username=token_data.sub)
+    user = None
+    if token_data.uid is not None:
+        cached = user_cache.get_cached_user(token_data.uid)
+        if cached is not None:
+            # Attach the cached row to this session without a round trip
+            user = await db.merge(cached, load=False)
+        else:
+            user = await db.get(User, token_data.uid)
+            if user:
+                user_cache.cache_user(user)
+    else:
+        # Tokens issued before the uid claim existed
+        user = await crud_user.get_user_by_username(db, username=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -0,0 +1,20 @@
+from fastapi import HTTPException
+from app.services import ocr_service, receipt_store
+
+def upload_error(e: receipt_store.ReceiptTooLarge | receipt_store.UnsupportedReceipt) -> HTTPException:
+    """The HTTP error for an upload the receipt store rejected."""
+    if isinstance(e, receipt_store.ReceiptTooLarge):
+        return HTTPException(status_code=413, detail=str(e))
+    return HTTPException(status_code=415, detail=str(e))
+
+def scan_error(e: Exception) -> HTTPException:
+    """The HTTP error for an exception raised while running OCR; shared by /ocr and /receipts."""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, ocr_service.OcrBusy):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "2"})
+    if isinstance(e, ocr_service.OcrTimeout):
+        return HTTPException(status_code=504, detail=str(e))
+    if isinstance(e, RuntimeError):
+        return HTTPException(status_code=503, detail=str(e))
+    return HTTPException(status_code=500, detail=f"OCR processing failed: {str(e)}")
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, groups, expenses, ocr, settlements, recurring, notifications
+from app.api.v1.endpoints import auth, users, groups, expenses, ocr, settlements, recurring, notifications, receipts
 
 api_router = APIRouter()
 api_router.include_router(auth.router, tags=["login"])
@@ -10,3 +10,4 @@ api_router.include_router(ocr.router, prefix="/ocr", tags=["ocr"])
 api_router.include_router(settlements.router, prefix="/settlements", tags=["settlements"])
 api_router.include_router(recurring.router, prefix="/recurring", tags=["recurring"])
 api_router.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
+api_router.include_router(receipts.router, prefix="/receipts", tags=["receipts"])
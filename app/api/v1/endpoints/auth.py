@@ -9,6 +9,7 @@ from app.core import security
 from app.core.config import settings
 from app.crud import crud_user
 from app.schemas.user import Token
+from app.services.password_service import PasswordServiceBusy
 
 router = APIRouter()
 
@@ -19,9 +20,12 @@ async def login_access_token(
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = await crud_user.authenticate(
-        db, email=form_data.username, password=form_data.password
-    )
+    try:
+        user = await crud_user.authenticate(
+            db, email=form_data.username, password=form_data.password
+        )
+    except PasswordServiceBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user.is_active:
@@ -30,7 +34,7 @@ async def login_access_token(
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": security.create_access_token(
-            user.username, expires_delta=access_token_expires
+            user.username, expires_delta=access_token_expires, user_id=user.id
         ),
         "token_type": "bearer",
     }
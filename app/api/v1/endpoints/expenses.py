@@ -1,11 +1,12 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
+from app.core.responses import ORJSONResponse
 from app.crud import crud_expense
 from app.models.user import User
-from app.schemas.expense import ExpenseCreate, Expense as ExpenseSchema
+from app.schemas.expense import ExpenseCreate, Expense as ExpenseSchema, ExpenseSearchResult
 from app.services import notification_service
 from app.crud import crud_group
 
@@ -48,8 +49,28 @@ async def read_expenses(
     """
     Retrieve expenses for a group.
     """
-    expenses = await crud_expense.get_multi_by_group(db, group_id=group_id, skip=skip, limit=limit)
-    return expenses
+    # Rows are already shaped like ExpenseSchema; skip response_model re-validation
+    expenses = await crud_expense.get_rows_by_group(db, group_id=group_id, skip=skip, limit=limit)
+    return ORJSONResponse(expenses)
+
+@router.get("/search", response_model=ExpenseSearchResult)
+async def search_expenses(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Search expenses across all of the user's groups by description, merchant, category and receipt text.
+    """
+    try:
+        items, next_cursor = await crud_expense.search_expenses(
+            db, user_id=current_user.id, query=q, limit=limit, cursor=cursor
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
 
 @router.put("/{expense_id}", response_model=ExpenseSchema)
 async def update_expense(
@@ -1,12 +1,15 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
-from app.crud import crud_group
+from app.crud import crud_group, crud_settlement
 from app.models.user import User
 from app.schemas.group import GroupCreate, Group as GroupSchema
-from app.services import settlement_service, notification_service
+from app.schemas.analytics import GroupAnalytics
+from app.schemas.settlement import SettleUpRequest
+from app.services import settlement_service, notification_service, analytics_service, export_service
 
 router = APIRouter()
 
@@ -31,12 +34,12 @@ async def get_global_summary(
     """
     Get global summary of what the user owes and is owed across all groups.
     """
-    groups = await crud_group.get_multi_by_owner(db, owner_id=current_user.id)
+    group_ids = await crud_group.get_group_ids_for_user(db, user_id=current_user.id)
+    all_balances = await settlement_service.calculate_net_balances_for_groups(db, group_ids)
     total_owed = 0.0 # Positive balances (others owe me)
     total_owe = 0.0  # Negative balances (I owe others)
     
-    for group in groups:
-        balances = await settlement_service.calculate_net_balances(db, group_id=group.id)
+    for balances in all_balances.values():
         user_balance = balances.get(current_user.id, 0.0)
         if user_balance > 0:
             total_owed += user_balance
@@ -47,7 +50,7 @@ async def get_global_summary(
         "total_owed": round(total_owed, 2),
         "total_owe": round(total_owe, 2),
         "net_balance": round(total_owed - total_owe, 2),
-        "group_count": len(groups)
+        "group_count": len(group_ids)
     }
 
 @router.get("/", response_model=List[GroupSchema])
@@ -113,6 +116,45 @@ async def add_group_member(
     updated_group = await crud_group.get(db=db, id=group_id)
     return updated_group
 
+async def _balances_response(db: AsyncSession, group_id: int, settled: Optional[List[dict]] = None) -> dict:
+    balances = await settlement_service.calculate_net_balances(db, group_id=group_id)
+    transactions = settlement_service.simplify_debts(balances)
+    
+    # Enrich balances and transactions with usernames (one query for everyone involved)
+    transfers = transactions + (settled or [])
+    user_ids = set(balances) | {tx['from_id'] for tx in transfers} | {tx['to_id'] for tx in transfers}
+    user_result = await db.execute(select(User.id, User.username).filter(User.id.in_(user_ids)))
+    usernames = dict(user_result.all())
+
+    def enrich(txs: List[dict]) -> List[dict]:
+        return [
+            {
+                "from_id": tx['from_id'],
+                "from_name": usernames.get(tx['from_id'], f"User {tx['from_id']}"),
+                "to_id": tx['to_id'],
+                "to_name": usernames.get(tx['to_id'], f"User {tx['to_id']}"),
+                "amount": tx['amount']
+            }
+            for tx in txs
+        ]
+
+    enriched_balances = [
+        {
+            "user_id": uid,
+            "username": usernames.get(uid, f"User {uid}"),
+            "balance": round(bal, 2)
+        }
+        for uid, bal in balances.items()
+    ]
+
+    response = {
+        "balances": enriched_balances,
+        "suggested_transactions": enrich(transactions)
+    }
+    if settled is not None:
+        response["settled_transactions"] = enrich(settled)
+    return response
+
 @router.get("/{group_id}/balances")
 async def get_group_balances(
     group_id: int,
@@ -122,40 +164,72 @@ async def get_group_balances(
     """
     Get net balances and simplified transactions for a group.
     """
-    balances = await settlement_service.calculate_net_balances(db, group_id=group_id)
-    transactions = settlement_service.simplify_debts(balances)
-    
-    # Enrich balances with usernames
-    enriched_balances = []
-    for uid, bal in balances.items():
-        # This is a bit inefficient, but fine for small groups. 
-        # In a real app we'd fetch all users at once.
-        user_result = await db.execute(select(User).filter(User.id == uid))
-        user = user_result.scalars().first()
-        enriched_balances.append({
-            "user_id": uid,
-            "username": user.username if user else f"User {uid}",
-            "balance": round(bal, 2)
-        })
+    return await _balances_response(db, group_id)
 
-    # Enrich transactions with usernames
-    enriched_transactions = []
-    for tx in transactions:
-        from_user_res = await db.execute(select(User).filter(User.id == tx['from_id']))
-        from_user = from_user_res.scalars().first()
-        to_user_res = await db.execute(select(User).filter(User.id == tx['to_id']))
-        to_user = to_user_res.scalars().first()
-        
-        enriched_transactions.append({
-            "from_id": tx['from_id'],
-            "from_name": from_user.username if from_user else f"User {tx['from_id']}",
-            "to_id": tx['to_id'],
-            "to_name": to_user.username if to_user else f"User {tx['to_id']}",
-            "amount": tx['amount']
-        })
+@router.post("/{group_id}/settle-up")
+async def settle_up_group(
+    group_id: int,
+    plan_in: SettleUpRequest,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Record the suggested transactions the client confirmed as completed settlements in
+    one transaction, notifying everyone involved. Returns the new balances plus
+    settled_transactions. 409 if the plan changed since it was fetched; calling it again
+    once the group is settled records nothing.
+    """
+    if not await crud_group.is_member(db, group_id=group_id, user_id=current_user.id):
+        raise HTTPException(status_code=404, detail="Group not found")
+    try:
+        settled = await crud_settlement.settle_up_group(db, group_id, current_user, plan_in.transactions)
+    except crud_settlement.PlanChanged as e:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    return await _balances_response(db, group_id, settled)
 
-    return {
-        "balances": enriched_balances,
-        "suggested_transactions": enriched_transactions
-    }
+@router.get("/{group_id}/analytics", response_model=GroupAnalytics)
+async def get_group_analytics(
+    group_id: int,
+    start_period: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    end_period: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Spending by category, by month, by payer and per member share, in the group's base currency.
+    Periods are inclusive YYYY-MM bounds.
+    """
+    if not await crud_group.is_member(db, group_id=group_id, user_id=current_user.id):
+        raise HTTPException(status_code=404, detail="Group not found")
+    return await analytics_service.get_group_analytics(
+        db, group_id=group_id, start_period=start_period, end_period=end_period
+    )
+
+@router.get("/{group_id}/export")
+async def export_group_history(
+    group_id: int,
+    format: str = Query("csv", pattern="^(csv|jsonl)$"),
+    gzip: bool = False,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Stream the full expense (with splits) and settlement history of a group as CSV or JSON Lines.
+    """
+    if not await crud_group.is_member(db, group_id=group_id, user_id=current_user.id):
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"group_{group_id}_export.{format}"
+    headers = {}
+    if gzip:
+        media_type = "application/gzip"
+        filename += ".gz"
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(
+        export_service.stream_group_export(group_id, fmt=format, gzip=gzip),
+        media_type=media_type,
+        headers=headers,
+    )
 from sqlalchemy import select
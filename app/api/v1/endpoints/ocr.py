@@ -1,28 +1,107 @@
-from typing import Any
+import json
+from typing import Any, List, Tuple
 from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
-from app.services import ocr_service
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.services import ocr_job_service, ocr_service, receipt_store
 from app.api import deps
+from app.api.errors import scan_error, upload_error
+from app.core.config import settings
 from app.models.user import User
+from app.schemas.ocr_job import OcrJob as OcrJobSchema
 
 router = APIRouter()
 
+async def _store_upload(file: UploadFile) -> Tuple[str, str]:
+    """
+    Stream the upload into the receipt store (never whole in memory) and return its
+    (sha256, content_type); the OCR worker reads the file from there. Unreferenced
+    blobs are removed later by scripts/gc_receipts.py.
+    """
+    if not (file.content_type or "").startswith("image/"):
+        raise HTTPException(status_code=400, detail="File must be an image.")
+    try:
+        sha256, _, content_type = await receipt_store.save_stream(file.read, settings.OCR_MAX_IMAGE_BYTES)
+    except (receipt_store.ReceiptTooLarge, receipt_store.UnsupportedReceipt) as e:
+        raise upload_error(e)
+    return sha256, content_type
+
 @router.post("/scan", response_model=Any)
 async def scan_receipt(
     file: UploadFile = File(...),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
-    Upload a receipt image to extract data (Amount, Date, Merchant).
+    Upload a receipt image to extract data (Amount, Date, Merchant, Subtotal, Tax, line Items).
     """
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="File must be an image.")
-    
-    content = await file.read()
+    sha256, _ = await _store_upload(file)
     try:
-        data = await ocr_service.process_receipt_image(content)
+        data = await ocr_service.process_receipt_file(receipt_store.blob_path(sha256), sha256)
         # Flatten the data structure to match frontend expectations
         return {**data, "success": True}
-    except RuntimeError as e:
-        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"OCR processing failed: {str(e)}")
+        raise scan_error(e)
+
+@router.post("/scan/batch")
+async def scan_receipt_batch(
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Scan many receipt images in one request. Results stream back as JSON Lines in the
+    order they finish, one per image: {"index", "filename", "success": true, ...scan fields}
+    or {"index", "filename", "success": false, "status", "detail"}. A final
+    {"done": true, "succeeded", "failed"} line ends the batch.
+    """
+    if len(files) > settings.OCR_BATCH_MAX_FILES:
+        raise HTTPException(status_code=413, detail=f"At most {settings.OCR_BATCH_MAX_FILES} images per batch.")
+
+    def loader(file: UploadFile):
+        async def load() -> Tuple[str, str]:
+            sha256, _ = await _store_upload(file)
+            return receipt_store.blob_path(sha256), sha256
+        return load
+
+    async def stream():
+        succeeded = failed = 0
+        results = ocr_service.scan_batch([loader(f) for f in files], settings.OCR_BATCH_CONCURRENCY)
+        async for index, data, error in results:
+            line = {"index": index, "filename": files[index].filename}
+            if error is None:
+                line.update(data, success=True)
+                succeeded += 1
+            else:
+                http_error = scan_error(error)
+                line.update(success=False, status=http_error.status_code, detail=http_error.detail)
+                failed += 1
+            yield json.dumps(line, separators=(",", ":")) + "\n"
+        yield json.dumps({"done": True, "succeeded": succeeded, "failed": failed}, separators=(",", ":")) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@router.post("/jobs", response_model=OcrJobSchema, status_code=202)
+async def create_ocr_job(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Queue a receipt image for OCR and return immediately. Poll GET /ocr/jobs/{id} for the
+    result; a notification is also sent when it finishes.
+    """
+    sha256, content_type = await _store_upload(file)
+    return await ocr_job_service.create_job(db, current_user.id, sha256, content_type)
+
+@router.get("/jobs/{job_id}", response_model=OcrJobSchema)
+async def read_ocr_job(
+    job_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Status of an OCR job; result holds the extracted data once status is "done".
+    """
+    job = await ocr_job_service.get_job(db, job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="OCR job not found")
+    return job
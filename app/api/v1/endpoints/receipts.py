@@ -0,0 +1,173 @@
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, Response, UploadFile
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.api.errors import scan_error, upload_error
+from app.core.config import settings
+from app.crud import crud_receipt
+from app.models.receipt import Receipt
+from app.models.user import User
+from app.schemas.receipt import Receipt as ReceiptSchema, ReceiptUpdate
+from app.services import ocr_service, receipt_store
+
+router = APIRouter()
+
+# Stored bytes never change for a given URL, so clients may cache them for good
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+async def _get_visible(db: AsyncSession, receipt_id: int, user: User) -> Receipt:
+    receipt = await crud_receipt.get(db, receipt_id)
+    if not receipt or not await crud_receipt.can_view(db, receipt, user.id):
+        raise HTTPException(status_code=404, detail="Receipt not found")
+    return receipt
+
+async def _get_own(db: AsyncSession, receipt_id: int, user: User) -> Receipt:
+    receipt = await crud_receipt.get(db, receipt_id)
+    if not receipt or receipt.uploaded_by != user.id:
+        raise HTTPException(status_code=404, detail="Receipt not found")
+    return receipt
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers={"etag": etag, "Cache-Control": CACHE_CONTROL})
+    return None
+
+def _file_response(path: str, media_type: str, etag: str) -> Response:
+    headers = {"etag": etag, "Cache-Control": CACHE_CONTROL}
+    # FileResponse streams from disk and answers Range / If-Range requests itself
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+@router.post("/", response_model=ReceiptSchema, status_code=201)
+async def upload_receipt(
+    file: UploadFile = File(...),
+    expense_id: Optional[int] = Form(None),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Store a receipt image, optionally attaching it to an expense in one of your groups.
+    The upload is written to disk in chunks; an identical image already stored is reused.
+    """
+    expense = None
+    if expense_id is not None:
+        expense = await crud_receipt.get_expense_for_member(db, expense_id, current_user.id)
+        if not expense:
+            raise HTTPException(status_code=404, detail="Expense not found")
+    try:
+        sha256, size, content_type = await receipt_store.save_stream(file.read)
+    except (receipt_store.ReceiptTooLarge, receipt_store.UnsupportedReceipt) as e:
+        raise upload_error(e)
+    receipt = await crud_receipt.create_receipt(db, sha256, size, content_type, current_user.id)
+    if expense is not None:
+        await crud_receipt.attach(db, receipt, expense)
+    await db.commit()
+    await db.refresh(receipt)
+    return receipt
+
+@router.get("/{receipt_id}", response_model=ReceiptSchema)
+async def read_receipt(
+    receipt_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Receipt metadata. Visible to the uploader and to members of the attached expense's group.
+    """
+    return await _get_visible(db, receipt_id, current_user)
+
+@router.get("/{receipt_id}/file")
+async def read_receipt_file(
+    receipt_id: int,
+    request: Request,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    The stored image. Supports Range requests; the ETag is the image's SHA-256.
+    """
+    receipt = await _get_visible(db, receipt_id, current_user)
+    etag = f'"{receipt.sha256}"'
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+    return _file_response(receipt_store.blob_path(receipt.sha256), receipt.content_type, etag)
+
+@router.get("/{receipt_id}/thumbnail")
+async def read_receipt_thumbnail(
+    receipt_id: int,
+    request: Request,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    A JPEG thumbnail (RECEIPT_THUMBNAIL_SIZE on its longest side), rendered on first request.
+    """
+    receipt = await _get_visible(db, receipt_id, current_user)
+    size = settings.RECEIPT_THUMBNAIL_SIZE
+    etag = f'"{receipt.sha256}-{size}"'
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+    try:
+        path = await receipt_store.thumbnail_path(receipt.sha256, size)
+    except OSError as e: # PIL raises UnidentifiedImageError (an OSError) for undecodable images
+        raise HTTPException(status_code=422, detail=f"Could not render a thumbnail: {e}")
+    return _file_response(path, "image/jpeg", etag)
+
+@router.put("/{receipt_id}", response_model=ReceiptSchema)
+async def update_receipt(
+    receipt_id: int,
+    receipt_in: ReceiptUpdate,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Attach the receipt to an expense in one of your groups, or detach it with expense_id null.
+    Only the uploader can do this.
+    """
+    receipt = await _get_own(db, receipt_id, current_user)
+    expense = None
+    if receipt_in.expense_id is not None:
+        expense = await crud_receipt.get_expense_for_member(db, receipt_in.expense_id, current_user.id)
+        if not expense:
+            raise HTTPException(status_code=404, detail="Expense not found")
+    await crud_receipt.attach(db, receipt, expense)
+    await db.commit()
+    await db.refresh(receipt)
+    return receipt
+
+@router.delete("/{receipt_id}", status_code=204)
+async def delete_receipt(
+    receipt_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> None:
+    """
+    Delete the receipt (detaching it from its expense). The file is removed once no
+    receipt references it.
+    """
+    receipt = await _get_own(db, receipt_id, current_user)
+    sha256 = receipt.sha256
+    last_reference = await crud_receipt.delete_receipt(db, receipt)
+    await db.commit()
+    if last_reference:
+        receipt_store.delete_blob(sha256)
+
+@router.post("/{receipt_id}/scan", response_model=Any)
+async def scan_stored_receipt(
+    receipt_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Run OCR on a stored receipt; same response as POST /ocr/scan. The OCR worker reads
+    the file from the store, so the image is never loaded into this process.
+    """
+    receipt = await _get_visible(db, receipt_id, current_user)
+    try:
+        data = await ocr_service.process_receipt_file(receipt_store.blob_path(receipt.sha256), receipt.sha256)
+        return {**data, "success": True}
+    except Exception as e:
+        raise scan_error(e)
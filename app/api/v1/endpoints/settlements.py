@@ -1,12 +1,13 @@
-from typing import Any
+from typing import Any, Optional
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
+from app.core.responses import ORJSONResponse
 from app.crud import crud_settlement
 from app.models.user import User
 
 from app.schemas import settlement as settlement_schema
-from app.services import notification_service
+from app.services import netting_service, notification_service
 
 router = APIRouter()
 
@@ -42,5 +43,30 @@ async def get_group_settlements(
     """
     Get settlement history for a group.
     """
-    settlements = await crud_settlement.get_settlements_by_group(db=db, group_id=group_id)
-    return settlements
+    # Rows are already shaped like the Settlement schema; skip response_model re-validation
+    settlements = await crud_settlement.get_settlement_rows_by_group(db=db, group_id=group_id)
+    return ORJSONResponse(settlements)
+
+@router.get("/netting", response_model=settlement_schema.NettingPlan)
+async def get_netting_plan(
+    counterparty_id: Optional[int] = None,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    What you owe and are owed across all your groups, netted to one transfer per person
+    (and currency). Limit it to one person with counterparty_id.
+    """
+    return await netting_service.get_plan(db, current_user.id, counterparty_id)
+
+@router.post("/netting", response_model=settlement_schema.NettingPlan)
+async def settle_netting_plan(
+    counterparty_id: Optional[int] = None,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Settle up across groups: the plan is recomputed and recorded as one settlement per
+    group leg, in one transaction. Returns what was recorded.
+    """
+    return await netting_service.settle(db, current_user, counterparty_id)
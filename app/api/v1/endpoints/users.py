@@ -7,7 +7,10 @@ from app.api import deps
 from app.core import security
 from app.crud import crud_user
 from app.models.user import User
+from app.schemas.pair_balance import Counterparty
 from app.schemas.user import UserCreate, User as UserSchema
+from app.services import pair_balance_service
+from app.services.password_service import PasswordServiceBusy
 
 router = APIRouter()
 
@@ -26,7 +29,10 @@ async def create_user_signup(
             status_code=400,
             detail="The user with this username already exists in the system.",
         )
-    user = await crud_user.create_user(db=db, user=user_in)
+    try:
+        user = await crud_user.create_user(db=db, user=user_in)
+    except PasswordServiceBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     return user
 
 @router.get("/me", response_model=UserSchema)
@@ -38,6 +44,17 @@ async def read_user_me(
     """
     return current_user
 
+@router.get("/me/counterparties", response_model=List[Counterparty])
+async def read_counterparties(
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Net position with every other user across all shared groups, per currency.
+    A positive amount means they owe you.
+    """
+    return await pair_balance_service.get_counterparties(db, current_user.id)
+
 @router.get("/search", response_model=List[UserSchema])
 async def search_users(
     query: str,
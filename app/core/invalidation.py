@@ -0,0 +1,100 @@
+"""
+Cross-worker cache invalidation over Postgres LISTEN/NOTIFY.
+
+Writers call publish() with the transaction's connection; the NOTIFY is delivered
+only if that transaction commits. Every worker runs listen_for_invalidations() from
+lifespan and evicts the matching local cache entries. Whenever the listener could
+have missed messages (startup, reconnect, unreadable payload) it flushes every
+registered cache instead.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, make_url
+from app.core.config import settings
+from app.core.metrics import stats_collector
+from app.db import dialect
+
+logger = logging.getLogger(__name__)
+
+ENABLED = settings.CACHE_INVALIDATION_ENABLED and dialect.LISTEN_NOTIFY
+CHANNEL = settings.CACHE_INVALIDATION_CHANNEL
+KEEPALIVE_SECONDS = 10
+MAX_BACKOFF_SECONDS = 30
+
+# The version is the publishing transaction's id, increasing in commit order closely enough for debugging
+NOTIFY_SQL = text(
+    "SELECT pg_notify(:channel, json_build_object("
+    "'entity', CAST(:entity AS text), 'id', CAST(:id AS text), 'version', txid_current())::text)"
+)
+
+# entity -> (evict one key, flush everything)
+handlers: Dict[str, Tuple[Callable[[str], None], Callable[[], None]]] = {}
+stats: Dict[str, float] = {
+    "published_total": 0, "received_total": 0, "flushes_total": 0, "reconnects_total": 0, "connected": 0,
+}
+stats_collector.register("cache_invalidation", lambda: stats)
+
+def register(entity: str, evict: Callable[[str], None], flush: Callable[[], None]) -> None:
+    """Ids arrive as strings; evict converts them to the cache's key type."""
+    handlers[entity] = (evict, flush)
+
+def publish(connection: Connection, entity: str, entity_id: Any) -> None:
+    """Queue an invalidation in the current transaction (sync; safe inside ORM flush events)."""
+    if not ENABLED:
+        return
+    connection.execute(NOTIFY_SQL, {"channel": CHANNEL, "entity": entity, "id": str(entity_id)})
+    stats["published_total"] += 1
+
+def flush_all() -> None:
+    stats["flushes_total"] += 1
+    for _, flush in handlers.values():
+        flush()
+
+def handle_message(payload: str) -> None:
+    stats["received_total"] += 1
+    try:
+        event = json.loads(payload)
+        entity, entity_id = event["entity"], event["id"]
+    except (ValueError, TypeError, KeyError):
+        logger.warning(f"Unreadable invalidation message, flushing caches: {payload[:200]}")
+        flush_all()
+        return
+    handler = handlers.get(entity)
+    if handler is not None: # otherwise an entity this worker doesn't cache
+        handler[0](entity_id)
+
+async def listen_for_invalidations() -> None:
+    """
+    Background task: one dedicated connection per worker (outside the pool), kept alive
+    with a periodic query and re-established with backoff when it drops.
+    """
+    import asyncpg
+
+    connect_args = make_url(settings.DATABASE_URL).translate_connect_args(username="user")
+    backoff = 1.0
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(**connect_args)
+            await conn.add_listener(CHANNEL, lambda _conn, _pid, _channel, payload: handle_message(payload))
+            # Anything published while we weren't listening is lost; start from empty caches
+            flush_all()
+            stats["connected"] = 1
+            backoff = 1.0
+            while not conn.is_closed():
+                await asyncio.sleep(KEEPALIVE_SECONDS)
+                await conn.execute("SELECT 1")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Cache invalidation listener disconnected, retrying in {backoff:.0f}s: {e}")
+        finally:
+            stats["connected"] = 0
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        stats["reconnects_total"] += 1
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
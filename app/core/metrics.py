@@ -0,0 +1,154 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float("inf")),
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL per HTTP request",
+    ["method", "route"],
+)
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed")
+DB_QUERY_TIME = Histogram("db_query_duration_seconds", "SQL statement latency")
+EVENT_LOOP_LAG = Gauge("event_loop_lag_seconds", "Delay of a scheduled wakeup on the event loop")
+
+class RequestStats:
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+# Set by MetricsMiddleware for the duration of each HTTP request
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Count statements and DB time globally and for the current request.
+    Pass engine.sync_engine for async engines.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        DB_QUERIES.inc()
+        DB_QUERY_TIME.observe(elapsed)
+        stats = request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+def instrument_pool(engine: Engine) -> None:
+    pool = engine.pool
+    for name, doc, fn in (
+        ("db_pool_size", "Configured pool size", "size"),
+        ("db_pool_checked_out", "Connections currently checked out", "checkedout"),
+        ("db_pool_overflow", "Connections above pool size", "overflow"),
+        ("db_pool_checked_in", "Idle connections in the pool", "checkedin"),
+    ):
+        if hasattr(pool, fn):
+            Gauge(name, doc).set_function(getattr(pool, fn))
+
+class StatsCollector:
+    """
+    Exposes the plain stats dicts kept by services (password hashing, caches, ...)
+    without making those modules depend on prometheus_client.
+    Keys ending in _total become counters, everything else gauges.
+    """
+    def __init__(self):
+        self.sources: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+    def register(self, prefix: str, source: Callable[[], Dict[str, float]]) -> None:
+        self.sources[prefix] = source
+
+    def collect(self):
+        for prefix, source in list(self.sources.items()):
+            for key, value in source().items():
+                name = f"{prefix}_{key}"
+                if key.endswith("_total"):
+                    yield CounterMetricFamily(name[:-len("_total")], name, value=value)
+                else:
+                    yield GaugeMetricFamily(name, name, value=value)
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """Background task: how late the loop wakes us up is time other tasks were blocking it."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.set(max(0.0, loop.time() - expected))
+
+def route_template(scope: Scope) -> str:
+    """
+    Low-cardinality route label, e.g. /api/v1/groups/{group_id}/balances.
+    Included routers may report only their own part of the template, so the
+    prefix is taken from the concrete path.
+    """
+    template = getattr(scope.get("route"), "path", None)
+    if not template:
+        return "unmatched"
+    segments = template.count("/")
+    prefix = scope["path"].rsplit("/", segments)[0]
+    return prefix + template
+
+class MetricsMiddleware:
+    """
+    Per-route latency, query count and DB time. In DEBUG mode the response also carries
+    X-DB-Query-Count and X-DB-Time-ms (statements run before the headers were sent).
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.DEBUG:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-query-count", str(stats.queries).encode()))
+                    headers.append((b"x-db-time-ms", f"{stats.db_time * 1000:.1f}".encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_stats.reset(token)
+            route = route_template(scope)
+            method = scope["method"]
+            REQUEST_LATENCY.labels(method, route, str(status_code)).observe(time.perf_counter() - started)
+            REQUEST_QUERIES.labels(method, route).observe(stats.queries)
+            REQUEST_DB_TIME.labels(method, route).observe(stats.db_time)
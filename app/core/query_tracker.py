@@ -0,0 +1,137 @@
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import settings
+
+try:
+    import greenlet
+except ImportError: # only needed to see through AsyncSession
+    greenlet = None
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Frames in these packages are plumbing, not the code that issued the query
+IGNORED_DIRS = tuple(os.path.join(APP_DIR, d) + os.sep for d in ("core", "db"))
+
+_PARAM = re.compile(r"\$\d+|%\(\w+\)s|(?<!:):\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+class NPlusOneError(RuntimeError):
+    """Raised in 'raise' mode when one statement shape repeats past the threshold."""
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by query_budget when a block runs more statements than allowed."""
+
+def normalize(statement: str) -> str:
+    """Statement shape with bind parameters and IN-lists collapsed, so repeats differing only in values match."""
+    shape = _PARAM.sub("?", statement)
+    shape = _IN_LIST.sub("(?)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+def _app_frame(frame) -> Optional[str]:
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and not filename.startswith(IGNORED_DIRS):
+            return f"{os.path.relpath(filename, os.path.dirname(APP_DIR))}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+def call_site() -> str:
+    """First application frame outside app/core and app/db, i.e. where the query was issued."""
+    site = _app_frame(sys._getframe(2))
+    if site is None and greenlet is not None:
+        # AsyncSession runs the driver in a child greenlet; the awaiting coroutines
+        # are on the parent's stack
+        parent = greenlet.getcurrent().parent
+        if parent is not None:
+            site = _app_frame(parent.gr_frame)
+    return site or "unknown"
+
+class QueryTracker:
+    """Statements seen in one request (or one tracked block), grouped by shape."""
+    def __init__(self, threshold: int = 0, mode: str = "log"):
+        self.threshold = threshold
+        self.mode = mode
+        self.total = 0
+        self.shapes: Counter = Counter()
+        self.sites: Dict[str, Counter] = {}
+        self.reported: set = set()
+
+    def record(self, statement: str) -> None:
+        shape = normalize(statement)
+        self.total += 1
+        self.shapes[shape] += 1
+        self.sites.setdefault(shape, Counter())[call_site()] += 1
+        if self.threshold and self.shapes[shape] > self.threshold and shape not in self.reported:
+            self.reported.add(shape)
+            message = self.describe(shape)
+            if self.mode == "raise":
+                raise NPlusOneError(message)
+            logger.warning(message)
+
+    def describe(self, shape: str) -> str:
+        sites = ", ".join(f"{site} (x{n})" for site, n in self.sites[shape].most_common(3))
+        return f"Possible N+1: statement repeated {self.shapes[shape]} times from {sites}: {shape[:200]}"
+
+    def repeated(self) -> List[Tuple[str, int]]:
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > 1]
+
+# Every tracker active in this context; nested blocks (a test budget around a request) all count
+active_trackers: ContextVar[Tuple[QueryTracker, ...]] = ContextVar("active_trackers", default=())
+
+def instrument_engine(engine: Engine) -> None:
+    """Feed statements to the active trackers. Pass engine.sync_engine for async engines."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _track(conn, cursor, statement, parameters, context, executemany):
+        for tracker in active_trackers.get():
+            tracker.record(statement)
+
+@contextmanager
+def track_queries(threshold: int = 0, mode: str = "log") -> Iterator[QueryTracker]:
+    tracker = QueryTracker(threshold=threshold, mode=mode)
+    token = active_trackers.set(active_trackers.get() + (tracker,))
+    try:
+        yield tracker
+    finally:
+        active_trackers.reset(token)
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: Optional[int] = None) -> Iterator[QueryTracker]:
+    """
+    Assert that the block runs at most max_queries statements, and optionally that no
+    single statement shape runs more than max_repeats times.
+    """
+    with track_queries() as tracker:
+        yield tracker
+    if tracker.total > max_queries:
+        details = "; ".join(tracker.describe(shape) for shape, _ in tracker.repeated()[:3])
+        raise QueryBudgetExceeded(f"{tracker.total} queries executed, budget is {max_queries}. {details}")
+    if max_repeats is not None:
+        for shape, n in tracker.repeated():
+            if n > max_repeats:
+                raise QueryBudgetExceeded(tracker.describe(shape))
+
+class QueryTrackingMiddleware:
+    """
+    Development/test mode (N_PLUS_ONE_MODE=log|raise): tracks statements per request and
+    reports any statement shape executed more than N_PLUS_ONE_THRESHOLD times.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with track_queries(settings.N_PLUS_ONE_THRESHOLD, settings.N_PLUS_ONE_MODE):
+            await self.app(scope, receive, send)
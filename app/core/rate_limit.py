@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import math
+import re
+import time
+from typing import Dict, List, Optional, Pattern, Tuple
+from sqlalchemy import text
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core import security
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import stats_collector
+from app.db import dialect
+from app.models.rate_limit import RateLimitBucket # noqa: F401 - registers the table
+
+logger = logging.getLogger(__name__)
+
+# (method, path pattern, endpoint class); first match wins, everything else is "default"
+ENDPOINT_CLASSES: List[Tuple[str, Pattern, str]] = [
+    ("POST", re.compile(rf"^{settings.API_V1_STR}/ocr/"), "ocr"),
+    ("POST", re.compile(rf"^{settings.API_V1_STR}/receipts/\d+/scan$"), "ocr"),
+    ("GET", re.compile(rf"^{settings.API_V1_STR}/groups/summary$"), "report"),
+    ("GET", re.compile(rf"^{settings.API_V1_STR}/groups/\d+/balances$"), "report"),
+    ("POST", re.compile(rf"^{settings.API_V1_STR}/recurring/trigger$"), "job"),
+]
+
+EXEMPT_PATHS = {"/", "/health", "/metrics", "/docs", "/redoc", f"{settings.API_V1_STR}/openapi.json"}
+
+def classify(method: str, path: str) -> str:
+    for m, pattern, endpoint_class in ENDPOINT_CLASSES:
+        if m == method and pattern.match(path):
+            return endpoint_class
+    return "default"
+
+def client_key(scope: Scope) -> str:
+    """
+    Rate limit per authenticated user when the bearer token is valid, otherwise per client IP.
+    Token verification is cached, so this adds no work for the auth dependency.
+    """
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    payload = security.decode_access_token(token)
+                    return f"user:{payload.get('uid') or payload.get('sub')}"
+                except Exception:
+                    pass
+            break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+class MemoryBucketBackend:
+    """Token buckets local to this worker process."""
+    def __init__(self):
+        self._buckets = TTLCache(maxsize=100000, ttl=3600)
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """Consume one token; returns 0 when allowed, else seconds until one is available."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key) or (burst, now)
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens >= 1:
+            self._buckets.set(key, (tokens - 1, now))
+            return 0.0
+        self._buckets.set(key, (tokens, now))
+        return (1 - tokens) / rate
+
+class PostgresBucketBackend:
+    """
+    Token buckets in an unlogged table so limits hold across workers.
+    One upsert round trip per request; fails open if the database is unavailable.
+    """
+    TAKE_SQL = text("""
+        INSERT INTO ratelimitbucket (key, tokens, updated_at, allowed)
+        VALUES (:key, :burst - 1, :now, true)
+        ON CONFLICT (key) DO UPDATE SET
+            allowed = LEAST(:burst, ratelimitbucket.tokens + GREATEST(:now - ratelimitbucket.updated_at, 0) * :rate) >= 1,
+            tokens = CASE
+                WHEN LEAST(:burst, ratelimitbucket.tokens + GREATEST(:now - ratelimitbucket.updated_at, 0) * :rate) >= 1
+                THEN LEAST(:burst, ratelimitbucket.tokens + GREATEST(:now - ratelimitbucket.updated_at, 0) * :rate) - 1
+                ELSE LEAST(:burst, ratelimitbucket.tokens + GREATEST(:now - ratelimitbucket.updated_at, 0) * :rate)
+            END,
+            updated_at = :now
+        RETURNING allowed, tokens
+    """)
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        from app.db.session import engine
+        try:
+            async with engine.begin() as conn:
+                result = await conn.execute(
+                    self.TAKE_SQL, {"key": key, "rate": rate, "burst": burst, "now": time.time()}
+                )
+                allowed, tokens = result.one()
+        except Exception as e:
+            logger.warning(f"Rate limit backend unavailable, allowing request: {e}")
+            return 0.0
+        return 0.0 if allowed else (1 - tokens) / rate
+
+def make_backend(name: str):
+    if name == "postgres":
+        if dialect.IS_POSTGRES:
+            return PostgresBucketBackend()
+        logger.warning(f"RATE_LIMIT_BACKEND=postgres needs a Postgres database, using per-worker buckets on {dialect.BACKEND}")
+    return MemoryBucketBackend()
+
+class AdmissionControlMiddleware:
+    """
+    Per-user token buckets (429 when exhausted) and per-endpoint-class concurrency
+    slots (503 when no slot frees up within CONCURRENCY_QUEUE_TIMEOUT_SECONDS).
+    Both responses carry Retry-After. Concurrency slots are per worker process.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.backend = make_backend(settings.RATE_LIMIT_BACKEND)
+        self.limits = settings.ENDPOINT_CLASS_LIMITS
+        self.slots: Dict[str, asyncio.Semaphore] = {
+            name: asyncio.Semaphore(int(limits["concurrency"]))
+            for name, limits in self.limits.items()
+            if limits.get("concurrency")
+        }
+        self.stats: Dict[str, int] = {"rate_limited_total": 0, "shed_total": 0}
+        stats_collector.register("admission", lambda: self.stats)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        endpoint_class = classify(scope["method"], scope["path"])
+        limits: Optional[Dict[str, float]] = self.limits.get(endpoint_class) or self.limits.get("default")
+        if not limits:
+            await self.app(scope, receive, send)
+            return
+
+        rate = limits["rate_per_minute"] / 60.0
+        if rate > 0:
+            wait = await self.backend.take(f"{endpoint_class}:{client_key(scope)}", rate, limits["burst"])
+            if wait > 0:
+                self.stats["rate_limited_total"] += 1
+                response = JSONResponse(
+                    {"detail": "Too many requests"},
+                    status_code=429,
+                    headers={"Retry-After": str(math.ceil(wait))},
+                )
+                await response(scope, receive, send)
+                return
+
+        slots = self.slots.get(endpoint_class)
+        if slots is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=settings.CONCURRENCY_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            self.stats["shed_total"] += 1
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry shortly"},
+                status_code=503,
+                headers={"Retry-After": str(math.ceil(settings.CONCURRENCY_QUEUE_TIMEOUT_SECONDS))},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            slots.release()
@@ -0,0 +1,13 @@
+from typing import Any
+import orjson
+from starlette.responses import JSONResponse
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson. Content is serialized as-is (datetimes included),
+    so it should already be shaped like the endpoint's response_model.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
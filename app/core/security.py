@@ -1,21 +1,46 @@
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union
+from typing import Any, Dict, Optional, Union
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core.metrics import stats_collector
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
+# Recently verified tokens -> payload, so bursty clients skip signature verification
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS)
+stats_collector.register("token_cache", token_cache.stats)
+
+def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None, user_id: Optional[int] = None) -> str:
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode = {"exp": expire, "sub": str(subject)}
+    if user_id is not None:
+        to_encode["uid"] = user_id
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Verify and decode a token, reusing the result for a few seconds.
+    Raises jose.JWTError when the token is invalid or expired.
+    """
+    payload = token_cache.get(token)
+    if payload is not None:
+        # Never serve a cached payload past the token's own expiry
+        if payload.get("exp", 0) > time.time():
+            return payload
+        token_cache.pop(token)
+
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    token_cache.set(token, payload, ttl=payload.get("exp", 0) - time.time())
+    return payload
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -1,8 +1,14 @@
-from typing import List
+import base64
+import json
+from typing import List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import func, and_, or_, case, literal
+from app.db import dialect
 from app.models.expense import Expense, ExpenseSplit
+from app.models.group import GroupMember
 from app.schemas.expense import ExpenseCreate
+from app.services import analytics_service, pair_balance_service, settlement_service
 
 async def create_expense(db: AsyncSession, expense: ExpenseCreate, payer_id: int) -> Expense:
     db_expense = Expense(
@@ -13,35 +19,62 @@ async def create_expense(db: AsyncSession, expense: ExpenseCreate, payer_id: int
         currency=expense.currency,
         category=expense.category,
         date=expense.date,
+        merchant=expense.merchant,
+        receipt_text=expense.receipt_text,
         receipt_image_url=expense.receipt_image_url if hasattr(expense, 'receipt_image_url') else None # Handle optional field
     )
+    # Attach splits through the relationship so expense and splits commit together
+    # and the collection is already loaded for the response schema
+    db_expense.splits = [
+        ExpenseSplit(user_id=split.user_id, amount_owed=split.amount_owed)
+        for split in expense.splits
+    ]
+    base_currency = await analytics_service.get_base_currency(db, expense.group_id)
+    settlement_service.convert_expense(db_expense, db_expense.splits, base_currency)
     db.add(db_expense)
-    await db.commit()
-    await db.refresh(db_expense)
 
-    for split in expense.splits:
-        db_split = ExpenseSplit(
-            expense_id=db_expense.id,
-            user_id=split.user_id,
-            amount_owed=split.amount_owed
-        )
-        db.add(db_split)
-    
+    await analytics_service.apply_expense(db, db_expense, expense.splits, base_currency=base_currency)
+    await pair_balance_service.apply_expense(db, db_expense, db_expense.splits, base_currency)
     await db.commit()
     return db_expense
 
 from sqlalchemy.orm import selectinload
 
-async def get_multi_by_group(db: AsyncSession, group_id: int, skip: int = 0, limit: int = 100) -> List[Expense]:
+# Columns of the Expense response schema, selected as plain rows by the list fast path
+EXPENSE_LIST_COLUMNS = (
+    Expense.id, Expense.group_id, Expense.payer_id, Expense.description, Expense.amount,
+    Expense.currency, Expense.category, Expense.date, Expense.merchant,
+    Expense.receipt_image_url, Expense.created_at,
+)
+
+async def get_rows_by_group(db: AsyncSession, group_id: int, skip: int = 0, limit: int = 100) -> List[dict]:
+    """
+    A group's expenses, newest first, with their splits, as plain dicts shaped like the
+    Expense schema. Selects columns instead of entities, so no ORM objects or identity-map
+    entries are built; meant to be returned through an ORJSONResponse without re-validation.
+    """
     result = await db.execute(
-        select(Expense)
+        select(*EXPENSE_LIST_COLUMNS)
         .filter(Expense.group_id == group_id)
-        .options(selectinload(Expense.splits))
         .order_by(Expense.date.desc())
         .offset(skip)
         .limit(limit)
     )
-    return result.scalars().all()
+    expenses = [dict(row) for row in result.mappings()]
+    if not expenses:
+        return expenses
+
+    by_id = {}
+    for expense in expenses:
+        expense["splits"] = []
+        by_id[expense["id"]] = expense["splits"]
+    split_result = await db.execute(
+        select(ExpenseSplit.expense_id, ExpenseSplit.user_id, ExpenseSplit.amount_owed)
+        .filter(ExpenseSplit.expense_id.in_(by_id.keys()))
+    )
+    for expense_id, user_id, amount_owed in split_result.all():
+        by_id[expense_id].append({"user_id": user_id, "amount_owed": amount_owed})
+    return expenses
 
 async def update_expense(db: AsyncSession, expense_id: int, expense_in: ExpenseCreate) -> Expense:
     result = await db.execute(
@@ -52,27 +85,47 @@ async def update_expense(db: AsyncSession, expense_id: int, expense_in: ExpenseC
     db_expense = result.scalars().first()
     if not db_expense:
         return None
+
+    # Retract the old values from the analytics rollups before overwriting them
+    base_currency = await analytics_service.get_base_currency(db, db_expense.group_id)
+    await analytics_service.apply_expense(db, db_expense, db_expense.splits, sign=-1, base_currency=base_currency)
+    await pair_balance_service.apply_expense(db, db_expense, db_expense.splits, base_currency, sign=-1)
     
     db_expense.description = expense_in.description
     db_expense.amount = expense_in.amount
     db_expense.category = expense_in.category
     db_expense.date = expense_in.date
+    db_expense.merchant = expense_in.merchant
+    if expense_in.receipt_text is not None:
+        db_expense.receipt_text = expense_in.receipt_text
     
     # Update splits - using delete-orphan cascade
     db_expense.splits = [
         ExpenseSplit(user_id=s.user_id, amount_owed=s.amount_owed)
         for s in expense_in.splits
     ]
-    
+    # Keeps the rate frozen when the expense was created
+    settlement_service.convert_expense(db_expense, db_expense.splits, base_currency)
+
+    await analytics_service.apply_expense(db, db_expense, expense_in.splits, base_currency=base_currency)
+    await pair_balance_service.apply_expense(db, db_expense, db_expense.splits, base_currency)
     await db.commit()
     await db.refresh(db_expense)
     return db_expense
 
 async def delete_expense(db: AsyncSession, expense_id: int) -> bool:
-    result = await db.execute(select(Expense).filter(Expense.id == expense_id))
+    result = await db.execute(
+        select(Expense)
+        .filter(Expense.id == expense_id)
+        .options(selectinload(Expense.splits))
+    )
     db_expense = result.scalars().first()
     if not db_expense:
         return False
+
+    base_currency = await analytics_service.get_base_currency(db, db_expense.group_id)
+    await analytics_service.apply_expense(db, db_expense, db_expense.splits, sign=-1, base_currency=base_currency)
+    await pair_balance_service.apply_expense(db, db_expense, db_expense.splits, base_currency, sign=-1)
     
     # Splits are automatically deleted due to cascade if using SQLAlchemy relationships correctly,
     # but here we'll be explicit if needed or trust the cascading model.
@@ -80,3 +133,56 @@ async def delete_expense(db: AsyncSession, expense_id: int) -> bool:
     await db.delete(db_expense)
     await db.commit()
     return True
+
+def encode_search_cursor(rank: float, expense_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([rank, expense_id]).encode()).decode()
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    rank, expense_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return float(rank), int(expense_id)
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _search_clause(query: str):
+    """
+    (filter, rank) for a search query: Postgres full-text search, or on other databases
+    every word matched with LIKE in some field, ranking description matches higher.
+    """
+    if dialect.FULL_TEXT_SEARCH:
+        tsquery = func.websearch_to_tsquery("simple", query)
+        return Expense.search_vector.op("@@")(tsquery), func.ts_rank_cd(Expense.search_vector, tsquery)
+    fields = (Expense.description, Expense.merchant, Expense.category, Expense.receipt_text)
+    patterns = [_like_pattern(word) for word in query.replace('"', " ").split()] or [_like_pattern(query)]
+    match = and_(*(or_(*(f.ilike(p, escape="\\") for f in fields)) for p in patterns))
+    rank = sum((case((Expense.description.ilike(p, escape="\\"), 1.0), else_=0.0) for p in patterns), literal(0.0))
+    return match, rank
+
+async def search_expenses(
+    db: AsyncSession, user_id: int, query: str, limit: int = 20, cursor: Optional[str] = None
+) -> Tuple[List[Expense], Optional[str]]:
+    """
+    Full-text search over expenses in groups the user belongs to, best matches first.
+    Keyset pagination on (rank, id): pass the returned cursor to fetch the next page.
+    """
+    match, rank = _search_clause(query)
+    stmt = (
+        select(Expense, rank)
+        .join(GroupMember, and_(GroupMember.group_id == Expense.group_id, GroupMember.user_id == user_id))
+        .filter(match)
+        .options(selectinload(Expense.splits))
+        .order_by(rank.desc(), Expense.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        after_rank, after_id = decode_search_cursor(cursor)
+        stmt = stmt.filter(or_(rank < after_rank, and_(rank == after_rank, Expense.id < after_id)))
+
+    rows = (await db.execute(stmt)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_expense, last_rank = rows[-1]
+        next_cursor = encode_search_cursor(last_rank, last_expense.id)
+    return [expense for expense, _ in rows], next_cursor
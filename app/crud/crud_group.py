@@ -45,6 +45,10 @@ async def get_multi_by_owner(db: AsyncSession, owner_id: int, skip: int = 0, lim
     print(f"FOUND {len(groups)} GROUPS")
     return groups
 
+async def get_group_ids_for_user(db: AsyncSession, user_id: int) -> List[int]:
+    result = await db.execute(select(GroupMember.group_id).filter(GroupMember.user_id == user_id))
+    return result.scalars().all()
+
 async def get(db: AsyncSession, id: int) -> Optional[Group]:
     result = await db.execute(
         select(Group)
@@ -69,3 +73,12 @@ async def add_member(db: AsyncSession, group_id: int, user_id: int) -> Optional[
     await db.commit()
     await db.refresh(db_member)
     return db_member
+
+async def is_member(db: AsyncSession, group_id: int, user_id: int) -> bool:
+    result = await db.execute(
+        select(GroupMember.user_id).filter(
+            GroupMember.group_id == group_id,
+            GroupMember.user_id == user_id
+        )
+    )
+    return result.first() is not None
@@ -0,0 +1,56 @@
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.models.expense import Expense
+from app.models.group import GroupMember
+from app.models.receipt import Receipt
+
+def file_url(receipt_id: int) -> str:
+    return f"{settings.API_V1_STR}/receipts/{receipt_id}/file"
+
+async def create_receipt(db: AsyncSession, sha256: str, size_bytes: int, content_type: str, user_id: int) -> Receipt:
+    receipt = Receipt(sha256=sha256, size_bytes=size_bytes, content_type=content_type, uploaded_by=user_id)
+    db.add(receipt)
+    await db.flush()
+    return receipt
+
+async def get(db: AsyncSession, id: int) -> Optional[Receipt]:
+    result = await db.execute(select(Receipt).filter(Receipt.id == id))
+    return result.scalars().first()
+
+async def get_expense_for_member(db: AsyncSession, expense_id: int, user_id: int) -> Optional[Expense]:
+    """The expense, if it exists and the user belongs to its group."""
+    result = await db.execute(
+        select(Expense)
+        .join(GroupMember, GroupMember.group_id == Expense.group_id)
+        .filter(Expense.id == expense_id, GroupMember.user_id == user_id)
+    )
+    return result.scalars().first()
+
+async def can_view(db: AsyncSession, receipt: Receipt, user_id: int) -> bool:
+    """The uploader, and every member of the group of the expense it is attached to."""
+    if receipt.uploaded_by == user_id:
+        return True
+    if receipt.expense_id is None:
+        return False
+    return await get_expense_for_member(db, receipt.expense_id, user_id) is not None
+
+async def attach(db: AsyncSession, receipt: Receipt, expense: Optional[Expense]) -> None:
+    """Point the receipt (and the expense's receipt_image_url) at the expense; None detaches it."""
+    if receipt.expense_id is not None and (expense is None or expense.id != receipt.expense_id):
+        previous = await db.get(Expense, receipt.expense_id)
+        if previous is not None and previous.receipt_image_url == file_url(receipt.id):
+            previous.receipt_image_url = None
+    receipt.expense_id = expense.id if expense is not None else None
+    if expense is not None:
+        expense.receipt_image_url = file_url(receipt.id)
+
+async def delete_receipt(db: AsyncSession, receipt: Receipt) -> bool:
+    """Delete the row; returns True when it was the last reference to its blob."""
+    await attach(db, receipt, None)
+    await db.delete(receipt)
+    await db.flush()
+    remaining = await db.execute(select(func.count()).select_from(Receipt).filter(Receipt.sha256 == receipt.sha256))
+    return remaining.scalar_one() == 0
@@ -1,8 +1,20 @@
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from typing import Any, Dict, List
+from sqlalchemy import select, insert
+from sqlalchemy.orm import selectinload, aliased
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import dialect
+from app.models.group import Group
+from app.models.notification import Notification
 from app.models.settlement import Settlement
-from app.schemas.settlement import SettlementCreate
+from app.models.user import User
+from app.schemas.settlement import SettlementCreate, SettleUpTransfer
+from app.services import analytics_service, pair_balance_service, settlement_service
+
+class PlanChanged(ValueError):
+    """The group's balances moved since the client fetched the plan it confirmed."""
+
+def _plan_key(transfers) -> List[tuple]:
+    return sorted((tx["from_id"], tx["to_id"], round(tx["amount"], 2)) for tx in transfers)
 
 async def create_settlement(db: AsyncSession, settlement: SettlementCreate) -> Settlement:
     db_settlement = Settlement(
@@ -13,7 +25,10 @@ async def create_settlement(db: AsyncSession, settlement: SettlementCreate) -> S
         currency=settlement.currency,
         status="completed" # Simplified: auto-complete for now
     )
+    base_currency = await analytics_service.get_base_currency(db, settlement.group_id)
+    settlement_service.convert_settlement(db_settlement, base_currency)
     db.add(db_settlement)
+    await pair_balance_service.apply_settlement(db, db_settlement, base_currency)
     await db.commit()
     
     # Reload with relationships to satisfy response schema
@@ -24,11 +39,106 @@ async def create_settlement(db: AsyncSession, settlement: SettlementCreate) -> S
     )
     return result.scalar_one()
 
-async def get_settlements_by_group(db: AsyncSession, group_id: int) -> list[Settlement]:
+def _user_dict(id, email, username, is_active) -> dict:
+    return {"id": id, "email": email, "username": username, "is_active": is_active}
+
+async def get_settlement_rows_by_group(db: AsyncSession, group_id: int) -> list[dict]:
+    """
+    A group's settlements, newest first, as plain dicts shaped like the Settlement schema,
+    with payer and payee joined in one query instead of loaded as ORM relationships.
+    """
+    payer = aliased(User)
+    payee = aliased(User)
     result = await db.execute(
-        select(Settlement)
+        select(
+            Settlement.id, Settlement.group_id, Settlement.payer_id, Settlement.payee_id,
+            Settlement.amount, Settlement.currency, Settlement.status, Settlement.created_at,
+            payer.email, payer.username, payer.is_active,
+            payee.email, payee.username, payee.is_active,
+        )
+        .join(payer, payer.id == Settlement.payer_id)
+        .join(payee, payee.id == Settlement.payee_id)
         .where(Settlement.group_id == group_id)
-        .options(selectinload(Settlement.payer), selectinload(Settlement.payee))
         .order_by(Settlement.id.desc())
     )
-    return result.scalars().all()
+    return [
+        {
+            "id": sid,
+            "group_id": gid,
+            "payer_id": payer_id,
+            "payee_id": payee_id,
+            "amount": amount,
+            "currency": currency,
+            "status": status,
+            "created_at": created_at,
+            "payer": _user_dict(payer_id, payer_email, payer_name, payer_active),
+            "payee": _user_dict(payee_id, payee_email, payee_name, payee_active),
+        }
+        for (sid, gid, payer_id, payee_id, amount, currency, status, created_at,
+             payer_email, payer_name, payer_active, payee_email, payee_name, payee_active) in result.all()
+    ]
+
+def _settle_up_message(actor: User, group_name: str, user_id: int, transfers: List[Dict[str, Any]],
+                       usernames: Dict[int, str], currency: str) -> str:
+    parts = [
+        f"you paid {usernames.get(tx['to_id'], 'someone')} {currency} {tx['amount']:.2f}" if tx["from_id"] == user_id
+        else f"{usernames.get(tx['from_id'], 'someone')} paid you {currency} {tx['amount']:.2f}"
+        for tx in transfers
+    ]
+    return f"{actor.username} settled up '{group_name}': " + "; ".join(parts) + "."
+
+async def settle_up_group(db: AsyncSession, group_id: int, actor: User,
+                          confirmed: List[SettleUpTransfer]) -> List[Dict[str, Any]]:
+    """
+    Record every transfer of the group's simplified plan as a completed settlement and
+    commit once: one multi-row INSERT for the settlements, one for the notifications
+    (one per member involved) and one pair balance upsert.
+
+    The plan is recomputed with the group row locked and must equal the confirmed one,
+    otherwise PlanChanged is raised and nothing is written, so an expense added since the
+    client fetched the plan is never settled unseen. A retry after a successful call finds
+    the group settled and records nothing. Returns the transfers recorded.
+    """
+    await dialect.lock_rows(db, Group, Group.id == group_id)
+    group_result = await db.execute(select(Group.name, Group.base_currency).filter(Group.id == group_id))
+    group_name, base_currency = group_result.one()
+    base_currency = base_currency or "USD"
+
+    balances = await settlement_service.calculate_net_balances(db, group_id)
+    transfers = settlement_service.simplify_debts(balances)
+    transfers = [tx for tx in transfers if tx["amount"] > 0]
+    if not transfers:
+        return []
+    if _plan_key(transfers) != _plan_key(tx.model_dump() for tx in confirmed):
+        raise PlanChanged("Balances changed since the plan was fetched; review the new plan and try again.")
+
+    rows = [
+        {"group_id": group_id, "payer_id": tx["from_id"], "payee_id": tx["to_id"], "amount": tx["amount"],
+         "currency": base_currency, "fx_rate": 1.0, "base_amount": tx["amount"], "status": "completed"}
+        for tx in transfers
+    ]
+    await db.execute(insert(Settlement).values(rows))
+
+    deltas: Dict[pair_balance_service.PairKey, float] = {}
+    for row in rows:
+        settlement = Settlement(**row)
+        for key, amount in pair_balance_service.settlement_deltas(settlement, base_currency).items():
+            deltas[key] = deltas.get(key, 0.0) + amount
+    await pair_balance_service.apply_deltas(db, deltas)
+
+    involved: Dict[int, List[Dict[str, Any]]] = {}
+    for tx in transfers:
+        involved.setdefault(tx["from_id"], []).append(tx)
+        involved.setdefault(tx["to_id"], []).append(tx)
+    involved.pop(actor.id, None)
+    if involved:
+        participants = {user_id for tx in transfers for user_id in (tx["from_id"], tx["to_id"])}
+        user_result = await db.execute(select(User.id, User.username).filter(User.id.in_(participants)))
+        usernames = dict(user_result.all())
+        await db.execute(insert(Notification).values([
+            {"user_id": user_id, "type": "settlement",
+             "message": _settle_up_message(actor, group_name, user_id, user_transfers, usernames, base_currency)}
+            for user_id, user_transfers in involved.items()
+        ]))
+    await db.commit()
+    return transfers
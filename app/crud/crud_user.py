@@ -1,9 +1,9 @@
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.core.security import get_password_hash, verify_password
 from app.models.user import User
 from app.schemas.user import UserCreate
+from app.services import password_service
 
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     result = await db.execute(select(User).filter(User.email == email))
@@ -14,7 +14,7 @@ async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User
     return result.scalars().first()
 
 async def create_user(db: AsyncSession, user: UserCreate) -> User:
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_service.hash_password(user.password)
     db_user = User(
         email=user.email,
         username=user.username,
@@ -30,8 +30,13 @@ async def authenticate(db: AsyncSession, email: str, password: str) -> Optional[
     user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    valid, new_hash = await password_service.verify_password(password, user.password_hash)
+    if not valid:
         return None
+    if new_hash:
+        # Cost factor changed since this hash was made; upgrade it transparently
+        user.password_hash = new_hash
+        await db.commit()
     return user
 
 async def search_users(db: AsyncSession, query: str, limit: int = 20) -> list[User]:
@@ -0,0 +1,14 @@
+# Import all the models, so that Base has them before being
+# imported by Alembic
+from app.db.base_class import Base  # noqa
+from app.models.user import User  # noqa
+from app.models.group import Group, GroupMember  # noqa
+from app.models.expense import Expense, ExpenseSplit  # noqa
+from app.models.settlement import Settlement  # noqa
+from app.models.notification import Notification  # noqa
+from app.models.recurring_expense import RecurringExpense  # noqa
+from app.models.spend_rollup import SpendRollup  # noqa
+from app.models.rate_limit import RateLimitBucket  # noqa
+from app.models.ocr_job import OcrJob  # noqa
+from app.models.receipt import Receipt  # noqa
+from app.models.user_pair_balance import UserPairBalance  # noqa
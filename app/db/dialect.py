@@ -0,0 +1,97 @@
+"""
+What the configured database can do.
+
+Postgres is the production target; SQLite (sqlite+aiosqlite) is a local stand-in for
+benchmarks and development. Postgres-only fast paths check these flags instead of
+assuming them. Decided from DATABASE_URL so models can use them at import time.
+"""
+from typing import Any, Dict, List
+from sqlalchemy import event, insert as generic_insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+
+_url = make_url(settings.DATABASE_URL)
+BACKEND = _url.get_backend_name() # postgresql, sqlite
+DRIVER = _url.get_driver_name() # asyncpg, aiosqlite
+
+IS_POSTGRES = BACKEND == "postgresql"
+IS_SQLITE = BACKEND == "sqlite"
+
+# Capabilities
+FULL_TEXT_SEARCH = IS_POSTGRES # tsvector column + GIN index; LIKE matching otherwise
+SKIP_LOCKED = IS_POSTGRES # SELECT ... FOR UPDATE SKIP LOCKED for job queues
+ROW_LOCKS = IS_POSTGRES # SELECT ... FOR UPDATE; SQLite serializes writers instead
+COPY = IS_POSTGRES and DRIVER == "asyncpg" # COPY FROM STDIN bulk loads
+UNLOGGED_TABLES = IS_POSTGRES
+TRIGRAM_INDEXES = IS_POSTGRES # pg_trgm GIN indexes for substring search, when the extension exists
+ADVISORY_LOCKS = IS_POSTGRES
+LISTEN_NOTIFY = IS_POSTGRES and DRIVER == "asyncpg" # cross-worker cache invalidation
+
+# Table prefix for state that may be lost on a crash (rate limit buckets, ...)
+UNLOGGED: List[str] = ["UNLOGGED"] if UNLOGGED_TABLES else []
+
+def engine_options() -> Dict[str, Any]:
+    if DRIVER == "asyncpg":
+        # Safe behind pgbouncer in transaction mode
+        return {"connect_args": {"statement_cache_size": 0}}
+    if IS_SQLITE:
+        # Wait for the write lock instead of failing with "database is locked"
+        return {"connect_args": {"timeout": 30}}
+    return {}
+
+def configure_engine(engine: Engine) -> None:
+    """Per-connection setup. Pass engine.sync_engine for async engines."""
+    if not IS_SQLITE:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA journal_mode=WAL") # readers don't block the writer
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+def insert(table):
+    """INSERT with on_conflict_do_update / on_conflict_do_nothing and .excluded on either backend."""
+    return sqlite.insert(table) if IS_SQLITE else postgresql.insert(table)
+
+def skip_locked(stmt):
+    """Claim rows other workers haven't locked. SQLite has one writer at a time, so no lock clause is needed."""
+    return stmt.with_for_update(skip_locked=True) if SKIP_LOCKED else stmt
+
+def for_update(stmt):
+    return stmt.with_for_update() if ROW_LOCKS else stmt
+
+async def lock_rows(db: AsyncSession, model, *criteria) -> None:
+    """
+    Hold the matching rows (locked in id order) until the transaction ends, for
+    read-compute-write sequences. SQLite has no row locks and runs plain SELECTs outside
+    a transaction, so there a no-op UPDATE takes the database write lock instead.
+    """
+    if ROW_LOCKS:
+        await db.execute(select(model.id).filter(*criteria).order_by(model.id).with_for_update())
+    else:
+        await db.execute(update(model).where(*criteria).values(id=model.id).execution_options(synchronize_session=False))
+
+async def copy_rows(db: AsyncSession, table, rows: List[Dict[str, Any]]) -> None:
+    """
+    Bulk load rows (dicts with the same keys) in the session's transaction.
+    COPY on asyncpg, batched executemany elsewhere. Values must already be in column
+    types (no JSON columns on the COPY path).
+    """
+    if not rows:
+        return
+    table = getattr(table, "__table__", table)
+    if COPY:
+        columns = list(rows[0])
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            table.name, columns=columns, records=[tuple(row[c] for c in columns) for row in rows]
+        )
+        return
+    for i in range(0, len(rows), 1000):
+        await db.execute(generic_insert(table), rows[i:i + 1000])
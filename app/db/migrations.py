@@ -0,0 +1,44 @@
+import asyncio
+import os
+from functools import lru_cache
+from typing import Optional
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+def alembic_config() -> Config:
+    config = Config(os.path.join(ROOT_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT_DIR, "alembic"))
+    return config
+
+@lru_cache()
+def head_revision() -> Optional[str]:
+    """Latest revision in alembic/versions (read from the scripts, no database access)."""
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+async def current_revision(engine: AsyncEngine) -> Optional[str]:
+    """The revision stamped in the database, or None if it was never migrated."""
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        except Exception:
+            return None
+        return result.scalar()
+
+async def is_schema_current(engine: AsyncEngine) -> bool:
+    """One indexed read at boot instead of inspecting information_schema."""
+    return await current_revision(engine) == head_revision()
+
+async def upgrade_to_head() -> None:
+    """
+    Apply pending migrations. env.py takes an advisory lock, so concurrent callers
+    wait for the first one and then find nothing to do.
+    """
+    config = alembic_config()
+    config.attributes["configure_logger"] = False
+    # env.py runs its own event loop, so keep it off ours
+    await asyncio.to_thread(command.upgrade, config, "head")
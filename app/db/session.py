@@ -1,13 +1,20 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from app.core.config import settings
+from app.core import metrics, query_tracker
+from app.db import dialect
 
 engine = create_async_engine(
     settings.DATABASE_URL,
-    echo=True,
+    echo=settings.SQL_ECHO,
     pool_pre_ping=True,
-    connect_args={"statement_cache_size": 0}
+    **dialect.engine_options()
 )
 
+dialect.configure_engine(engine.sync_engine)
+metrics.instrument_engine(engine.sync_engine)
+metrics.instrument_pool(engine.sync_engine)
+query_tracker.instrument_engine(engine.sync_engine)
+
 AsyncSessionLocal = async_sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
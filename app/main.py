@@ -1,44 +1,65 @@
-from fastapi import FastAPI
+import time
+IMPORT_STARTED = time.perf_counter()
+
+import logging
+import asyncio
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from app.core import invalidation
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, monitor_event_loop_lag
+from app.core.query_tracker import QueryTrackingMiddleware
+from app.core.rate_limit import AdmissionControlMiddleware
 
 from contextlib import asynccontextmanager
 from app.db.session import engine
-from app.db.base_class import Base
+from app.db import migrations
+from app.services import ocr_job_service, ocr_service
+
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create tables on startup
+    # Schema changes are managed by Alembic (alembic/versions); at boot we only check the version
+    lifespan_started = time.perf_counter()
     try:
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-            
-            # Manual migration for category column if it doesn't exist
-            from sqlalchemy import text
-            await conn.execute(text("""
-                DO $$ 
-                BEGIN 
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                 WHERE table_name='expense' AND column_name='category') THEN 
-                        ALTER TABLE expense ADD COLUMN category VARCHAR DEFAULT 'Others' NOT NULL;
-                    END IF; 
-                    
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                 WHERE table_name='group' AND column_name='base_currency') THEN 
-                        ALTER TABLE "group" ADD COLUMN base_currency VARCHAR DEFAULT 'USD' NOT NULL;
-                    END IF;
-
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                 WHERE table_name='settlement' AND column_name='currency') THEN 
-                        ALTER TABLE settlement ADD COLUMN currency VARCHAR DEFAULT 'USD' NOT NULL;
-                    END IF;
-                END $$;
-            """))
+        if not await migrations.is_schema_current(engine):
+            if settings.AUTO_MIGRATE:
+                logger.info("Applying pending database migrations")
+                await migrations.upgrade_to_head()
+            else:
+                logger.error("Database schema is not at the latest migration; run `alembic upgrade head`")
     except Exception as e:
-        import logging
-        logging.error(f"Startup DB connection failed: {e}")
+        logger.error(f"Startup DB connection failed: {e}")
         # preventing crash so /health still works
+
+    now = time.perf_counter()
+    app.state.startup_seconds = {
+        "import": round(lifespan_started - IMPORT_STARTED, 3),
+        "lifespan": round(now - lifespan_started, 3),
+        "total": round(now - IMPORT_STARTED, 3),
+    }
+    logger.info(f"Startup timings (s): {app.state.startup_seconds}")
+    if app.state.startup_seconds["total"] > settings.STARTUP_BUDGET_SECONDS:
+        logger.warning(
+            f"Startup took {app.state.startup_seconds['total']}s, over the {settings.STARTUP_BUDGET_SECONDS}s budget"
+        )
+
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    invalidation_listener = None
+    if invalidation.ENABLED:
+        invalidation_listener = asyncio.create_task(invalidation.listen_for_invalidations())
+    ocr_worker = None
+    if settings.OCR_JOB_WORKER_ENABLED:
+        ocr_worker = asyncio.create_task(ocr_job_service.run_worker())
     yield
+    lag_monitor.cancel()
+    if ocr_worker is not None:
+        ocr_worker.cancel()
+    if invalidation_listener is not None:
+        invalidation_listener.cancel()
+    ocr_service.shutdown()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -48,6 +69,13 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Rate limits and concurrency slots per endpoint class (added first so CORS wraps its 429/503s)
+app.add_middleware(AdmissionControlMiddleware)
+# Latency, query count and DB time per route, including requests rejected above
+app.add_middleware(MetricsMiddleware)
+if settings.N_PLUS_ONE_MODE != "off":
+    app.add_middleware(QueryTrackingMiddleware)
+
 # Set all CORS enabled origins
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -66,5 +94,12 @@ async def root():
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus text exposition for this worker process.
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 from app.api.v1.api import api_router
 app.include_router(api_router, prefix=settings.API_V1_STR)
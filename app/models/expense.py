@@ -1,26 +1,46 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, UniqueConstraint, Text, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
+from app.db import dialect
 from app.db.base_class import Base
 
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(merchant, '') || ' ' || coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(receipt_text, '')), 'C')"
+)
+
 class Expense(Base):
     id = Column(Integer, primary_key=True, index=True)
     group_id = Column(Integer, ForeignKey("group.id"))
-    payer_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    payer_id = Column(Integer, ForeignKey("user.id"), nullable=False, index=True)
     description = Column(String, nullable=False)
     amount = Column(Float, nullable=False)
     currency = Column(String, default="USD", nullable=False)
+    # Frozen at write time: amount * fx_rate in the group's base_currency, so balances are plain SUMs
+    fx_rate = Column(Float, nullable=True)
+    base_amount = Column(Float, nullable=True)
     category = Column(String, default="Others", nullable=False)
     date = Column(DateTime, default=datetime.utcnow)
     receipt_image_url = Column(String, nullable=True)
+    merchant = Column(String, nullable=True)
+    receipt_text = deferred(Column(Text, nullable=True)) # Raw OCR text of the attached receipt
     created_at = Column(DateTime, default=datetime.utcnow)
+    if dialect.FULL_TEXT_SEARCH:
+        # Maintained by Postgres on every write; description ranks above merchant/category above receipt text
+        search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
+        __table_args__ = (
+            Index("ix_expense_search_vector", "search_vector", postgresql_using="gin"),
+        )
 
     splits = relationship("ExpenseSplit", back_populates="expense", cascade="all, delete-orphan")
 
 class ExpenseSplit(Base):
     expense_id = Column(Integer, ForeignKey("expense.id"), primary_key=True)
-    user_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("user.id"), primary_key=True, index=True)
     amount_owed = Column(Float, nullable=False)
+    base_amount_owed = Column(Float, nullable=True) # amount_owed at the expense's fx_rate
 
     expense = relationship("Expense", back_populates="splits")
 
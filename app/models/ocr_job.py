@@ -0,0 +1,29 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, JSON, Index
+from sqlalchemy.orm import deferred
+from app.db.base_class import Base
+
+class OcrJob(Base):
+    """
+    A receipt queued for OCR. Workers claim queued rows with SKIP LOCKED; the row is
+    deleted OCR_JOB_RETENTION_HOURS after the job finishes. The image is in the receipt
+    store under sha256; image only holds the bytes of jobs queued before revision 0009
+    and is cleared once they finish.
+    """
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued") # queued, processing, done, failed
+    sha256 = Column(String(64), nullable=True, index=True)
+    image = deferred(Column(LargeBinary, nullable=True))
+    content_type = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    result = Column(JSON, nullable=True) # parse_receipt output
+    error = Column(String, nullable=True)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow) # retry backoff
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_ocrjob_status_run_after", "status", "run_after"),
+    )
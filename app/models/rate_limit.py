@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Float, Boolean
+from app.db import dialect
+from app.db.base_class import Base
+
+class RateLimitBucket(Base):
+    """
+    Token bucket state shared by all workers when RATE_LIMIT_BACKEND=postgres.
+    Unlogged: losing buckets on a crash only resets limits.
+    """
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False) # epoch seconds
+    allowed = Column(Boolean, nullable=False, default=True) # outcome of the last take
+
+    __table_args__ = {"prefixes": dialect.UNLOGGED}
@@ -0,0 +1,16 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from app.db.base_class import Base
+
+class Receipt(Base):
+    """
+    An uploaded receipt image. The bytes live in the receipt store under their SHA-256,
+    so rows for identical uploads share one file; it is deleted with the last row.
+    """
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), nullable=False, index=True)
+    content_type = Column(String, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    uploaded_by = Column(Integer, ForeignKey("user.id"), nullable=False, index=True)
+    expense_id = Column(Integer, ForeignKey("expense.id", ondelete="SET NULL"), nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -6,10 +6,12 @@ from app.db.base_class import Base
 class Settlement(Base):
     id = Column(Integer, primary_key=True, index=True)
     group_id = Column(Integer, ForeignKey("group.id"), nullable=False)
-    payer_id = Column(Integer, ForeignKey("user.id"), nullable=False)
-    payee_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    payer_id = Column(Integer, ForeignKey("user.id"), nullable=False, index=True)
+    payee_id = Column(Integer, ForeignKey("user.id"), nullable=False, index=True)
     amount = Column(Float, nullable=False)
     currency = Column(String, default="USD", nullable=False)
+    fx_rate = Column(Float, nullable=True) # To the group's base_currency, frozen at write time
+    base_amount = Column(Float, nullable=True)
     status = Column(String, default="pending") # pending, completed
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
+from app.db.base_class import Base
+
+class SpendRollup(Base):
+    """
+    Pre-aggregated spending per (group, month, category, user), in the group's base_currency.
+    paid_amount is what the user paid, share_amount is what the user owes from splits.
+    Maintained incrementally by analytics_service on every expense write.
+    """
+    group_id = Column(Integer, ForeignKey("group.id"), primary_key=True)
+    period = Column(String(7), primary_key=True) # YYYY-MM
+    category = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
+    paid_amount = Column(Float, default=0.0, nullable=False)
+    share_amount = Column(Float, default=0.0, nullable=False)
+    expense_count = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        Index("ix_spendrollup_group_user", "group_id", "user_id"),
+    )
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from app.db.base_class import Base
+
+class UserPairBalance(Base):
+    """
+    Net position between two users over all the groups they share, per currency (each
+    group's base_currency). amount > 0: counterparty owes user. Every pair is stored in
+    both directions with opposite signs, so one user's counterparties are a primary key
+    range scan. Maintained incrementally by pair_balance_service on every write.
+    """
+    user_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
+    counterparty_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
+    currency = Column(String, primary_key=True)
+    amount = Column(Float, default=0.0, nullable=False)
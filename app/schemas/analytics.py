@@ -0,0 +1,26 @@
+from typing import List
+from pydantic import BaseModel
+
+class CategoryTotal(BaseModel):
+    category: str
+    amount: float
+    expense_count: int
+
+class MonthTotal(BaseModel):
+    period: str
+    amount: float
+    expense_count: int
+
+class MemberTotal(BaseModel):
+    user_id: int
+    username: str
+    amount: float
+
+class GroupAnalytics(BaseModel):
+    group_id: int
+    base_currency: str
+    total_spent: float
+    by_category: List[CategoryTotal] = []
+    by_month: List[MonthTotal] = []
+    by_payer: List[MemberTotal] = []
+    member_shares: List[MemberTotal] = []
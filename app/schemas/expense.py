@@ -12,10 +12,12 @@ class ExpenseBase(BaseModel):
     currency: str = "USD"
     category: str = "Others"
     date: Optional[datetime] = None
+    merchant: Optional[str] = None
 
 class ExpenseCreate(ExpenseBase):
     group_id: int
     splits: List[ExpenseSplitBase]
+    receipt_text: Optional[str] = None # OCR text, indexed for search but not returned
 
 class Expense(ExpenseBase):
     id: int
@@ -27,3 +29,7 @@ class Expense(ExpenseBase):
     
     class Config:
         from_attributes = True
+
+class ExpenseSearchResult(BaseModel):
+    items: List[Expense] = []
+    next_cursor: Optional[str] = None
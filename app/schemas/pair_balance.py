@@ -0,0 +1,11 @@
+from typing import List
+from pydantic import BaseModel
+
+class CurrencyAmount(BaseModel):
+    currency: str
+    amount: float # > 0: they owe you, < 0: you owe them
+
+class Counterparty(BaseModel):
+    user_id: int
+    username: str
+    balances: List[CurrencyAmount] = []
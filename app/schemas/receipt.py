@@ -0,0 +1,17 @@
+from typing import Optional
+from pydantic import BaseModel
+from datetime import datetime
+
+class Receipt(BaseModel):
+    id: int
+    sha256: str
+    content_type: str
+    size_bytes: int
+    expense_id: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ReceiptUpdate(BaseModel):
+    expense_id: Optional[int] = None # None detaches the receipt from its expense
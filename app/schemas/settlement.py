@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 from app.schemas.user import User
@@ -22,3 +22,35 @@ class Settlement(SettlementBase):
 
     class Config:
         from_attributes = True
+
+class SettleUpTransfer(BaseModel):
+    from_id: int
+    to_id: int
+    amount: float
+
+class SettleUpRequest(BaseModel):
+    # The suggested_transactions from GET /groups/{id}/balances that the user confirmed
+    transactions: List[SettleUpTransfer]
+
+class NettingLeg(BaseModel):
+    group_id: int
+    group_name: str
+    from_id: int
+    to_id: int
+    amount: float
+
+class NettingTransfer(BaseModel):
+    counterparty_id: int
+    username: str
+    currency: str
+    from_id: int
+    to_id: int
+    amount: float # Net of the legs; 0 when debts across groups cancel out
+    groups: List[NettingLeg] = []
+
+class NettingPlan(BaseModel):
+    user_id: int
+    transfers: List[NettingTransfer] = []
+    transfer_count: int # Transfers with money to move
+    group_transfer_count: int # Per-group settlements the plan replaces
+    settlements_recorded: Optional[int] = None
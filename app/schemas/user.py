@@ -7,6 +7,7 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     sub: Optional[str] = None
+    uid: Optional[int] = None
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -0,0 +1,169 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func, delete
+from sqlalchemy.orm import selectinload
+from app.db import dialect
+from app.models.expense import Expense
+from app.models.group import Group
+from app.models.spend_rollup import SpendRollup
+from app.models.user import User
+from app.services.settlement_service import get_exchange_rate
+
+RollupKey = Tuple[str, str, int] # (period, category, user_id)
+
+def _period(expense: Expense) -> str:
+    when = expense.date or expense.created_at or datetime.utcnow()
+    return when.strftime("%Y-%m")
+
+def _split_value(split: Any, field: str) -> Any:
+    # Splits arrive as ORM rows, Pydantic models or the JSON dicts of recurring templates
+    return split[field] if isinstance(split, dict) else getattr(split, field)
+
+def expense_deltas(expense: Expense, splits: Iterable[Any], base_currency: str, sign: int = 1) -> Dict[RollupKey, list]:
+    """
+    Rollup increments for one expense: [paid_amount, share_amount, expense_count] per cell.
+    Use sign=-1 to retract an expense before it is updated or deleted.
+    """
+    # The rate frozen on the expense, so rollups agree with balances
+    rate = expense.fx_rate if expense.fx_rate is not None else get_exchange_rate(expense.currency, base_currency)
+    period = _period(expense)
+    category = expense.category or "Others"
+    deltas: Dict[RollupKey, list] = {}
+
+    payer_cell = deltas.setdefault((period, category, expense.payer_id), [0.0, 0.0, 0])
+    payer_cell[0] += sign * float(expense.amount) * rate
+    payer_cell[2] += sign
+
+    for split in splits:
+        cell = deltas.setdefault((period, category, _split_value(split, "user_id")), [0.0, 0.0, 0])
+        cell[1] += sign * float(_split_value(split, "amount_owed")) * rate
+    return deltas
+
+async def get_base_currency(db: AsyncSession, group_id: int) -> str:
+    result = await db.execute(select(Group.base_currency).filter(Group.id == group_id))
+    return result.scalar() or "USD"
+
+async def apply_deltas(db: AsyncSession, group_id: int, deltas: Dict[RollupKey, list]) -> None:
+    """
+    Upsert rollup increments in a single statement. Does not commit; the caller's
+    transaction keeps the rollup consistent with the expense rows.
+    """
+    if not deltas:
+        return
+    rows = [
+        {
+            "group_id": group_id,
+            "period": period,
+            "category": category,
+            "user_id": user_id,
+            "paid_amount": paid,
+            "share_amount": share,
+            "expense_count": count,
+        }
+        for (period, category, user_id), (paid, share, count) in deltas.items()
+    ]
+    stmt = dialect.insert(SpendRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SpendRollup.group_id, SpendRollup.period, SpendRollup.category, SpendRollup.user_id],
+        set_={
+            "paid_amount": SpendRollup.paid_amount + stmt.excluded.paid_amount,
+            "share_amount": SpendRollup.share_amount + stmt.excluded.share_amount,
+            "expense_count": SpendRollup.expense_count + stmt.excluded.expense_count,
+        },
+    )
+    await db.execute(stmt)
+
+async def apply_expense(db: AsyncSession, expense: Expense, splits: Iterable[Any], sign: int = 1, base_currency: Optional[str] = None) -> None:
+    if base_currency is None:
+        base_currency = await get_base_currency(db, expense.group_id)
+    await apply_deltas(db, expense.group_id, expense_deltas(expense, splits, base_currency, sign))
+
+async def rebuild_group_rollups(db: AsyncSession, group_id: int) -> int:
+    """
+    Recompute a group's rollups from scratch (backfill, or after base_currency changes).
+    Returns the number of expenses scanned. Does not commit.
+    """
+    base_currency = await get_base_currency(db, group_id)
+    await db.execute(delete(SpendRollup).where(SpendRollup.group_id == group_id))
+
+    result = await db.execute(
+        select(Expense)
+        .filter(Expense.group_id == group_id)
+        .options(selectinload(Expense.splits))
+    )
+    deltas: Dict[RollupKey, list] = {}
+    count = 0
+    for expense in result.scalars():
+        for key, (paid, share, n) in expense_deltas(expense, expense.splits, base_currency).items():
+            cell = deltas.setdefault(key, [0.0, 0.0, 0])
+            cell[0] += paid
+            cell[1] += share
+            cell[2] += n
+        count += 1
+    await apply_deltas(db, group_id, deltas)
+    return count
+
+async def get_group_analytics(db: AsyncSession, group_id: int, start_period: Optional[str] = None, end_period: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Spending breakdown for a group read straight from the rollup table.
+    Periods are inclusive 'YYYY-MM' bounds.
+    """
+    base_currency = await get_base_currency(db, group_id)
+    filters = [SpendRollup.group_id == group_id]
+    if start_period:
+        filters.append(SpendRollup.period >= start_period)
+    if end_period:
+        filters.append(SpendRollup.period <= end_period)
+
+    paid = func.sum(SpendRollup.paid_amount)
+    count = func.sum(SpendRollup.expense_count)
+
+    category_res = await db.execute(
+        select(SpendRollup.category, paid, count)
+        .filter(*filters)
+        .group_by(SpendRollup.category)
+        .order_by(paid.desc())
+    )
+    by_category = [
+        {"category": c, "amount": round(a or 0.0, 2), "expense_count": int(n or 0)}
+        for c, a, n in category_res.all() if n
+    ]
+
+    month_res = await db.execute(
+        select(SpendRollup.period, paid, count)
+        .filter(*filters)
+        .group_by(SpendRollup.period)
+        .order_by(SpendRollup.period)
+    )
+    by_month = [
+        {"period": p, "amount": round(a or 0.0, 2), "expense_count": int(n or 0)}
+        for p, a, n in month_res.all() if n
+    ]
+
+    member_res = await db.execute(
+        select(SpendRollup.user_id, User.username, paid, func.sum(SpendRollup.share_amount))
+        .join(User, User.id == SpendRollup.user_id)
+        .filter(*filters)
+        .group_by(SpendRollup.user_id, User.username)
+    )
+    by_payer = []
+    member_shares = []
+    for uid, username, paid_total, share_total in member_res.all():
+        if round(paid_total or 0.0, 2):
+            by_payer.append({"user_id": uid, "username": username, "amount": round(paid_total, 2)})
+        if round(share_total or 0.0, 2):
+            member_shares.append({"user_id": uid, "username": username, "amount": round(share_total, 2)})
+    by_payer.sort(key=lambda x: x["amount"], reverse=True)
+    member_shares.sort(key=lambda x: x["amount"], reverse=True)
+
+    return {
+        "group_id": group_id,
+        "base_currency": base_currency,
+        "total_spent": round(sum(c["amount"] for c in by_category), 2),
+        "by_category": by_category,
+        "by_month": by_month,
+        "by_payer": by_payer,
+        "member_shares": member_shares,
+    }
@@ -18,14 +18,15 @@ async def calculate_debts(db: AsyncSession, group_id: int) -> List[Dict]:
     for expense in expenses:
         # Payer paid full amount
         balances[expense.payer_id] = balances.get(expense.payer_id, 0) + expense.amount
-        
-        # Load splits (assuming loaded or verify fetch)
-        # Note: In real app, ensure eagerly loaded or fetch separately
-        splits_query = await db.execute(select(ExpenseSplit).filter(ExpenseSplit.expense_id == expense.id))
-        splits = splits_query.scalars().all()
 
-        for split in splits:
-            balances[split.user_id] = balances.get(split.user_id, 0) - split.amount_owed
+    # Splits for all expenses in one query
+    splits_query = await db.execute(
+        select(ExpenseSplit)
+        .join(Expense, Expense.id == ExpenseSplit.expense_id)
+        .filter(Expense.group_id == group_id)
+    )
+    for split in splits_query.scalars().all():
+        balances[split.user_id] = balances.get(split.user_id, 0) - split.amount_owed
 
     # 3. Simplify Debts (Greedy Algorithm)
     debtors = []
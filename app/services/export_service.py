@@ -0,0 +1,156 @@
+import csv
+import io
+import json
+import zlib
+from typing import Any, AsyncIterator, Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from app.db.session import AsyncSessionLocal
+from app.models.expense import Expense, ExpenseSplit
+from app.models.settlement import Settlement
+from app.models.user import User
+
+# Rows fetched per server-side cursor round trip
+EXPORT_BATCH_SIZE = 1000
+# Bytes buffered before a chunk is handed to the response
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+CSV_COLUMNS = [
+    "type", "id", "date", "description", "category", "currency", "amount",
+    "from_user_id", "from_username", "to_user_id", "to_username", "share",
+]
+
+def _iso(value: Any) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+def _expense_rows_stmt(group_id: int):
+    payer = aliased(User)
+    member = aliased(User)
+    return (
+        select(
+            Expense.id, Expense.date, Expense.description, Expense.category,
+            Expense.currency, Expense.amount, Expense.payer_id, payer.username,
+            ExpenseSplit.user_id, member.username, ExpenseSplit.amount_owed,
+        )
+        .join(payer, payer.id == Expense.payer_id)
+        .outerjoin(ExpenseSplit, ExpenseSplit.expense_id == Expense.id)
+        .outerjoin(member, member.id == ExpenseSplit.user_id)
+        .filter(Expense.group_id == group_id)
+        .order_by(Expense.date, Expense.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+def _settlement_rows_stmt(group_id: int):
+    payer = aliased(User)
+    payee = aliased(User)
+    return (
+        select(
+            Settlement.id, Settlement.created_at, Settlement.currency, Settlement.amount,
+            Settlement.payer_id, payer.username, Settlement.payee_id, payee.username,
+        )
+        .join(payer, payer.id == Settlement.payer_id)
+        .join(payee, payee.id == Settlement.payee_id)
+        .filter(Settlement.group_id == group_id)
+        .order_by(Settlement.created_at, Settlement.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+async def _iter_records(group_id: int) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield one dict per expense (with its splits) and per settlement.
+    Rows come from server-side cursors, so memory stays flat regardless of group size.
+    The session is owned here because the response body outlives the request's dependencies.
+    """
+    async with AsyncSessionLocal() as db:
+        current: Optional[Dict[str, Any]] = None
+        result = await db.stream(_expense_rows_stmt(group_id))
+        async for (eid, date, description, category, currency, amount,
+                   payer_id, payer_name, split_uid, split_name, owed) in result:
+            if current is None or current["id"] != eid:
+                if current is not None:
+                    yield current
+                current = {
+                    "type": "expense",
+                    "id": eid,
+                    "date": _iso(date),
+                    "description": description,
+                    "category": category,
+                    "currency": currency,
+                    "amount": amount,
+                    "payer_id": payer_id,
+                    "payer": payer_name,
+                    "splits": [],
+                }
+            if split_uid is not None:
+                current["splits"].append({"user_id": split_uid, "username": split_name, "amount_owed": owed})
+        if current is not None:
+            yield current
+
+        result = await db.stream(_settlement_rows_stmt(group_id))
+        async for sid, created_at, currency, amount, payer_id, payer_name, payee_id, payee_name in result:
+            yield {
+                "type": "settlement",
+                "id": sid,
+                "date": _iso(created_at),
+                "currency": currency,
+                "amount": amount,
+                "payer_id": payer_id,
+                "payer": payer_name,
+                "payee_id": payee_id,
+                "payee": payee_name,
+            }
+
+def _csv_rows(record: Dict[str, Any]):
+    if record["type"] == "settlement":
+        yield [
+            "settlement", record["id"], record["date"], "", "", record["currency"], record["amount"],
+            record["payer_id"], record["payer"], record["payee_id"], record["payee"], "",
+        ]
+        return
+    common = [
+        "expense", record["id"], record["date"], record["description"], record["category"],
+        record["currency"], record["amount"], record["payer_id"], record["payer"],
+    ]
+    if not record["splits"]:
+        yield common + ["", "", ""]
+    for split in record["splits"]:
+        yield common + [split["user_id"], split["username"], split["amount_owed"]]
+
+async def _iter_text(group_id: int, fmt: str) -> AsyncIterator[str]:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_COLUMNS)
+        async for record in _iter_records(group_id):
+            writer.writerows(_csv_rows(record))
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        parts = []
+        size = 0
+        async for record in _iter_records(group_id):
+            line = json.dumps(record, separators=(",", ":")) + "\n"
+            parts.append(line)
+            size += len(line)
+            if size >= EXPORT_CHUNK_SIZE:
+                yield "".join(parts)
+                parts = []
+                size = 0
+        yield "".join(parts)
+
+async def stream_group_export(group_id: int, fmt: str = "csv", gzip: bool = False) -> AsyncIterator[bytes]:
+    """
+    Encoded export body for a StreamingResponse. fmt is 'csv' or 'jsonl'.
+    """
+    compressor = zlib.compressobj(wbits=31) if gzip else None # wbits=31 -> gzip container
+    async for text in _iter_text(group_id, fmt):
+        data = text.encode("utf-8")
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor:
+        yield compressor.flush()
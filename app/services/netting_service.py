@@ -0,0 +1,143 @@
+"""
+Cross-group netting: one transfer per counterparty (and currency) instead of one per group.
+
+A user's position with each counterparty is computed per shared group from the stored
+base-currency amounts (who paid for whose share, and settlements between the two), then
+netted across groups. Settling records one settlement per group leg, so every group's
+books clear, while only the net amount actually changes hands. The number of queries is
+fixed no matter how many groups the user is in.
+"""
+from typing import Any, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import and_, func, union_all
+from app.db import dialect
+from app.models.expense import Expense, ExpenseSplit
+from app.models.group import Group, GroupMember
+from app.models.notification import Notification
+from app.models.settlement import Settlement
+from app.models.user import User
+from app.services import pair_balance_service
+
+async def group_positions(db: AsyncSession, user_id: int, counterparty_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    The user's open position with each counterparty in each of the user's groups, in the
+    group's base_currency; amount > 0 means the counterparty owes the user. One query.
+    """
+    movements = union_all(
+        # others' shares of what the user paid
+        select(Expense.group_id, ExpenseSplit.user_id.label("counterparty_id"), ExpenseSplit.base_amount_owed.label("amount"))
+        .join(Expense, Expense.id == ExpenseSplit.expense_id)
+        .filter(Expense.payer_id == user_id, ExpenseSplit.user_id != user_id),
+        # the user's shares of what others paid
+        select(Expense.group_id, Expense.payer_id, -ExpenseSplit.base_amount_owed)
+        .join(Expense, Expense.id == ExpenseSplit.expense_id)
+        .filter(ExpenseSplit.user_id == user_id, Expense.payer_id != user_id),
+        # payments the user made or received
+        select(Settlement.group_id, Settlement.payee_id, Settlement.base_amount)
+        .filter(Settlement.payer_id == user_id, Settlement.payee_id != user_id),
+        select(Settlement.group_id, Settlement.payer_id, -Settlement.base_amount)
+        .filter(Settlement.payee_id == user_id, Settlement.payer_id != user_id),
+    ).subquery()
+    amount = func.sum(movements.c.amount)
+    stmt = (
+        select(movements.c.group_id, Group.name, Group.base_currency, movements.c.counterparty_id, User.username, amount)
+        .join(GroupMember, and_(GroupMember.group_id == movements.c.group_id, GroupMember.user_id == user_id))
+        .join(Group, Group.id == movements.c.group_id)
+        .join(User, User.id == movements.c.counterparty_id)
+        .group_by(movements.c.group_id, Group.name, Group.base_currency, movements.c.counterparty_id, User.username)
+    )
+    if counterparty_id is not None:
+        stmt = stmt.filter(movements.c.counterparty_id == counterparty_id)
+    result = await db.execute(stmt)
+    return [
+        {"group_id": gid, "group_name": name, "currency": currency or "USD",
+         "counterparty_id": cid, "username": username, "amount": round(total or 0.0, 2)}
+        for gid, name, currency, cid, username, total in result.all()
+        if round(total or 0.0, 2)
+    ]
+
+def _direction(user_id: int, counterparty_id: int, amount: float) -> Dict[str, Any]:
+    if amount > 0:
+        return {"from_id": counterparty_id, "to_id": user_id, "amount": amount}
+    # -0.0 for a net of 0 would serialize as "-0.0"
+    return {"from_id": user_id, "to_id": counterparty_id, "amount": -amount if amount else 0.0}
+
+def build_plan(user_id: int, positions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Net the per-group positions per (counterparty, currency). Each transfer lists the
+    group legs it replaces; legs are whole cents, so a transfer equals the sum of its legs.
+    A transfer of 0 still clears offsetting debts in its groups.
+    """
+    transfers: Dict[tuple, Dict[str, Any]] = {}
+    for p in positions:
+        key = (p["counterparty_id"], p["currency"])
+        transfer = transfers.get(key)
+        if transfer is None:
+            transfer = transfers[key] = {
+                "counterparty_id": p["counterparty_id"], "username": p["username"],
+                "currency": p["currency"], "net": 0.0, "groups": [],
+            }
+        transfer["net"] += p["amount"]
+        transfer["groups"].append({"group_id": p["group_id"], "group_name": p["group_name"],
+                                   **_direction(user_id, p["counterparty_id"], p["amount"])})
+
+    plan = []
+    for transfer in transfers.values():
+        net = round(transfer.pop("net"), 2)
+        transfer.update(_direction(user_id, transfer["counterparty_id"], net))
+        transfer["groups"].sort(key=lambda g: g["group_id"])
+        plan.append(transfer)
+    plan.sort(key=lambda t: (-t["amount"], t["counterparty_id"], t["currency"]))
+    legs = sum(len(t["groups"]) for t in plan)
+    return {
+        "user_id": user_id,
+        "transfers": plan,
+        "transfer_count": sum(1 for t in plan if t["amount"]),
+        "group_transfer_count": legs, # what settling group by group would take
+    }
+
+async def get_plan(db: AsyncSession, user_id: int, counterparty_id: Optional[int] = None) -> Dict[str, Any]:
+    return build_plan(user_id, await group_positions(db, user_id, counterparty_id))
+
+def _notification_message(user: User, transfer: Dict[str, Any]) -> str:
+    """Worded for the counterparty."""
+    groups = f"{len(transfer['groups'])} group(s)"
+    if not transfer["amount"]:
+        return f"{user.username} settled up with you across {groups}; your debts cancelled out."
+    amount = f"{transfer['currency']} {transfer['amount']:.2f}"
+    if transfer["from_id"] == user.id:
+        return f"{user.username} paid you {amount}, settling up across {groups}."
+    return f"{user.username} recorded your payment of {amount}, settling up across {groups}."
+
+async def settle(db: AsyncSession, user: User, counterparty_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Record the plan: one completed settlement per group leg, pair balances updated and one
+    notification per counterparty, all in one transaction. The user's groups are locked
+    first (in id order), so a concurrent settle-up of the same debts waits and then finds
+    nothing left to record.
+    """
+    group_ids = select(GroupMember.group_id).filter(GroupMember.user_id == user.id)
+    await dialect.lock_rows(db, Group, Group.id.in_(group_ids))
+
+    plan = await get_plan(db, user.id, counterparty_id)
+    settlements = [
+        Settlement(group_id=leg["group_id"], payer_id=leg["from_id"], payee_id=leg["to_id"],
+                   amount=leg["amount"], currency=transfer["currency"], fx_rate=1.0,
+                   base_amount=leg["amount"], status="completed")
+        for transfer in plan["transfers"] for leg in transfer["groups"]
+    ]
+    deltas: Dict[pair_balance_service.PairKey, float] = {}
+    for settlement in settlements:
+        for key, amount in pair_balance_service.settlement_deltas(settlement, settlement.currency).items():
+            deltas[key] = deltas.get(key, 0.0) + amount
+    notifications = [
+        Notification(user_id=transfer["counterparty_id"], message=_notification_message(user, transfer), type="settlement")
+        for transfer in plan["transfers"]
+    ]
+    # Multi-row INSERTs (executemany) for the settlements and notifications
+    db.add_all(settlements + notifications)
+    await pair_balance_service.apply_deltas(db, deltas)
+    await db.commit()
+    plan["settlements_recorded"] = len(settlements)
+    return plan
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+from app.core.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+MEMORY_TTL_SECONDS = 24 * 3600
+# Evict down to this fraction of the limit so we don't rescan the directory on every write
+EVICT_TO = 0.9
+
+class OcrResultCache:
+    """
+    parse_receipt results keyed by SHA-256 of the image bytes plus the OCR config
+    version: an in-process LRU in front of a directory shared by all workers on the
+    host. Disk entries are JSON files whose mtime is refreshed on every hit, and the
+    least recently used are deleted once the directory exceeds max_disk_bytes.
+    """
+    def __init__(self, directory: str, max_disk_bytes: int, memory_entries: int):
+        self.memory = TTLCache(maxsize=memory_entries, ttl=MEMORY_TTL_SECONDS)
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._disk_bytes: Optional[int] = None # scanned lazily, then tracked per write
+        self._lock = threading.Lock()
+        self.stats: Dict[str, float] = {
+            "memory_hits_total": 0,
+            "disk_hits_total": 0,
+            "misses_total": 0,
+            "writes_total": 0,
+            "evictions_total": 0,
+        }
+
+    def get_stats(self) -> Dict[str, float]:
+        lookups = self.stats["memory_hits_total"] + self.stats["disk_hits_total"] + self.stats["misses_total"]
+        hits = self.stats["memory_hits_total"] + self.stats["disk_hits_total"]
+        return {
+            **self.stats,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "disk_bytes": self._disk_bytes or 0,
+        }
+
+    @staticmethod
+    def key(sha256: str, config_version: str) -> str:
+        """sha256 is the hex digest of the image bytes."""
+        return f"{sha256}-v{config_version}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = json.loads(f.read())
+            os.utime(path) # mark as recently used for eviction
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, value: Dict[str, Any]) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(value).encode()
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path) # readers never see a partial file
+        with self._lock:
+            if self._disk_bytes is None:
+                self._evict()
+            else:
+                self._disk_bytes += len(data)
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict()
+
+    def _evict(self) -> None:
+        """Rescan (other workers write here too) and delete least recently used files. Holds _lock."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_disk_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_disk_bytes * EVICT_TO:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                self.stats["evictions_total"] += 1
+        self._disk_bytes = total
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats["memory_hits_total"] += 1
+            return dict(value)
+        if self.directory:
+            value = await asyncio.to_thread(self._read_disk, key)
+            if value is not None:
+                self.stats["disk_hits_total"] += 1
+                self.memory.set(key, value)
+                return dict(value)
+        self.stats["misses_total"] += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        self.memory.set(key, dict(value))
+        self.stats["writes_total"] += 1
+        if self.directory:
+            try:
+                await asyncio.to_thread(self._write_disk, key, value)
+            except OSError as e:
+                logger.warning(f"Could not write OCR cache entry: {e}")
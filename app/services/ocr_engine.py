@@ -0,0 +1,77 @@
+"""
+Tesseract backends for the OCR workers.
+
+pytesseract runs the tesseract binary for every call: a process start, the language
+model loaded from disk and the image written to a temp file, each time. tesserocr
+binds libtesseract directly, so each worker process loads the model once and keeps
+the API instance, and images are handed over in memory.
+"""
+import logging
+from typing import Optional
+import pytesseract
+from PIL import Image
+from app.core.config import settings
+
+try:
+    import tesserocr
+except ImportError: # optional; the binary + pytesseract keep working without it
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ("auto", "tesserocr", "pytesseract")
+LANGUAGE = "eng" # what the tesseract CLI uses when no -l is given
+
+# One per worker process; workers run a single job at a time so it's never shared
+_api = None
+
+def resolve(engine: Optional[str] = None) -> str:
+    """The backend that will actually run for OCR_ENGINE (or the given override)."""
+    engine = engine or settings.OCR_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown OCR engine {engine!r}, expected one of {', '.join(ENGINES)}")
+    if engine == "auto":
+        return "tesserocr" if tesserocr is not None else "pytesseract"
+    if engine == "tesserocr" and tesserocr is None:
+        raise RuntimeError("OCR_ENGINE is tesserocr but the tesserocr package is not installed")
+    return engine
+
+def _get_api():
+    global _api
+    if _api is None:
+        kwargs = {"lang": LANGUAGE}
+        if settings.OCR_TESSDATA_PATH:
+            kwargs["path"] = settings.OCR_TESSDATA_PATH
+        _api = tesserocr.PyTessBaseAPI(**kwargs)
+        logger.info(f"Loaded tesseract {tesserocr.tesseract_version().split()[1]} in-process")
+    return _api
+
+def reset() -> None:
+    """Drop this process's API instance, e.g. after it failed mid-recognition."""
+    global _api
+    if _api is not None:
+        _api.End()
+        _api = None
+
+def image_to_string(image: Image.Image, psm: int, timeout: float = 0, engine: Optional[str] = None) -> str:
+    """
+    OCR one image with the given page segmentation mode. timeout is in seconds (0 = none);
+    on expiry the error message mentions "timeout", which callers map to OcrTimeout.
+    """
+    if resolve(engine) == "pytesseract":
+        return pytesseract.image_to_string(image, config=f'--psm {psm}', timeout=timeout)
+
+    api = _get_api()
+    try:
+        api.SetPageSegMode(psm)
+        api.SetImage(image)
+        if not api.Recognize(int(timeout * 1000)):
+            # With a timeout set, Recognize only returns False when the monitor cancelled it
+            raise RuntimeError("Tesseract timeout" if timeout else "Tesseract recognition failed")
+        return api.GetUTF8Text()
+    except Exception:
+        reset()
+        raise
+    finally:
+        if _api is not None:
+            _api.Clear() # frees the image and results, keeps the loaded model
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set
+from sqlalchemy import and_, delete, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import undefer
+from app.core.config import settings
+from app.core.metrics import stats_collector
+from app.db import dialect
+from app.db.session import AsyncSessionLocal
+from app.models.notification import Notification
+from app.models.ocr_job import OcrJob
+from app.services import ocr_service, receipt_store
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL_SECONDS = 600
+
+# Wakes this process's worker when a job is queued here, instead of waiting for the next poll
+_job_queued = asyncio.Event()
+
+stats: Dict[str, float] = {
+    "queued_total": 0,
+    "completed_total": 0,
+    "failed_total": 0,
+    "retried_total": 0,
+    "purged_total": 0,
+}
+stats_collector.register("ocr_jobs", lambda: stats)
+
+async def create_job(db: AsyncSession, user_id: int, sha256: str, content_type: Optional[str]) -> OcrJob:
+    """Queue OCR of an image already in the receipt store."""
+    job = OcrJob(user_id=user_id, sha256=sha256, content_type=content_type, status="queued", attempts=0)
+    db.add(job)
+    await db.commit()
+    stats["queued_total"] += 1
+    _job_queued.set()
+    return job
+
+async def get_job(db: AsyncSession, job_id: int, user_id: int) -> Optional[OcrJob]:
+    result = await db.execute(select(OcrJob).filter(OcrJob.id == job_id, OcrJob.user_id == user_id))
+    return result.scalars().first()
+
+async def claim_job(db: AsyncSession) -> Optional[int]:
+    """
+    Take the next due job, or one whose worker died mid-run. SKIP LOCKED lets every
+    API process run a worker without contending for the same row; the conditional
+    UPDATE keeps the claim safe where row locks aren't available.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=settings.OCR_TIMEOUT_SECONDS * 2 + 60)
+    stmt = (
+        select(OcrJob.id, OcrJob.status)
+        .filter(or_(
+            and_(OcrJob.status == "queued", OcrJob.run_after <= now),
+            and_(OcrJob.status == "processing", OcrJob.started_at < stale),
+        ))
+        .order_by(OcrJob.run_after)
+        .limit(1)
+    )
+    row = (await db.execute(dialect.skip_locked(stmt))).first()
+    if row is None:
+        await db.rollback()
+        return None
+    result = await db.execute(
+        update(OcrJob)
+        .where(OcrJob.id == row.id, OcrJob.status == row.status)
+        .values(status="processing", attempts=OcrJob.attempts + 1, started_at=now)
+    )
+    await db.commit()
+    return row.id if result.rowcount == 1 else None
+
+def _notify(db: AsyncSession, job: OcrJob) -> None:
+    if job.status == "done":
+        message = f"Receipt scanned: {job.result.get('merchant')} {job.result.get('amount')}"
+    else:
+        message = "Receipt scan failed, please try again"
+    db.add(Notification(user_id=job.user_id, message=message, type="ocr"))
+
+async def process_job(job_id: int) -> None:
+    async with AsyncSessionLocal() as db:
+        job = await db.get(OcrJob, job_id, options=[undefer(OcrJob.image)])
+        if job is None or job.status != "processing":
+            return
+        now = datetime.utcnow()
+        try:
+            if job.sha256 is None and job.image is None:
+                raise ValueError("Job has no image")
+            if job.attempts > settings.OCR_JOB_MAX_ATTEMPTS:
+                # Reclaimed after its worker died too many times; don't let it take down another
+                raise ValueError("OCR did not complete")
+            if job.sha256 is not None:
+                job.result = await ocr_service.process_receipt_file(receipt_store.blob_path(job.sha256), job.sha256)
+            else:
+                job.result = await ocr_service.process_receipt_image(job.image)
+            job.status = "done"
+            job.error = None
+        except Exception as e:
+            # Busy, timed out or crashed workers are worth retrying; undecodable images are not
+            if isinstance(e, RuntimeError) and job.attempts < settings.OCR_JOB_MAX_ATTEMPTS:
+                job.status = "queued"
+                job.error = str(e)[:500]
+                job.run_after = now + timedelta(seconds=settings.OCR_JOB_RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1))
+                stats["retried_total"] += 1
+                await db.commit()
+                return
+            logger.warning(f"OCR job {job_id} failed after {job.attempts} attempt(s): {e}")
+            job.status = "failed"
+            job.error = str(e)[:500]
+
+        job.finished_at = datetime.utcnow()
+        job.image = None # the result is all that is kept; gc_receipts removes the blob
+        stats["completed_total" if job.status == "done" else "failed_total"] += 1
+        _notify(db, job)
+        await db.commit()
+
+async def purge_expired(db: AsyncSession) -> int:
+    cutoff = datetime.utcnow() - timedelta(hours=settings.OCR_JOB_RETENTION_HOURS)
+    result = await db.execute(
+        delete(OcrJob).where(OcrJob.status.in_(("done", "failed")), OcrJob.finished_at < cutoff)
+    )
+    await db.commit()
+    stats["purged_total"] += result.rowcount
+    return result.rowcount
+
+async def run_worker() -> None:
+    """
+    Background task started in lifespan: keeps up to OCR_JOB_CONCURRENCY jobs on the
+    OCR pool, polling every OCR_JOB_POLL_SECONDS when idle.
+    """
+    slots = asyncio.Semaphore(settings.OCR_JOB_CONCURRENCY)
+    running: Set[asyncio.Task] = set()
+    last_purge = 0.0
+
+    async def run(job_id: int) -> None:
+        try:
+            await process_job(job_id)
+        except Exception as e:
+            logger.error(f"OCR job {job_id} crashed the worker: {e}")
+        finally:
+            slots.release()
+
+    try:
+        while True:
+            await slots.acquire()
+            job_id = None
+            try:
+                if time.monotonic() - last_purge > PURGE_INTERVAL_SECONDS:
+                    async with AsyncSessionLocal() as db:
+                        await purge_expired(db)
+                    last_purge = time.monotonic()
+                _job_queued.clear()
+                async with AsyncSessionLocal() as db:
+                    job_id = await claim_job(db)
+            except asyncio.CancelledError:
+                slots.release()
+                raise
+            except Exception as e:
+                logger.warning(f"OCR job worker could not reach the database: {e}")
+
+            if job_id is None:
+                slots.release()
+                try:
+                    await asyncio.wait_for(_job_queued.wait(), timeout=settings.OCR_JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(run(job_id))
+            running.add(task)
+            task.add_done_callback(running.discard)
+    finally:
+        # Interrupted jobs stay "processing" and are reclaimed once stale
+        for task in list(running):
+            task.cancel()
@@ -1,11 +1,20 @@
-import re
 import pytesseract
 from PIL import Image, ImageOps, ImageFilter, ImageEnhance
 from io import BytesIO
-from typing import Dict, Any, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 import os
+import asyncio
+import hashlib
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 import shutil
+from app.core.config import settings
+from app.core.metrics import stats_collector
+from app.services import ocr_engine, ocr_preprocess, receipt_parser
+from app.services.ocr_cache import OcrResultCache
 
 # Flexible Tesseract path detection (Windows + Linux/Docker)
 tesseract_cmd = shutil.which("tesseract")
@@ -26,12 +35,42 @@ else:
             pytesseract.pytesseract.tesseract_cmd = path
             break
 
-# Flexible amount pattern: handles commas, spaces, and requires at least two digits after dot
-AMOUNT_PATTERN = r'(\d{1,3}(?:[,\s]\d{3})*(?:\.\d{2}))'
-DATE_PATTERN = r'(\d{1,2}[/\.-]\d{1,2}[/\.-]\d{2,4})'
+# Bump whenever preprocessing, tesseract options or parse_receipt change what a scan returns;
+# cached results from older versions are then ignored
+OCR_CONFIG_VERSION = "3"
+
+def config_version() -> str:
+    return f"{OCR_CONFIG_VERSION}-{settings.OCR_PREPROCESS}-{ocr_engine.resolve()}"
+
+class OcrBusy(RuntimeError):
+    """Raised when too many OCR jobs are already running or queued."""
+
+class OcrTimeout(RuntimeError):
+    """Raised when a job does not finish within OCR_TIMEOUT_SECONDS, queue wait included."""
+
+def extract_text(image_bytes: bytes, timeout: float = 0, preprocess: Optional[str] = None, engine: Optional[str] = None) -> str:
+    """
+    timeout (seconds, 0 = none) bounds all tesseract runs together; tesseract is stopped when it expires.
+    preprocess: "adaptive" (crop, deskew, binarize, one pass with a chosen PSM) or "basic"
+    (grayscale + contrast, PSM 6 then PSM 3 if little text); defaults to OCR_PREPROCESS.
+    engine: see ocr_engine; defaults to OCR_ENGINE.
+    """
+    preprocess = preprocess or settings.OCR_PREPROCESS
+    deadline = time.monotonic() + timeout if timeout else None
+
+    def remaining() -> float:
+        if deadline is None:
+            return 0
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise OcrTimeout("OCR timed out")
+        return left
 
-def extract_text(image_bytes: bytes) -> str:
     try:
+        if preprocess == "adaptive":
+            prepared = ocr_preprocess.prepare(image_bytes)
+            return ocr_engine.image_to_string(prepared.image, prepared.psm, timeout=remaining(), engine=engine)
+
         image = Image.open(BytesIO(image_bytes))
         
         # Preprocessing: Grayscale and Contrast enhancement usually enough for high-res images
@@ -41,112 +80,185 @@ def extract_text(image_bytes: bytes) -> str:
         
         # PSM 6: Assume a single uniform block of text (often best for receipts)
         # We'll try PSM 6 first as it preserves line structure better for "TOTAL <space> Price"
-        text = pytesseract.image_to_string(image, config='--psm 6')
+        text = ocr_engine.image_to_string(image, 6, timeout=remaining(), engine=engine)
         
         # If text is very short, try PSM 3
         if len(text.strip()) < 50:
-            text = pytesseract.image_to_string(image, config='--psm 3')
+            text = ocr_engine.image_to_string(image, 3, timeout=remaining(), engine=engine)
             
         return text
+    except OcrTimeout:
+        raise
     except Exception as e:
+        if "timeout" in str(e).lower():
+            raise OcrTimeout("OCR timed out")
         print(f"OCR Error: {e}")
         if "tesseract is not installed" in str(e).lower() or "no such file" in str(e).lower():
             raise RuntimeError("Tesseract OCR engine not found. Please install it from https://github.com/UB-Mannheim/tesseract/wiki")
         raise e
 
 def parse_receipt(text: str) -> Dict[str, Any]:
-    # Clean lines and remove empty ones
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-    
-    amount = 0.0
-    date = None
-    merchant = "Unknown Merchant"
-
-    # 1. MERCHANT HEURISTICS
-    # The merchant is usually the very first lines. 
-    # We'll pick the first line that has at least some letters and isn't a date/keyword.
-    for i, line in enumerate(lines[:4]):
-        # Skip if line is just digits/symbols
-        cleaned = "".join(filter(str.isalnum, line))
-        if len(cleaned) < 2:
-            continue
-            
-        line_upper = line.upper()
-        if any(kw in line_upper for kw in ["RECEIPT", "INVOICE", "DATE", "WELCOME", "STORE", "TOTAL", "CASH"]):
-            continue
-            
-        merchant = line
-        # Check if the NEXT line is also a potential part of the merchant name
-        # (Stylized logos often split across lines in OCR)
-        if i+1 < len(lines):
-            next_line = lines[i+1]
-            next_line_upper = next_line.upper()
-            if any(c.isalpha() for c in next_line) and \
-               not any(kw in next_line_upper for kw in ["RECEIPT", "TOTAL", "CASH", "DATE", "*", "=="]):
-                if len(next_line) < 30: # Names are usually not extremely long
-                    merchant = f"{line} {next_line}"
-        break
-
-    # 2. TOTAL AMOUNT HEURISTICS
-    total_keywords = ["TOTAL", "NET AMOUNT", "AMOUNT DUE", "TOTAL DUE", "SUM", "BALANCE"]
-    
-    for i, line in enumerate(lines):
-        line_upper = line.upper()
-        if any(kw in line_upper for kw in total_keywords):
-            # Ignore subtotal or lines about cash/change
-            if "SUBTOTAL" in line_upper or "SUB TOTAL" in line_upper:
-                continue
-            if any(exc in line_upper for exc in ["CASH", "CHANGE", "TENDERED"]):
-                if "TOTAL" not in line_upper:
-                    continue
-
-            # Look for amount on the SAME line
-            match = re.search(AMOUNT_PATTERN, line)
-            if match:
-                try:
-                    val = float(match.group(1).replace(',', '').replace(' ', ''))
-                    if val > amount:
-                        amount = val
-                except ValueError: pass
-            
-            # OR look for amount on the NEXT line (sometimes they wrap)
-            elif i + 1 < len(lines):
-                next_line = lines[i+1]
-                match = re.search(AMOUNT_PATTERN, next_line)
-                if match:
-                    try:
-                        val = float(match.group(1).replace(',', '').replace(' ', ''))
-                        if val > amount:
-                            amount = val
-                    except ValueError: pass
-
-    # Fallback: if amount is 0, just find the largest number that isn't CASH/CHANGE
-    if amount == 0:
-        all_vals = []
-        for line in lines:
-            if any(exc in line.upper() for exc in ["CASH", "CHANGE", "TENDERED", "DATE"]):
-                continue
-            matches = re.findall(AMOUNT_PATTERN, line)
-            for m in matches:
-                try:
-                    all_vals.append(float(m.replace(',', '').replace(' ', '')))
-                except ValueError: pass
-        if all_vals:
-            amount = max(all_vals)
-
-    # 3. DATE HEURISTICS
-    date_match = re.search(DATE_PATTERN, text)
-    if date_match:
-        date = date_match.group(1)
-
-    return {
-        "amount": amount,
-        "date": date,
-        "merchant": merchant,
-        "raw_text_snippet": text[:500] 
-    }
+    """Amount, date and merchant plus subtotal, tax and line items; see receipt_parser."""
+    return receipt_parser.parse(text)
+
+def scan_receipt(image: Union[bytes, str], deadline: float) -> Dict[str, Any]:
+    """
+    Runs in an OCR worker process. image is the image bytes or the path of a stored
+    receipt, which is then read here rather than in the API process.
+    deadline is wall-clock (time.time()) because monotonic clocks are not comparable
+    across processes.
+    Returns the parsed receipt plus the queue wait and OCR time for metrics.
+    """
+    started = time.time()
+    if started >= deadline:
+        raise OcrTimeout("OCR timed out while queued")
+    if isinstance(image, str):
+        with open(image, "rb") as f:
+            image = f.read()
+    data = parse_receipt(extract_text(image, timeout=deadline - started))
+    return {"data": data, "started_at": started, "ocr_seconds": time.time() - started}
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0
+
+stats: Dict[str, float] = {
+    "jobs_total": 0,
+    "failed_total": 0,
+    "rejected_total": 0,
+    "timeouts_total": 0,
+    "cancelled_total": 0,
+    "batches_total": 0,
+    "queue_wait_seconds_total": 0.0,
+    "queue_wait_seconds_max": 0.0,
+    "ocr_seconds_total": 0.0,
+}
+
+def get_stats() -> Dict[str, float]:
+    return {**stats, "pending": _pending, "workers": settings.OCR_WORKERS}
+
+stats_collector.register("ocr", get_stats)
+
+result_cache = OcrResultCache(
+    directory=settings.OCR_CACHE_DIR,
+    max_disk_bytes=settings.OCR_CACHE_MAX_DISK_BYTES,
+    memory_entries=settings.OCR_CACHE_MEMORY_ENTRIES,
+)
+stats_collector.register("ocr_cache", result_cache.get_stats)
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn, not fork: forking a process with a running event loop and open sockets is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.OCR_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
 
 async def process_receipt_image(file_content: bytes) -> Dict[str, Any]:
-    text = extract_text(file_content)
-    data = parse_receipt(text)
-    return data
+    """
+    OCR on the worker process pool so the event loop stays responsive.
+    Rejects immediately when OCR_MAX_PENDING jobs are running or queued; a job that
+    hasn't finished within OCR_TIMEOUT_SECONDS (queue wait included) fails with
+    OcrTimeout and its tesseract process is killed. Cancelling the caller (client
+    disconnect) drops the job if it hasn't started.
+    Re-uploads of the same image are answered from the result cache.
+    """
+    return await _process(file_content, hashlib.sha256(file_content).hexdigest())
+
+async def process_receipt_file(path: str, sha256: str) -> Dict[str, Any]:
+    """process_receipt_image for a stored receipt: the worker reads the file, the API process never loads it."""
+    return await _process(path, sha256)
+
+async def _process(image: Union[bytes, str], sha256: str) -> Dict[str, Any]:
+    global _pending
+    cache_key = None
+    if settings.OCR_CACHE_ENABLED:
+        cache_key = OcrResultCache.key(sha256, config_version())
+        cached = await result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    if _pending >= settings.OCR_MAX_PENDING:
+        stats["rejected_total"] += 1
+        raise OcrBusy("OCR service is busy, please retry shortly.")
+
+    submitted = time.time()
+    deadline = submitted + settings.OCR_TIMEOUT_SECONDS
+    _pending += 1
+    future = None
+    try:
+        future = _get_executor().submit(scan_receipt, image, deadline)
+        # The worker enforces the deadline itself; the grace period covers process start-up and pickling
+        result = await asyncio.wait_for(asyncio.wrap_future(future), timeout=settings.OCR_TIMEOUT_SECONDS + 5)
+    except (OcrTimeout, asyncio.TimeoutError):
+        stats["timeouts_total"] += 1
+        raise OcrTimeout("OCR timed out")
+    except asyncio.CancelledError:
+        stats["cancelled_total"] += 1
+        raise
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM on a huge image); start a fresh pool for the next job
+        stats["failed_total"] += 1
+        shutdown()
+        raise RuntimeError("OCR worker crashed, please retry.")
+    except Exception:
+        stats["failed_total"] += 1
+        raise
+    finally:
+        _pending -= 1
+        if future is not None and not future.done():
+            future.cancel()
+
+    waited = result["started_at"] - submitted
+    stats["jobs_total"] += 1
+    stats["queue_wait_seconds_total"] += waited
+    stats["queue_wait_seconds_max"] = max(stats["queue_wait_seconds_max"], waited)
+    stats["ocr_seconds_total"] += result["ocr_seconds"]
+    if cache_key is not None:
+        await result_cache.set(cache_key, result["data"])
+    return result["data"]
+
+# A batch holds its own slots on the pool, so OcrBusy only means other requests filled it
+BATCH_BUSY_RETRIES = 3
+
+async def scan_batch(
+    loaders: List[Callable[[], Awaitable[Tuple[str, str]]]], concurrency: int
+) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[Exception]]]:
+    """
+    Scan many images with at most `concurrency` of them on the OCR pool at once, yielding
+    (index, result, error) in completion order. A loader stores one upload and returns
+    its (path, sha256) for process_receipt_file. It is only called once its image gets a
+    slot, so uploads are read as they're needed rather than all up front.
+    Closing the iterator (client disconnect) cancels whatever hasn't finished.
+    """
+    slots = asyncio.Semaphore(concurrency)
+
+    async def run(index: int, load: Callable[[], Awaitable[Tuple[str, str]]]):
+        async with slots:
+            try:
+                path, sha256 = await load()
+                for attempt in range(BATCH_BUSY_RETRIES + 1):
+                    try:
+                        return index, await process_receipt_file(path, sha256), None
+                    except OcrBusy:
+                        if attempt == BATCH_BUSY_RETRIES:
+                            raise
+                        await asyncio.sleep(0.5 * 2 ** attempt)
+            except Exception as e:
+                return index, None, e
+
+    stats["batches_total"] += 1
+    tasks = [asyncio.create_task(run(i, load)) for i, load in enumerate(loaders)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,123 @@
+from typing import Any, Dict, Iterable, List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import delete, func, insert, union_all
+from app.db import dialect
+from app.models.expense import Expense, ExpenseSplit
+from app.models.group import Group
+from app.models.settlement import Settlement
+from app.models.user import User
+from app.models.user_pair_balance import UserPairBalance
+from app.services.settlement_service import get_exchange_rate
+
+PairKey = Tuple[int, int, str] # (user_id, counterparty_id, currency)
+
+# Positions smaller than this are shown as settled
+SETTLED_EPSILON = 0.005
+
+def _add(deltas: Dict[PairKey, float], creditor: int, debtor: int, currency: str, amount: float) -> None:
+    """debtor owes creditor amount more; recorded on both rows of the pair."""
+    if creditor == debtor or not amount:
+        return
+    deltas[(creditor, debtor, currency)] = deltas.get((creditor, debtor, currency), 0.0) + amount
+    deltas[(debtor, creditor, currency)] = deltas.get((debtor, creditor, currency), 0.0) - amount
+
+def expense_deltas(expense: Expense, splits: Iterable[ExpenseSplit], base_currency: str, sign: int = 1) -> Dict[PairKey, float]:
+    """
+    Each split holder owes the payer their share, in base_currency at the expense's frozen rate.
+    Use sign=-1 to retract an expense before it is updated or deleted.
+    """
+    rate = expense.fx_rate if expense.fx_rate is not None else get_exchange_rate(expense.currency, base_currency)
+    deltas: Dict[PairKey, float] = {}
+    for split in splits:
+        _add(deltas, expense.payer_id, split.user_id, base_currency, sign * float(split.amount_owed) * rate)
+    return deltas
+
+def settlement_deltas(settlement: Settlement, base_currency: str, sign: int = 1) -> Dict[PairKey, float]:
+    """A payment moves the payee towards owing the payer."""
+    rate = settlement.fx_rate if settlement.fx_rate is not None else get_exchange_rate(settlement.currency, base_currency)
+    deltas: Dict[PairKey, float] = {}
+    _add(deltas, settlement.payer_id, settlement.payee_id, base_currency, sign * float(settlement.amount) * rate)
+    return deltas
+
+async def apply_deltas(db: AsyncSession, deltas: Dict[PairKey, float]) -> None:
+    """
+    Upsert balance increments in a single statement. Does not commit. Rows are written
+    in key order so concurrent writers touching the same pairs lock them in the same order.
+    """
+    if not deltas:
+        return
+    rows = [
+        {"user_id": user_id, "counterparty_id": counterparty_id, "currency": currency, "amount": amount}
+        for (user_id, counterparty_id, currency), amount in sorted(deltas.items())
+    ]
+    stmt = dialect.insert(UserPairBalance).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserPairBalance.user_id, UserPairBalance.counterparty_id, UserPairBalance.currency],
+        set_={"amount": UserPairBalance.amount + stmt.excluded.amount},
+    )
+    await db.execute(stmt)
+
+async def apply_expense(db: AsyncSession, expense: Expense, splits: Iterable[ExpenseSplit], base_currency: str, sign: int = 1) -> None:
+    await apply_deltas(db, expense_deltas(expense, splits, base_currency, sign))
+
+async def apply_settlement(db: AsyncSession, settlement: Settlement, base_currency: str) -> None:
+    await apply_deltas(db, settlement_deltas(settlement, base_currency))
+
+async def rebuild(db: AsyncSession) -> int:
+    """
+    Recompute every pair balance from the stored base-currency amounts (backfill, or
+    repair after manual data changes). Set-based: one DELETE and one INSERT ... SELECT.
+    Returns the number of rows written. Does not commit.
+    """
+    movements = union_all(
+        # split holder owes the payer
+        select(Expense.payer_id.label("user_id"), ExpenseSplit.user_id.label("counterparty_id"),
+               Group.base_currency.label("currency"), ExpenseSplit.base_amount_owed.label("amount"))
+        .join(Expense, Expense.id == ExpenseSplit.expense_id)
+        .join(Group, Group.id == Expense.group_id)
+        .filter(ExpenseSplit.user_id != Expense.payer_id),
+        select(ExpenseSplit.user_id, Expense.payer_id, Group.base_currency, -ExpenseSplit.base_amount_owed)
+        .join(Expense, Expense.id == ExpenseSplit.expense_id)
+        .join(Group, Group.id == Expense.group_id)
+        .filter(ExpenseSplit.user_id != Expense.payer_id),
+        # payee owes the payer what was paid back
+        select(Settlement.payer_id, Settlement.payee_id, Group.base_currency, Settlement.base_amount)
+        .join(Group, Group.id == Settlement.group_id)
+        .filter(Settlement.payer_id != Settlement.payee_id),
+        select(Settlement.payee_id, Settlement.payer_id, Group.base_currency, -Settlement.base_amount)
+        .join(Group, Group.id == Settlement.group_id)
+        .filter(Settlement.payer_id != Settlement.payee_id),
+    ).subquery()
+    totals = (
+        select(movements.c.user_id, movements.c.counterparty_id, movements.c.currency,
+               func.coalesce(func.sum(movements.c.amount), 0.0))
+        .group_by(movements.c.user_id, movements.c.counterparty_id, movements.c.currency)
+    )
+    await db.execute(delete(UserPairBalance))
+    result = await db.execute(
+        insert(UserPairBalance).from_select(["user_id", "counterparty_id", "currency", "amount"], totals)
+    )
+    return result.rowcount
+
+async def get_counterparties(db: AsyncSession, user_id: int) -> List[Dict[str, Any]]:
+    """
+    Everyone the user has an open balance with across all shared groups, largest first.
+    One indexed read on the user's rows; amounts in different currencies are not combined.
+    """
+    result = await db.execute(
+        select(UserPairBalance.counterparty_id, User.username, UserPairBalance.currency, UserPairBalance.amount)
+        .join(User, User.id == UserPairBalance.counterparty_id)
+        .filter(UserPairBalance.user_id == user_id, func.abs(UserPairBalance.amount) >= SETTLED_EPSILON)
+    )
+    counterparties: Dict[int, Dict[str, Any]] = {}
+    for counterparty_id, username, currency, amount in result.all():
+        entry = counterparties.setdefault(counterparty_id, {"user_id": counterparty_id, "username": username, "balances": []})
+        entry["balances"].append({"currency": currency, "amount": round(amount, 2)})
+    for entry in counterparties.values():
+        entry["balances"].sort(key=lambda b: b["currency"])
+    return sorted(
+        counterparties.values(),
+        key=lambda c: max(abs(b["amount"]) for b in c["balances"]),
+        reverse=True,
+    )
@@ -0,0 +1,70 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import stats_collector
+from app.core.security import pwd_context
+
+class PasswordServiceBusy(RuntimeError):
+    """Raised when too many hashing jobs are already running or queued."""
+
+_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_pending = 0
+
+stats: Dict[str, float] = {
+    "jobs_total": 0,
+    "rejected_total": 0,
+    "rehashed_total": 0,
+    "queue_wait_seconds_total": 0.0,
+    "queue_wait_seconds_max": 0.0,
+    "hash_seconds_total": 0.0,
+}
+
+def get_stats() -> Dict[str, float]:
+    return {**stats, "pending": _pending}
+
+stats_collector.register("password_hash", get_stats)
+
+async def _run(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a bcrypt call on the hashing pool, recording how long it waited for a thread.
+    Rejects immediately instead of queueing without bound during login bursts.
+    """
+    global _pending
+    if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        stats["rejected_total"] += 1
+        raise PasswordServiceBusy("Password service is busy, please retry shortly.")
+
+    submitted = time.perf_counter()
+
+    def job():
+        started = time.perf_counter()
+        result = fn(*args)
+        return result, started - submitted, time.perf_counter() - started
+
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        result, waited, took = await loop.run_in_executor(_executor, job)
+    finally:
+        _pending -= 1
+
+    stats["jobs_total"] += 1
+    stats["queue_wait_seconds_total"] += waited
+    stats["queue_wait_seconds_max"] = max(stats["queue_wait_seconds_max"], waited)
+    stats["hash_seconds_total"] += took
+    return result
+
+async def hash_password(password: str) -> str:
+    return await _run(pwd_context.hash, password)
+
+async def verify_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Returns (valid, new_hash). new_hash is set when the stored hash uses an outdated
+    cost or scheme and should be replaced with it.
+    """
+    valid, new_hash = await _run(pwd_context.verify_and_update, password, hashed_password)
+    if new_hash:
+        stats["rehashed_total"] += 1
+    return valid, new_hash
@@ -0,0 +1,205 @@
+"""
+Receipt text -> structured data in one pass over the OCR lines.
+
+Each line is tokenized once (uppercased once, one keyword scan, its last token checked
+for an amount) and classified as header, item, subtotal, tax, total, payment or other.
+Totals, the date, the merchant and line items usable for itemized splits all come
+from that pass.
+"""
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+# Any amount in a line: commas or spaces as thousands separators, always two decimals
+AMOUNT_RE = re.compile(r'(-?)(\d{1,3}(?:[,\s]\d{3})*\.\d{2})')
+# A whole token that is an amount: "12.50", "$1,299.00", "-2.00", "2.00-" (discounts)
+AMOUNT_TOKEN_RE = re.compile(r'(-?)\$?(\d{1,3}(?:,\d{3})*\.\d{2})(-?)')
+# An amount ending the line, for "1 299.00" where the thousands were split into two tokens
+AMOUNT_TAIL_RE = re.compile(r'(?<![\d,.])' + AMOUNT_RE.pattern + r'$')
+DATE_RE = re.compile(r'(\d{1,2}[/\.-]\d{1,2}[/\.-]\d{2,4})')
+# "Time 12.30" is a timestamp, not an item costing 12.30
+DATETIME_KEYWORD_RE = re.compile(r'\b(?:DATE|TIME)\b')
+LETTER_RE = re.compile(r'[A-Za-z]')
+# "2 x Coffee", "2x Coffee", "2 Coffee", "2 @ 4.00 Espresso"
+QTY_PREFIX_RE = re.compile(r'(\d{1,2})\s*(?:[xX]|@\s*\$?(\d+\.\d{2}))?\s+(?=[A-Za-z])')
+# "Coffee 2 @ 3.10", "Coffee 2 x 3.10"
+UNIT_PRICE_RE = re.compile(r'\s(\d{1,3})\s*[@xX]\s*\$?(\d+\.\d{2})\s*$')
+# One leading \b and a first-letter lookahead keep this cheap on lines without keywords
+KEYWORD_RE = re.compile(
+    r'\b(?=[ABCDGHMNPSTV])(?:'
+    r'(?P<subtotal>SUB\s?-?\s?TOTAL)'
+    r'|(?P<tax>TAX|VAT|GST|HST|PST)'
+    r'|(?P<total>TOTAL|NET AMOUNT|AMOUNT DUE|BALANCE|SUM)'
+    r'|(?P<payment>CASH|CHANGE|TENDER(?:ED)?|VISA|MASTERCARD|AMEX|DEBIT|CREDIT|CARD)'
+    r')\b'
+)
+# Lines near the top that are never the merchant name
+NOT_MERCHANT_RE = re.compile(r'RECEIPT|INVOICE|DATE|TIME|WELCOME|STORE|TOTAL|CASH')
+
+# When a line carries several keywords ("TOTAL TAX", "TOTAL CASH"), the first of these wins
+KIND_PRIORITY = ("subtotal", "tax", "total", "payment")
+MAX_HEADER_LINES = 4
+DECORATION = " *=~-_#'\".:"
+
+@dataclass(slots=True)
+class Line:
+    text: str
+    kind: str # header | item | subtotal | tax | total | payment | other
+    amount: Optional[float] = None
+    item: Optional[Dict[str, Any]] = None # description / quantity / unit_price / amount for item lines
+
+def _trailing_amount(line: str) -> Optional[Tuple[float, str]]:
+    """The amount ending the line (a one-letter tax code after it is allowed) and the text before it."""
+    head, _, token = line.rpartition(' ')
+    if len(token) == 1 and head and not token.isdigit():
+        head, _, token = head.rstrip().rpartition(' ')
+    match = AMOUNT_TOKEN_RE.fullmatch(token)
+    if match is None:
+        return None
+    sign, digits, trailing_sign = match.groups()
+    if head[-1:].isdigit() and not trailing_sign:
+        tail = AMOUNT_TAIL_RE.search(f"{head} {token}")
+        if tail and tail.start(2) < len(head):
+            sign, digits = tail.group(1), tail.group(2)
+            head = head[:tail.start()].rstrip()
+    value = float(digits.replace(',', '').replace(' ', ''))
+    return (-value if sign or trailing_sign else value), head
+
+def _item(description: str, amount: float) -> Dict[str, Any]:
+    description = description.strip(" .:$")
+    quantity, unit_price = 1, None
+    # Both quantity forms are rare; cheap checks decide whether a regex needs to run at all
+    unit = UNIT_PRICE_RE.search(description) if description[-1:].isdigit() else None
+    if unit:
+        quantity, unit_price = int(unit.group(1)), float(unit.group(2))
+        description = description[:unit.start()].strip()
+    elif description[:1].isdigit():
+        prefix = QTY_PREFIX_RE.match(description)
+        if prefix and int(prefix.group(1)) > 0:
+            quantity = int(prefix.group(1))
+            unit_price = float(prefix.group(2)) if prefix.group(2) else None
+            description = description[prefix.end():].strip()
+    if unit_price is None:
+        unit_price = amount if quantity == 1 else round(amount / quantity, 2)
+    return {"description": description, "quantity": quantity, "unit_price": unit_price, "amount": amount}
+
+def _merchant(header: List[str]) -> str:
+    """First plausible name in the header, joined with the next line when a logo was split across two."""
+    for i, line in enumerate(header):
+        line = line.strip(DECORATION)
+        if sum(c.isalnum() for c in line) < 2 or NOT_MERCHANT_RE.search(line.upper()):
+            continue
+        if i + 1 < len(header) and " " not in line:
+            following = header[i + 1]
+            if (len(following) < 30 and any(c.isalpha() for c in following) and not any(c.isdigit() for c in following)
+                    and not NOT_MERCHANT_RE.search(following.upper()) and "*" not in following and "==" not in following):
+                return f"{line} {following.strip(DECORATION)}"
+        return line
+    return "Unknown Merchant"
+
+@dataclass
+class Scan:
+    lines: List[Line]
+    header: List[str]
+    items: List[Dict[str, Any]]
+    subtotal: Optional[float]
+    tax: Optional[float]
+    total: Optional[float]
+    largest: float # fallback when no total line was recognised
+    date: Optional[str]
+
+def _scan(text: str) -> Scan:
+    """The single pass: classified lines, plus totals, date, header and items gathered along the way."""
+    lines: List[Line] = []
+    header: List[str] = []
+    items: List[Dict[str, Any]] = []
+    subtotal = tax = total = date = None
+    largest = 0.0
+    seen_body = False
+    seen_totals = False # amounts after the subtotal/total (tips, savings, points) are not items
+    pending: Optional[Line] = None # keyword line whose amount wrapped onto the next line
+    for raw in text.split('\n'):
+        line = raw.strip()
+        if not line:
+            continue
+        upper = line.upper()
+        match = KEYWORD_RE.search(upper)
+        kind = None
+        if match:
+            kind = match.lastgroup
+            if kind != KIND_PRIORITY[0]:
+                kinds = {m.lastgroup for m in KEYWORD_RE.finditer(upper, match.end())}
+                kind = next(k for k in KIND_PRIORITY if k == kind or k in kinds)
+        if date is None:
+            found = DATE_RE.search(line)
+            if found:
+                date = found.group(1)
+        trailing = _trailing_amount(line)
+        amount = trailing[0] if trailing else None
+        if amount is None and kind is not None:
+            anywhere = AMOUNT_RE.search(line)
+            if anywhere:
+                amount = float(anywhere.group(2).replace(',', '').replace(' ', ''))
+                amount = -amount if anywhere.group(1) else amount
+
+        if kind is None:
+            if pending is not None and amount is not None and not LETTER_RE.search(line):
+                kind = pending.kind
+                pending.amount = amount
+                pending = None
+                lines.append(Line(line, kind, amount))
+            elif (trailing is not None and not seen_totals and LETTER_RE.search(trailing[1])
+                    and not DATETIME_KEYWORD_RE.search(upper) and not DATE_RE.search(line)):
+                seen_body = True
+                pending = None
+                item = _item(trailing[1], amount)
+                items.append(item)
+                lines.append(Line(line, "item", amount, item))
+                if amount > largest:
+                    largest = amount
+                continue
+            else:
+                pending = None
+                if not seen_body and len(lines) < MAX_HEADER_LINES:
+                    header.append(line)
+                    lines.append(Line(line, "header"))
+                else:
+                    lines.append(Line(line, "other"))
+                continue
+        else:
+            seen_body = True
+            seen_totals = seen_totals or kind == "subtotal" or kind == "total"
+            entry = Line(line, kind, amount)
+            lines.append(entry)
+            if amount is None:
+                pending = entry
+                continue
+            pending = None
+
+        if kind == "subtotal":
+            subtotal = amount
+        elif kind == "tax":
+            tax = (tax or 0.0) + amount
+        elif kind == "total":
+            total = amount if total is None else max(total, amount)
+        if kind != "payment" and amount > largest:
+            largest = amount
+    return Scan(lines, header, items, subtotal, tax, total, largest, date)
+
+def classify(text: str) -> List[Line]:
+    return _scan(text).lines
+
+def parse(text: str) -> Dict[str, Any]:
+    scan = _scan(text)
+    total = scan.total
+    if total is None and scan.subtotal is not None:
+        total = round(scan.subtotal + (scan.tax or 0.0), 2)
+    return {
+        "amount": total if total is not None else scan.largest,
+        "date": scan.date,
+        "merchant": _merchant(scan.header),
+        "subtotal": scan.subtotal,
+        "tax": round(scan.tax, 2) if scan.tax is not None else None,
+        "items": scan.items,
+        "raw_text_snippet": text[:500],
+    }
@@ -0,0 +1,173 @@
+"""
+Content-addressed receipt image store on the local filesystem.
+
+Blobs live at <RECEIPT_STORE_DIR>/blobs/ab/<sha256>, so identical uploads share one
+file. Uploads are hashed and written in chunks while they stream in and are never
+held in memory whole. Thumbnails are made on first request and kept next to the
+blobs under thumbs/.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from PIL import Image, ImageOps
+from app.core.config import settings
+from app.core.metrics import stats_collector
+
+logger = logging.getLogger(__name__)
+
+CHUNK_BYTES = 64 * 1024
+THUMBNAIL_QUALITY = 80
+# A blob written or re-uploaded this recently may belong to a row that isn't committed yet
+DELETE_GRACE_SECONDS = 600
+
+# Leading bytes of the formats we accept; the client's Content-Type is not trusted
+SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
+
+class ReceiptTooLarge(ValueError):
+    """Raised when an upload exceeds RECEIPT_MAX_BYTES."""
+
+class UnsupportedReceipt(ValueError):
+    """Raised when an upload is not an image format we can store and thumbnail."""
+
+stats: Dict[str, float] = {
+    "uploads_total": 0,
+    "deduplicated_total": 0,
+    "bytes_written_total": 0,
+    "thumbnails_generated_total": 0,
+    "thumbnail_hits_total": 0,
+}
+stats_collector.register("receipt_store", lambda: stats)
+
+# One thumbnail render per blob and size at a time in this process
+_thumbnail_locks: Dict[str, asyncio.Lock] = {}
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(settings.RECEIPT_STORE_DIR, "blobs", sha256[:2], sha256)
+
+def _thumbnail_file(sha256: str, size: int) -> str:
+    return os.path.join(settings.RECEIPT_STORE_DIR, "thumbs", sha256[:2], f"{sha256}-{size}.jpg")
+
+async def save_stream(read: Callable[[int], Awaitable[bytes]], max_bytes: Optional[int] = None) -> Tuple[str, int, str]:
+    """
+    Store an upload, given its async read(n). Returns (sha256, size, content_type).
+    max_bytes defaults to RECEIPT_MAX_BYTES.
+    Data goes to a temp file inside the store and is renamed onto its digest once
+    complete; if that blob already exists the temp file is simply dropped.
+    """
+    tmp_dir = os.path.join(settings.RECEIPT_STORE_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp = os.path.join(tmp_dir, uuid.uuid4().hex)
+    digest = hashlib.sha256()
+    size = 0
+    content_type = None
+    max_bytes = max_bytes or settings.RECEIPT_MAX_BYTES
+    f = await asyncio.to_thread(open, tmp, "wb")
+    try:
+        while True:
+            chunk = await read(CHUNK_BYTES)
+            if not chunk:
+                break
+            if content_type is None:
+                content_type = sniff_content_type(chunk)
+                if content_type is None:
+                    raise UnsupportedReceipt("File must be a JPEG, PNG, WebP, GIF, BMP or TIFF image.")
+            size += len(chunk)
+            if size > max_bytes:
+                raise ReceiptTooLarge("Image is too large.")
+            digest.update(chunk)
+            await asyncio.to_thread(f.write, chunk)
+        if content_type is None:
+            raise UnsupportedReceipt("File is empty.")
+        await asyncio.to_thread(f.close)
+        sha256 = digest.hexdigest()
+        path = blob_path(sha256)
+        if os.path.exists(path):
+            os.remove(tmp)
+            os.utime(path) # see DELETE_GRACE_SECONDS
+            stats["deduplicated_total"] += 1
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp, path) # atomic: readers never see a partial blob
+            stats["bytes_written_total"] += size
+        stats["uploads_total"] += 1
+        return sha256, size, content_type
+    except BaseException:
+        f.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def _render_thumbnail(source: str, target: str, size: int) -> None:
+    with Image.open(source) as image:
+        # JPEGs decode straight at a reduced scale, so a 12 MP photo never expands in memory
+        image.draft("RGB", (size, size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        image.save(tmp, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+        os.replace(tmp, target)
+
+async def thumbnail_path(sha256: str, size: int) -> str:
+    """Path of the JPEG thumbnail (longest side = size), rendering it on first use."""
+    target = _thumbnail_file(sha256, size)
+    if os.path.exists(target):
+        stats["thumbnail_hits_total"] += 1
+        return target
+    lock = _thumbnail_locks.setdefault(target, asyncio.Lock())
+    try:
+        async with lock:
+            if not os.path.exists(target):
+                await asyncio.to_thread(_render_thumbnail, blob_path(sha256), target, size)
+                stats["thumbnails_generated_total"] += 1
+            else:
+                stats["thumbnail_hits_total"] += 1
+    finally:
+        if not lock.locked():
+            _thumbnail_locks.pop(target, None)
+    return target
+
+def delete_blob(sha256: str) -> None:
+    """
+    Remove a blob and its thumbnails; callers check that no receipt still references it.
+    A blob uploaded again within DELETE_GRACE_SECONDS is kept, since the new upload's
+    row may not be committed yet.
+    """
+    try:
+        if time.time() - os.path.getmtime(blob_path(sha256)) < DELETE_GRACE_SECONDS:
+            return
+    except FileNotFoundError:
+        pass
+    paths = [blob_path(sha256)]
+    thumbs_dir = os.path.dirname(_thumbnail_file(sha256, 0))
+    if os.path.isdir(thumbs_dir):
+        paths += [os.path.join(thumbs_dir, name) for name in os.listdir(thumbs_dir) if name.startswith(sha256)]
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not delete receipt file {path}: {e}")
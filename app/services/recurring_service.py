@@ -3,6 +3,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.models.recurring_expense import RecurringExpense
 from app.models.expense import Expense, ExpenseSplit
+from app.models.group import Group
+from app.services import analytics_service, pair_balance_service, settlement_service
 
 async def spawn_due_expenses(db: AsyncSession):
     now = datetime.utcnow()
@@ -14,6 +16,9 @@ async def spawn_due_expenses(db: AsyncSession):
         )
     )
     recurring_expenses = result.scalars().all()
+    group_ids = {re.group_id for re in recurring_expenses}
+    currency_result = await db.execute(select(Group.id, Group.base_currency).filter(Group.id.in_(group_ids)))
+    base_currency = {gid: currency or "USD" for gid, currency in currency_result.all()}
     
     spawned_count = 0
     for re in recurring_expenses:
@@ -27,17 +32,17 @@ async def spawn_due_expenses(db: AsyncSession):
             category=re.category,
             date=now
         )
-        db.add(new_expense)
-        await db.flush() # Get ID
         
-        # 3. Create Splits
-        for s in re.splits:
-            split = ExpenseSplit(
-                expense_id=new_expense.id,
-                user_id=s['user_id'],
-                amount_owed=s['amount_owed']
-            )
-            db.add(split)
+        # 3. Create Splits (at today's rate, frozen on the new expense)
+        new_expense.splits = [
+            ExpenseSplit(user_id=s['user_id'], amount_owed=s['amount_owed'])
+            for s in re.splits
+        ]
+        group_currency = base_currency.get(re.group_id, "USD")
+        settlement_service.convert_expense(new_expense, new_expense.splits, group_currency)
+        db.add(new_expense)
+        await analytics_service.apply_expense(db, new_expense, re.splits, base_currency=group_currency)
+        await pair_balance_service.apply_expense(db, new_expense, new_expense.splits, group_currency)
             
         # 4. Update RecurringExpense for next time
         re.last_spawned_at = now
@@ -1,7 +1,7 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
+from sqlalchemy import func, union_all, update
 from app.models.expense import Expense, ExpenseSplit
 from app.models.group import GroupMember, Group
 from app.models.settlement import Settlement
@@ -28,66 +28,120 @@ def get_exchange_rate(from_curr: str, to_curr: str) -> float:
     }
     return rates.get((from_curr, to_curr), 1.0) # Default to 1.0 if not found
 
+def convert_expense(expense: Expense, splits: Iterable[ExpenseSplit], base_currency: str) -> None:
+    """
+    Fill in the base-currency amounts of an expense and its splits. The rate is taken
+    once, when the expense is first written, and kept when it is edited later.
+    """
+    if expense.fx_rate is None:
+        expense.fx_rate = get_exchange_rate(expense.currency, base_currency)
+    expense.base_amount = float(expense.amount) * expense.fx_rate
+    for split in splits:
+        split.base_amount_owed = float(split.amount_owed) * expense.fx_rate
+
+def convert_settlement(settlement: Settlement, base_currency: str) -> None:
+    settlement.fx_rate = get_exchange_rate(settlement.currency, base_currency)
+    settlement.base_amount = float(settlement.amount) * settlement.fx_rate
+
 async def calculate_net_balances(db: AsyncSession, group_id: int) -> Dict[int, float]:
     """
     Calculate the net balance for each member in the group.
     Net Balance = Total Paid - Total Owed
-    All values are converted to the group's base_currency.
+    All values are in the group's base_currency.
     """
-    # 1. Get Group and its base_currency
-    group_res = await db.execute(select(Group).filter(Group.id == group_id))
-    group = group_res.scalars().first()
-    if not group:
-        return {}
-    base_currency = getattr(group, 'base_currency', 'USD')
+    balances = await calculate_net_balances_for_groups(db, [group_id])
+    return balances.get(group_id, {})
 
-    # 2. Get all members
-    member_result = await db.execute(select(GroupMember.user_id).filter(GroupMember.group_id == group_id))
-    members = member_result.scalars().all()
-    balances = {uid: 0.0 for uid in members}
+async def calculate_net_balances_for_groups(db: AsyncSession, group_ids: List[int]) -> Dict[int, Dict[int, float]]:
+    """
+    Net balances for several groups at once: {group_id: {user_id: balance}}.
+    Amounts were converted to each group's base_currency when written, so this is one
+    SUM over paid, owed and settled amounts plus the membership query, however many
+    groups or currencies are involved.
+    """
+    if not group_ids:
+        return {}
 
-    # 3. Total Paid by each user (with conversion)
-    paid_result = await db.execute(
-        select(Expense.payer_id, Expense.amount, Expense.currency)
-        .filter(Expense.group_id == group_id)
+    # 1. All members start at zero
+    balances: Dict[int, Dict[int, float]] = {gid: {} for gid in group_ids}
+    member_result = await db.execute(
+        select(GroupMember.group_id, GroupMember.user_id).filter(GroupMember.group_id.in_(group_ids))
     )
-    for payer_id, amount, currency in paid_result.all():
-        if payer_id in balances:
-            rate = get_exchange_rate(currency, base_currency)
-            balances[payer_id] += float(amount) * rate
-
-    # 4. Total Owed by each user (with conversion)
-    owed_result = await db.execute(
-        select(ExpenseSplit.user_id, ExpenseSplit.amount_owed, Expense.currency)
+    for gid, uid in member_result.all():
+        balances[gid][uid] = 0.0
+
+    # 2. Paid (+), owed (-), settlements sent (+) and received (-), summed per user
+    movements = union_all(
+        select(Expense.group_id, Expense.payer_id.label("user_id"), Expense.base_amount.label("amount"))
+        .filter(Expense.group_id.in_(group_ids)),
+        select(Expense.group_id, ExpenseSplit.user_id, -ExpenseSplit.base_amount_owed)
         .join(Expense, Expense.id == ExpenseSplit.expense_id)
-        .filter(Expense.group_id == group_id)
+        .filter(Expense.group_id.in_(group_ids)),
+        select(Settlement.group_id, Settlement.payer_id, Settlement.base_amount)
+        .filter(Settlement.group_id.in_(group_ids)),
+        select(Settlement.group_id, Settlement.payee_id, -Settlement.base_amount)
+        .filter(Settlement.group_id.in_(group_ids)),
+    ).subquery()
+    sum_result = await db.execute(
+        select(movements.c.group_id, movements.c.user_id, func.sum(movements.c.amount))
+        .group_by(movements.c.group_id, movements.c.user_id)
     )
-    for user_id, amount_owed, currency in owed_result.all():
-        if user_id in balances:
-            rate = get_exchange_rate(currency, base_currency)
-            balances[user_id] -= float(amount_owed) * rate
-    
-    # 5. Total Paid in Settlements (with conversion)
-    settlement_paid = await db.execute(
-        select(Settlement.payer_id, Settlement.amount, Settlement.currency)
-        .filter(Settlement.group_id == group_id)
+    for gid, uid, amount in sum_result.all():
+        group_balances = balances.get(gid)
+        if group_balances is not None and uid in group_balances and amount is not None:
+            group_balances[uid] += float(amount)
+
+    return balances
+
+async def backfill_base_amounts(db: AsyncSession) -> Dict[str, int]:
+    """
+    Fill in base-currency amounts on rows written before they were stored, at today's
+    rates. One UPDATE per (base currency, currency) pair in use, so the cost does not
+    grow with the number of rows or groups. Safe to re-run; does not commit.
+    """
+    pairs = await db.execute(
+        select(Group.base_currency, Expense.currency).distinct()
+        .join(Group, Group.id == Expense.group_id)
+        .filter(Expense.base_amount.is_(None))
     )
-    for payer_id, amount, currency in settlement_paid.all():
-        if payer_id in balances:
-            rate = get_exchange_rate(currency, base_currency)
-            balances[payer_id] += float(amount) * rate
-
-    # 6. Total Received in Settlements (with conversion)
-    settlement_received = await db.execute(
-        select(Settlement.payee_id, Settlement.amount, Settlement.currency)
-        .filter(Settlement.group_id == group_id)
+    expenses = 0
+    for base_currency, currency in pairs.all():
+        rate = get_exchange_rate(currency, base_currency or "USD")
+        group_ids = select(Group.id).filter(Group.base_currency == base_currency).scalar_subquery()
+        result = await db.execute(
+            update(Expense)
+            .where(Expense.base_amount.is_(None), Expense.currency == currency, Expense.group_id.in_(group_ids))
+            .values(fx_rate=func.coalesce(Expense.fx_rate, rate), base_amount=Expense.amount * func.coalesce(Expense.fx_rate, rate))
+            .execution_options(synchronize_session=False)
+        )
+        expenses += result.rowcount
+
+    fx_rate = select(Expense.fx_rate).filter(Expense.id == ExpenseSplit.expense_id).scalar_subquery()
+    result = await db.execute(
+        update(ExpenseSplit)
+        .where(ExpenseSplit.base_amount_owed.is_(None))
+        .values(base_amount_owed=ExpenseSplit.amount_owed * fx_rate)
+        .execution_options(synchronize_session=False)
     )
-    for payee_id, amount, currency in settlement_received.all():
-        if payee_id in balances:
-            rate = get_exchange_rate(currency, base_currency)
-            balances[payee_id] -= float(amount) * rate
-    
-    return balances
+    splits = result.rowcount
+
+    pairs = await db.execute(
+        select(Group.base_currency, Settlement.currency).distinct()
+        .join(Group, Group.id == Settlement.group_id)
+        .filter(Settlement.base_amount.is_(None))
+    )
+    settlements = 0
+    for base_currency, currency in pairs.all():
+        rate = get_exchange_rate(currency, base_currency or "USD")
+        group_ids = select(Group.id).filter(Group.base_currency == base_currency).scalar_subquery()
+        result = await db.execute(
+            update(Settlement)
+            .where(Settlement.base_amount.is_(None), Settlement.currency == currency, Settlement.group_id.in_(group_ids))
+            .values(fx_rate=rate, base_amount=Settlement.amount * rate)
+            .execution_options(synchronize_session=False)
+        )
+        settlements += result.rowcount
+    return {"expenses": expenses, "splits": splits, "settlements": settlements}
 
 def simplify_debts(balances: Dict[int, float]) -> List[Dict[str, Any]]:
     """
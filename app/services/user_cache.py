@@ -0,0 +1,43 @@
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.core import invalidation
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import stats_collector
+from app.models.user import User
+
+# Active users by id. Entries are detached copies; merge them into a session with load=False.
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+stats_collector.register("user_cache", user_cache.stats)
+invalidation.register("user", lambda user_id: user_cache.pop(int(user_id)), user_cache.clear)
+
+def get_cached_user(user_id: int) -> Optional[User]:
+    return user_cache.get(user_id)
+
+def cache_user(user: User) -> None:
+    if not user.is_active:
+        return
+    # Copy the column state so the cached object is not tied to the request's session
+    copy = User(**{c.key: getattr(user, c.key) for c in User.__table__.columns})
+    make_transient_to_detached(copy)
+    user_cache.set(user.id, copy)
+
+def invalidate_user(user_id: int) -> None:
+    user_cache.pop(user_id)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_write(mapper, connection, target: User) -> None:
+    invalidate_user(target.id)
+    # Other workers evict when this transaction commits
+    invalidation.publish(connection, "user", target.id)
+    # Evict again on commit, in case a concurrent request re-cached the pre-commit row
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("invalidated_user_ids", set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for user_id in session.info.pop("invalidated_user_ids", ()):
+        invalidate_user(user_id)
@@ -0,0 +1,21 @@
+"""
+Pytest fixtures for query budgets. Enable in a conftest.py with:
+
+    pytest_plugins = ["app.testing.pytest_plugin"]
+
+and use in a test that drives the app in-process (e.g. httpx.ASGITransport):
+
+    async def test_balances(client, query_budget):
+        with query_budget(8, max_repeats=2):
+            await client.get("/api/v1/groups/1/balances")
+"""
+import pytest
+from app.core import query_tracker
+
+@pytest.fixture
+def query_budget():
+    return query_tracker.query_budget
+
+@pytest.fixture
+def track_queries():
+    return query_tracker.track_queries
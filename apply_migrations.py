@@ -1,38 +1,17 @@
 import asyncio
-from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy import text
 from app.core.config import settings
+from app.db import migrations
+from app.db.session import engine
 
 async def migrate():
+    """
+    Bring the database to the latest Alembic revision (same as `alembic upgrade head`).
+    """
     print(f"Starting migration to {settings.DATABASE_URL}...")
-    engine = create_async_engine(settings.DATABASE_URL)
-    print("Engine created.")
-    async with engine.begin() as conn:
-        print("Connection opened.")
-        # 1. Add columns to group table
-        try:
-            await conn.execute(text("ALTER TABLE \"group\" ADD COLUMN IF NOT EXISTS base_currency VARCHAR DEFAULT 'USD' NOT NULL"))
-            print("Added base_currency to group table")
-        except Exception as e:
-            print(f"Error adding base_currency to group: {e}")
-
-        # 2. Add columns to settlement table
-        try:
-            await conn.execute(text("ALTER TABLE settlement ADD COLUMN IF NOT EXISTS currency VARCHAR DEFAULT 'USD' NOT NULL"))
-            print("Added currency to settlement table")
-        except Exception as e:
-            print(f"Error adding currency to settlement: {e}")
-
-        # 3. Create missing tables (recurring_expense, notification)
-        # Import models to ensure they are registered with Base
-        from app.db.base_class import Base
-        from app.models.recurring_expense import RecurringExpense
-        from app.models.notification import Notification
-        
-        # Base.metadata.create_all is synchronous, so we use run_sync
-        await conn.run_sync(Base.metadata.create_all)
-        print("Created all missing tables")
-
+    before = await migrations.current_revision(engine)
+    await migrations.upgrade_to_head()
+    after = await migrations.current_revision(engine)
+    print(f"Schema revision: {before} -> {after}")
     await engine.dispose()
 
 if __name__ == "__main__":
@@ -0,0 +1,28 @@
+import asyncio
+import json
+import os
+import sys
+
+# Add the current directory to sys.path so 'app' can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import base  # noqa: F401 - registers every model with the mapper
+from app.db.session import AsyncSessionLocal, engine
+from app.services import settlement_service
+
+async def backfill():
+    """
+    Store base-currency amounts on expenses, splits and settlements that lack them.
+    Migration 0006 already does this for existing rows; this is for rows written by an
+    older deploy still running during a rollout. Rows that have them are untouched.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            counts = await settlement_service.backfill_base_amounts(db)
+            await db.commit()
+            print(json.dumps(counts, indent=2))
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
@@ -0,0 +1,28 @@
+import asyncio
+import os
+import sys
+
+# Add the current directory to sys.path so 'app' can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import base  # noqa: F401 - registers every model with the mapper
+from app.db.session import AsyncSessionLocal, engine
+from app.services import pair_balance_service, settlement_service
+
+async def backfill():
+    """
+    Rebuild userpairbalance from all expenses and settlements in one transaction, e.g.
+    after manual data changes (migration 0007 builds it on upgrade). Fills in missing
+    base-currency amounts first, since the rebuild sums those. Safe to re-run.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            await settlement_service.backfill_base_amounts(db)
+            count = await pair_balance_service.rebuild(db)
+            await db.commit()
+            print(f"Rebuilt {count} pair balance rows")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
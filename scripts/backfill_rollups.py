@@ -0,0 +1,32 @@
+import asyncio
+import os
+import sys
+
+# Add the current directory to sys.path so 'app' can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+from app.db.session import AsyncSessionLocal, engine
+from app.models.group import Group
+from app.services import analytics_service
+
+async def backfill():
+    """
+    Rebuild the analytics rollups for every group from the raw expense rows (migration
+    0002 fills them on upgrade; this repairs them, e.g. after manual data changes).
+    Safe to re-run; each group is rebuilt in its own transaction.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            res = await db.execute(select(Group.id).order_by(Group.id))
+            group_ids = res.scalars().all()
+            print(f"Rebuilding rollups for {len(group_ids)} groups...")
+            for group_id in group_ids:
+                count = await analytics_service.rebuild_group_rollups(db, group_id)
+                await db.commit()
+                print(f" - Group {group_id}: {count} expenses")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add the current directory to sys.path so 'app' can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services import ocr_engine, ocr_preprocess
+from bench_ocr_preprocess import load_corpus, make_receipt, similarity
+
+def run_engine(prepared, engine: str, rounds: int) -> dict:
+    """OCR time per image for one engine; preprocessing is done beforehand so only the engine is measured."""
+    ocr_engine.reset()
+    t0 = time.perf_counter()
+    ocr_engine.image_to_string(prepared[0].image, prepared[0].psm, engine=engine)
+    first_ms = (time.perf_counter() - t0) * 1000
+
+    latencies, texts = [], []
+    for round_ in range(rounds):
+        for p in prepared:
+            t0 = time.perf_counter()
+            text = ocr_engine.image_to_string(p.image, p.psm, engine=engine)
+            latencies.append(time.perf_counter() - t0)
+            if round_ == 0:
+                texts.append(text)
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "first_call_ms": round(first_ms, 1), # includes loading the model for tesserocr
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "p50_ms": round(latencies[n // 2] * 1000, 1),
+        "p95_ms": round(latencies[min(n - 1, int(n * 0.95))] * 1000, 1),
+        "scans_per_second": round(n / sum(latencies), 2),
+        "texts": texts,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR engine latency: in-process tesserocr vs pytesseract subprocesses")
+    parser.add_argument("--corpus", help="Directory of receipt images with <name>.json ground truth")
+    parser.add_argument("--synthetic", type=int, default=10, help="Synthetic receipts when no corpus is given")
+    parser.add_argument("--rounds", type=int, default=3, help="Passes over the samples per engine")
+    parser.add_argument("--engines", default="pytesseract,tesserocr")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.corpus:
+        samples = list(load_corpus(args.corpus))
+    else:
+        rng = random.Random(args.seed)
+        samples = [make_receipt(rng) for _ in range(args.synthetic)]
+    if not samples:
+        raise SystemExit("No samples found")
+    prepared = [ocr_preprocess.prepare(image_bytes) for image_bytes, _ in samples]
+
+    results = {"samples": len(samples), "rounds": args.rounds, "auto_resolves_to": ocr_engine.resolve("auto")}
+    for engine in args.engines.split(","):
+        try:
+            results[engine] = run_engine(prepared, engine, args.rounds)
+        except RuntimeError as e:
+            results[engine] = {"error": str(e)}
+    # Both engines run the same libtesseract, so their output should agree closely
+    engines = [e for e in args.engines.split(",") if "texts" in results[e]]
+    if len(engines) >= 2:
+        a, b = (results[e]["texts"] for e in engines[:2])
+        results["text_agreement"] = round(statistics.mean(similarity(x, y) for x, y in zip(a, b)), 3)
+    if all("mean_ms" in results.get(e, {}) for e in ("pytesseract", "tesserocr")):
+        results["speedup"] = round(results["pytesseract"]["mean_ms"] / results["tesserocr"]["mean_ms"], 2)
+    for engine in engines:
+        del results[engine]["texts"]
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
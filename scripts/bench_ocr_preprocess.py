@@ -0,0 +1,136 @@
+import argparse
+import difflib
+import glob
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from io import BytesIO
+
+# Add the current directory to sys.path so 'app' can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image, ImageDraw, ImageFont
+from app.services import ocr_preprocess, ocr_service
+
+MERCHANTS = ["CAFE LISBOA", "GREEN GROCER", "CITY MARKET", "BLUE BOTTLE", "TRATTORIA ROMA", "NORTH STAR DINER"]
+ITEMS = ["Coffee", "Bagel", "Orange juice", "Pasta", "Salad", "Water", "Croissant", "Tea", "Soup", "Pizza"]
+
+def make_receipt(rng: random.Random):
+    """
+    A synthetic phone photo of a receipt: rendered text on paper, rotated a few degrees,
+    on a darker table with a lighting gradient, JPEG compressed. Returns (bytes, truth).
+    """
+    merchant = rng.choice(MERCHANTS)
+    date = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024"
+    items = [(rng.choice(ITEMS), round(rng.uniform(1, 30), 2)) for _ in range(rng.randint(3, 9))]
+    subtotal = round(sum(price for _, price in items), 2)
+    tax = round(subtotal * 0.08, 2)
+    total = round(subtotal + tax, 2)
+    lines = [merchant, "12 Harbour Street", date, ""]
+    lines += [f"{name:<20}{price:>8.2f}" for name, price in items]
+    lines += ["", f"{'SUBTOTAL':<20}{subtotal:>8.2f}", f"{'TAX':<20}{tax:>8.2f}", f"{'TOTAL':<20}{total:>8.2f}",
+              f"{'CASH':<20}{total + 10:>8.2f}", "THANK YOU"]
+
+    font = ImageFont.load_default(size=44)
+    paper = Image.new("L", (1300, 90 + 62 * len(lines)), 245)
+    draw = ImageDraw.Draw(paper)
+    for i, line in enumerate(lines):
+        draw.text((60, 45 + 62 * i), line, fill=20, font=font)
+
+    angle = rng.uniform(-6, 6)
+    paper = paper.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=0)
+    photo = Image.new("L", (3000, 4000), rng.randint(40, 90))
+    x = rng.randint(100, max(101, photo.width - paper.width - 100))
+    y = rng.randint(100, max(101, photo.height - paper.height - 100))
+    mask = paper.point(lambda v: 255 if v > 0 else 0)
+    photo.paste(paper, (x, y), mask)
+    # Light falls off from one side of the frame
+    gradient = Image.linear_gradient("L").resize(photo.size).rotate(rng.choice([0, 90, 180, 270]))
+    photo = Image.blend(photo, Image.composite(photo, Image.new("L", photo.size, 0), gradient), 0.35)
+
+    buffer = BytesIO()
+    photo.convert("RGB").save(buffer, "JPEG", quality=85)
+    truth = {"merchant": merchant, "date": date, "amount": total, "text": "\n".join(lines), "skew": angle}
+    return buffer.getvalue(), truth
+
+def load_corpus(directory: str):
+    """Images with a sidecar <name>.json holding the expected amount/date/merchant (and optionally text)."""
+    for path in sorted(glob.glob(os.path.join(directory, "*"))):
+        if path.endswith(".json"):
+            continue
+        sidecar = os.path.splitext(path)[0] + ".json"
+        if os.path.exists(sidecar):
+            with open(path, "rb") as f, open(sidecar) as g:
+                yield f.read(), json.load(g)
+
+def similarity(a: str, b: str) -> float:
+    return difflib.SequenceMatcher(None, " ".join(a.split()), " ".join(b.split())).ratio()
+
+def run_mode(samples, mode: str) -> dict:
+    latencies, correct = [], {"amount": 0, "date": 0, "merchant": 0}
+    text_scores = []
+    for image_bytes, truth in samples:
+        t0 = time.perf_counter()
+        text = ocr_service.extract_text(image_bytes, preprocess=mode)
+        latencies.append(time.perf_counter() - t0)
+        parsed = ocr_service.parse_receipt(text)
+        correct["amount"] += abs(parsed["amount"] - truth["amount"]) < 0.005
+        correct["date"] += parsed["date"] == truth["date"]
+        correct["merchant"] += truth["merchant"].split()[0].lower() in (parsed["merchant"] or "").lower()
+        if truth.get("text"):
+            text_scores.append(similarity(text, truth["text"]))
+    latencies.sort()
+    n = len(samples)
+    return {
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "p50_ms": round(latencies[n // 2] * 1000, 1),
+        "p95_ms": round(latencies[min(n - 1, int(n * 0.95))] * 1000, 1),
+        "accuracy": {field: round(count / n, 3) for field, count in correct.items()},
+        "text_similarity": round(statistics.mean(text_scores), 3) if text_scores else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR accuracy vs latency: basic vs adaptive preprocessing")
+    parser.add_argument("--corpus", help="Directory of receipt images with <name>.json ground truth")
+    parser.add_argument("--synthetic", type=int, default=20, help="Synthetic receipts when no corpus is given")
+    parser.add_argument("--save-samples", help="Write the synthetic receipts and their ground truth here")
+    parser.add_argument("--modes", default="basic,adaptive")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.corpus:
+        samples = list(load_corpus(args.corpus))
+    else:
+        rng = random.Random(args.seed)
+        samples = [make_receipt(rng) for _ in range(args.synthetic)]
+        if args.save_samples:
+            os.makedirs(args.save_samples, exist_ok=True)
+            for i, (image_bytes, truth) in enumerate(samples):
+                with open(os.path.join(args.save_samples, f"receipt_{i:03d}.jpg"), "wb") as f:
+                    f.write(image_bytes)
+                with open(os.path.join(args.save_samples, f"receipt_{i:03d}.json"), "w") as f:
+                    json.dump(truth, f, indent=2)
+    if not samples:
+        raise SystemExit("No samples found")
+
+    # Preprocessing cost on its own, and how well the deskew recovers known angles
+    t0 = time.perf_counter()
+    prepared = [ocr_preprocess.prepare(image_bytes) for image_bytes, _ in samples]
+    preprocess_ms = (time.perf_counter() - t0) * 1000 / len(samples)
+    skew_errors = [abs(p.info["deskew_degrees"] + truth["skew"]) for p, (_, truth) in zip(prepared, samples) if "skew" in truth]
+
+    results = {
+        "samples": len(samples),
+        "adaptive_preprocess_ms": round(preprocess_ms, 1),
+        "deskew_error_degrees_mean": round(statistics.mean(skew_errors), 2) if skew_errors else None,
+        "psm_chosen": {str(psm): sum(p.psm == psm for p in prepared) for psm in sorted({p.psm for p in prepared})},
+    }
+    for mode in args.modes.split(","):
+        results[mode] = run_mode(samples, mode)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import List
+
+# Add the current directory to sys.path so 'app' can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.crud.crud_expense import EXPENSE_LIST_COLUMNS
+from app.models.expense import Expense, ExpenseSplit
+from app.schemas.expense import Expense as ExpenseSchema
+
+COLUMN_NAMES = [c.key for c in EXPENSE_LIST_COLUMNS]
+
+def make_rows(n: int, splits_per_expense: int):
+    """
+    Synthetic (expense_row, split_rows) tuples as the database driver would return them.
+    """
+    start = datetime(2024, 1, 1)
+    rows = []
+    for i in range(n):
+        expense = (
+            i + 1, 1, 1, f"Expense {i}", 10.0 + i % 100, "USD", "Food",
+            start + timedelta(minutes=i), "Merchant", None, start + timedelta(minutes=i),
+        )
+        splits = [(i + 1, uid, 10.0 / splits_per_expense) for uid in range(1, splits_per_expense + 1)]
+        rows.append((expense, splits))
+    return rows
+
+def orm_path(rows) -> bytes:
+    """
+    Default path: ORM objects -> response_model validation -> jsonable_encoder -> json.dumps.
+    """
+    objects = []
+    for expense_row, split_rows in rows:
+        expense = Expense(**dict(zip(COLUMN_NAMES, expense_row)))
+        expense.splits = [ExpenseSplit(expense_id=e, user_id=u, amount_owed=a) for e, u, a in split_rows]
+        objects.append(expense)
+    adapter = TypeAdapter(List[ExpenseSchema])
+    validated = adapter.validate_python(objects, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+def row_path(rows) -> bytes:
+    """
+    Fast path: Core rows -> dicts -> orjson (what get_rows_by_group + ORJSONResponse do).
+    """
+    payload = []
+    for expense_row, split_rows in rows:
+        expense = dict(zip(COLUMN_NAMES, expense_row))
+        expense["splits"] = [{"user_id": u, "amount_owed": a} for _, u, a in split_rows]
+        payload.append(expense)
+    return orjson.dumps(payload)
+
+def measure(fn, rows, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        body = fn(rows)
+        timings.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "best_ms": round(min(timings) * 1000, 2),
+        "mean_ms": round(sum(timings) / len(timings) * 1000, 2),
+        "peak_mem_mb": round(peak / (1024 * 1024), 2),
+        "body_bytes": len(body),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialization benchmark for list responses")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--splits", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.splits)
+    results = {
+        "rows": args.rows,
+        "splits_per_row": args.splits,
+        "orm_pydantic_json": measure(orm_path, rows, args.repeat),
+        "core_rows_orjson": measure(row_path, rows, args.repeat),
+    }
+    results["speedup"] = round(
+        results["orm_pydantic_json"]["best_ms"] / max(results["core_rows_orjson"]["best_ms"], 0.001), 1
+    )
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+# Add the current directory to sys.path so 'app' can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services import receipt_parser
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "receipt_corpus")
+
+def snapshot(text: str) -> dict:
+    """What a golden file pins down: every line's classification and the parsed result."""
+    result = receipt_parser.parse(text)
+    del result["raw_text_snippet"]
+    return {
+        "lines": [f"{line.kind}: {line.text}" for line in receipt_parser.classify(text)],
+        "result": result,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check receipt_parser against the golden corpus (<name>.txt -> <name>.json) and measure throughput"
+    )
+    parser.add_argument("--corpus", default=CORPUS_DIR)
+    parser.add_argument("--update", action="store_true", help="Rewrite the golden files from the current parser")
+    parser.add_argument("--seconds", type=float, default=2.0, help="How long to run the throughput loop")
+    args = parser.parse_args()
+
+    texts = {}
+    for path in sorted(glob.glob(os.path.join(args.corpus, "*.txt"))):
+        with open(path) as f:
+            texts[os.path.splitext(path)[0]] = f.read()
+    if not texts:
+        raise SystemExit(f"No receipts found in {args.corpus}")
+
+    failures = []
+    for base, text in texts.items():
+        actual = snapshot(text)
+        golden_path = f"{base}.json"
+        if args.update or not os.path.exists(golden_path):
+            with open(golden_path, "w") as f:
+                json.dump(actual, f, indent=2)
+                f.write("\n")
+            continue
+        with open(golden_path) as f:
+            expected = json.load(f)
+        if actual != expected:
+            failures.append(os.path.basename(base))
+            for key in ("lines", "result"):
+                if actual[key] != expected[key]:
+                    print(f"--- {os.path.basename(base)} {key}\nexpected: {json.dumps(expected[key])}\nactual:   {json.dumps(actual[key])}")
+
+    # Throughput over the whole corpus, repeated until the time budget is spent
+    corpus = list(texts.values())
+    lines = sum(len(text.splitlines()) for text in corpus)
+    receipts = passes = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < args.seconds:
+        for text in corpus:
+            receipt_parser.parse(text)
+        receipts += len(corpus)
+        passes += 1
+    elapsed = time.perf_counter() - started
+
+    print(json.dumps({
+        "receipts": len(corpus),
+        "golden_failures": failures,
+        "updated": args.update,
+        "receipts_per_second": round(receipts / elapsed),
+        "lines_per_second": round(lines * passes / elapsed),
+        "mean_us_per_receipt": round(elapsed / receipts * 1e6, 1),
+    }, indent=2))
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -23,15 +23,16 @@ async def check():
             
             print(f"Found Yug: ID={yug.id}, Username={yug.username}")
             
-            # Find memberships
-            res = await db.execute(select(GroupMember).filter(GroupMember.user_id == yug.id))
-            memberships = res.scalars().all()
+            # Find memberships with group names in one query
+            res = await db.execute(
+                select(GroupMember.group_id, Group.name)
+                .outerjoin(Group, Group.id == GroupMember.group_id)
+                .filter(GroupMember.user_id == yug.id)
+            )
+            memberships = res.all()
             print(f"Yug belongs to {len(memberships)} groups.")
-            for m in memberships:
-                # Get group name
-                gres = await db.execute(select(Group).filter(Group.id == m.group_id))
-                group = gres.scalars().first()
-                print(f" - Group ID: {m.group_id}, Name: {group.name if group else 'Unknown'}")
+            for group_id, name in memberships:
+                print(f" - Group ID: {group_id}, Name: {name or 'Unknown'}")
 
     except Exception as e:
         print(f"Error: {e}")
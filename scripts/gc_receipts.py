@@ -0,0 +1,73 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Add the current directory to sys.path so 'app' can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, engine
+from app.models.ocr_job import OcrJob
+from app.models.receipt import Receipt
+from app.services import receipt_store
+
+BATCH = 500
+
+async def gc(dry_run: bool):
+    """
+    Remove blobs no receipt row or unfinished OCR job references (OCR uploads once
+    scanned, receipts deleted within the delete grace period, or files left by a crash
+    between writing the file and committing the row) and stale temp files from
+    interrupted uploads. Files younger than the grace period are left alone.
+    """
+    cutoff = time.time() - receipt_store.DELETE_GRACE_SECONDS
+    blobs_dir = os.path.join(settings.RECEIPT_STORE_DIR, "blobs")
+    tmp_dir = os.path.join(settings.RECEIPT_STORE_DIR, "tmp")
+    candidates = []
+    for root, _, names in os.walk(blobs_dir):
+        candidates += [name for name in names if os.path.getmtime(os.path.join(root, name)) < cutoff]
+    removed = []
+    try:
+        async with AsyncSessionLocal() as db:
+            for i in range(0, len(candidates), BATCH):
+                batch = candidates[i:i + BATCH]
+                res = await db.execute(select(Receipt.sha256).filter(Receipt.sha256.in_(batch)).distinct())
+                referenced = set(res.scalars().all())
+                res = await db.execute(
+                    select(OcrJob.sha256)
+                    .filter(OcrJob.sha256.in_(batch), OcrJob.status.in_(("queued", "processing")))
+                    .distinct()
+                )
+                referenced.update(res.scalars().all())
+                removed += [sha256 for sha256 in batch if sha256 not in referenced]
+    finally:
+        await engine.dispose()
+    if not dry_run:
+        for sha256 in removed:
+            receipt_store.delete_blob(sha256)
+    stale_tmp = []
+    if os.path.isdir(tmp_dir):
+        stale_tmp = [os.path.join(tmp_dir, name) for name in os.listdir(tmp_dir)
+                     if os.path.getmtime(os.path.join(tmp_dir, name)) < cutoff]
+        if not dry_run:
+            for path in stale_tmp:
+                os.remove(path)
+    print(json.dumps({
+        "blobs_checked": len(candidates),
+        "blobs_removed": len(removed),
+        "tmp_removed": len(stale_tmp),
+        "dry_run": dry_run,
+    }, indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete unreferenced receipt blobs and stale uploads from RECEIPT_STORE_DIR")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be removed")
+    args = parser.parse_args()
+    asyncio.run(gc(args.dry_run))
+
+if __name__ == "__main__":
+    main()
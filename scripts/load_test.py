@@ -0,0 +1,221 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+# Endpoint mix roughly matching production traffic: reads dominate, writes are a minority.
+# Each scenario is (weight, method, path template); {gid} is one of the user's groups.
+DEFAULT_MIX = {
+    "list_groups": (15, "GET", "/groups/"),
+    "group_expenses": (25, "GET", "/expenses/group/{gid}?limit=50"),
+    "group_balances": (15, "GET", "/groups/{gid}/balances"),
+    "global_summary": (8, "GET", "/groups/summary"),
+    "group_analytics": (5, "GET", "/groups/{gid}/analytics"),
+    "group_settlements": (5, "GET", "/settlements/group/{gid}"),
+    "notifications": (10, "GET", "/notifications/"),
+    "search_expenses": (5, "GET", "/expenses/search?q={term}"),
+    "create_expense": (10, "POST", "/expenses/"),
+    "create_settlement": (2, "POST", "/settlements/"),
+}
+SEARCH_TERMS = ["dinner", "taxi", "hotel", "lisbon", "coffee", "groceries", "food", "travel"]
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.recording = False
+
+    def record(self, name: str, seconds: float, status: int) -> None:
+        if not self.recording:
+            return
+        self.latencies[name].append(seconds)
+        self.statuses[name][status] += 1
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        all_latencies = []
+        for name in sorted(self.latencies):
+            values = sorted(self.latencies[name])
+            all_latencies.extend(values)
+            statuses = self.statuses[name]
+            endpoints[name] = self._summary(values, elapsed)
+            endpoints[name]["errors"] = sum(n for s, n in statuses.items() if s >= 400 and s != 429)
+            endpoints[name]["throttled"] = statuses.get(429, 0)
+            endpoints[name]["statuses"] = {str(s): n for s, n in sorted(statuses.items())}
+        return {"total": self._summary(sorted(all_latencies), elapsed), "endpoints": endpoints}
+
+    @staticmethod
+    def _summary(values: List[float], elapsed: float) -> dict:
+        return {
+            "requests": len(values),
+            "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+        }
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, email: str, password: str, rng: random.Random):
+        self.client = client
+        self.email = email
+        self.password = password
+        self.rng = rng
+        self.headers: Dict[str, str] = {}
+        self.user_id: Optional[int] = None
+        self.groups: List[dict] = []
+
+    async def login(self) -> bool:
+        r = await self.client.post("/login/access-token", data={"username": self.email, "password": self.password})
+        if r.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        me = await self.client.get("/users/me", headers=self.headers)
+        self.user_id = me.json()["id"]
+        groups = await self.client.get("/groups/", headers=self.headers)
+        self.groups = [g for g in groups.json() if len(g["members"]) >= 2]
+        return bool(self.groups)
+
+    def body(self, name: str, group: dict) -> Optional[dict]:
+        members = [m["user_id"] for m in group["members"]]
+        if name == "create_expense":
+            participants = self.rng.sample(members, self.rng.randint(2, len(members)))
+            amount = round(self.rng.uniform(5, 300), 2)
+            return {
+                "group_id": group["id"],
+                "description": f"Load test {self.rng.choice(SEARCH_TERMS)}",
+                "amount": amount,
+                "currency": group["base_currency"],
+                "category": "Food",
+                "splits": [{"user_id": uid, "amount_owed": round(amount / len(participants), 2)} for uid in participants],
+            }
+        if name == "create_settlement":
+            payee = self.rng.choice([uid for uid in members if uid != self.user_id])
+            return {"group_id": group["id"], "payer_id": self.user_id, "payee_id": payee, "amount": round(self.rng.uniform(1, 50), 2)}
+        return None
+
+    async def run(self, mix: dict, recorder: Recorder, stop_at: float, think_time: float) -> None:
+        names = list(mix)
+        weights = [mix[n][0] for n in names]
+        while time.monotonic() < stop_at:
+            name = self.rng.choices(names, weights)[0]
+            _, method, template = mix[name]
+            group = self.rng.choice(self.groups)
+            path = template.format(gid=group["id"], term=self.rng.choice(SEARCH_TERMS))
+            started = time.perf_counter()
+            try:
+                r = await self.client.request(method, path, headers=self.headers, json=self.body(name, group))
+                status = r.status_code
+            except httpx.HTTPError:
+                status = 599
+            recorder.record(name, time.perf_counter() - started, status)
+            if think_time:
+                await asyncio.sleep(self.rng.expovariate(1 / think_time))
+
+def parse_mix(spec: Optional[str]) -> dict:
+    """--mix 'group_expenses=40,create_expense=5' overrides weights; a weight of 0 disables a scenario."""
+    mix = dict(DEFAULT_MIX)
+    for item in filter(None, (spec or "").split(",")):
+        name, _, weight = item.partition("=")
+        if name not in mix:
+            raise SystemExit(f"Unknown scenario '{name}'. Known: {', '.join(DEFAULT_MIX)}")
+        mix[name] = (float(weight),) + mix[name][1:]
+    return {name: s for name, s in mix.items() if s[0] > 0}
+
+def compare(report: dict, baseline: dict) -> dict:
+    """p95/throughput change per endpoint relative to a previous report, in percent."""
+    changes = {}
+    for name, current in report["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        changes[name] = {
+            key: round((current[key] - before[key]) / before[key] * 100, 1) if before[key] else None
+            for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+        }
+    return changes
+
+async def main_async(args) -> dict:
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        accounts = rng.sample(range(args.seeded_users), min(args.concurrency, args.seeded_users))
+        users = [
+            VirtualUser(client, f"{args.prefix}{n}@example.com", args.password, random.Random(rng.random()))
+            for n in accounts
+        ]
+        # Logins are bcrypt-bound; don't let them swamp the hashing pool
+        login_slots = asyncio.Semaphore(4)
+
+        async def login(user: VirtualUser) -> bool:
+            async with login_slots:
+                return await user.login()
+
+        ready = [u for u, ok in zip(users, await asyncio.gather(*(login(u) for u in users))) if ok]
+        if not ready:
+            raise SystemExit("No virtual user could log in with a group; run scripts/seed_data.py first")
+
+        recorder = Recorder()
+        stop_at = time.monotonic() + args.warmup + args.duration
+        tasks = [asyncio.create_task(u.run(mix, recorder, stop_at, args.think_time)) for u in ready]
+        await asyncio.sleep(args.warmup)
+        recorder.recording = True
+        started = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    report = {
+        "config": {
+            "base_url": args.base_url, "virtual_users": len(ready), "duration_s": args.duration,
+            "warmup_s": args.warmup, "think_time_s": args.think_time, "seed": args.seed,
+            "mix": {name: s[0] for name, s in mix.items()},
+        },
+        **recorder.report(elapsed),
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["change_vs_baseline_pct"] = compare(report, json.load(f))
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Closed-loop load driver. Seed data with scripts/seed_data.py first; "
+                    "429s are reported as 'throttled', so disable or raise RATE_LIMIT_* for capacity runs."
+    )
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--concurrency", type=int, default=20, help="Virtual users, each a seeded account")
+    parser.add_argument("--duration", type=float, default=60, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds before recording")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between requests per user")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--mix", help="Weight overrides, e.g. 'group_expenses=40,create_expense=0'")
+    parser.add_argument("--seeded-users", type=int, default=200, help="--users passed to seed_data.py")
+    parser.add_argument("--prefix", default="loaduser")
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs in a fresh interpreter so imports are measured cold
+PROBE = """
+import asyncio, json
+from app.main import app
+
+async def main():
+    async with app.router.lifespan_context(app):
+        print(json.dumps(app.state.startup_seconds))
+
+asyncio.run(main())
+"""
+
+def measure_once() -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start (imports + lifespan) against a budget")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=None, help="Seconds; defaults to STARTUP_BUDGET_SECONDS")
+    args = parser.parse_args()
+
+    sys.path.append(ROOT)
+    from app.core.config import settings
+    budget = args.budget if args.budget is not None else settings.STARTUP_BUDGET_SECONDS
+
+    runs = [measure_once() for _ in range(args.runs)]
+    worst = max(r["total"] for r in runs)
+    print(json.dumps({"budget_seconds": budget, "worst_total_seconds": worst, "runs": runs}, indent=2))
+    sys.exit(0 if worst <= budget else 1)
+
+if __name__ == "__main__":
+    main()
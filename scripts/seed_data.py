@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add the current directory to sys.path so 'app' can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert
+from app.core.security import pwd_context
+from app.db import dialect
+from app.db.session import AsyncSessionLocal, engine
+from app.models.user import User
+from app.models.group import Group, GroupMember
+from app.models.expense import Expense, ExpenseSplit
+from app.models.settlement import Settlement
+from app.models.notification import Notification
+from app.models.recurring_expense import RecurringExpense
+from app.models.spend_rollup import SpendRollup
+from app.services import analytics_service, pair_balance_service, settlement_service
+
+CURRENCIES = ["USD", "USD", "USD", "EUR", "EUR", "GBP", "INR"]
+CATEGORIES = ["Food", "Transport", "Rent", "Groceries", "Entertainment", "Utilities", "Travel", "Others"]
+PLACES = ["Lisbon", "Berlin", "Goa", "London", "Paris", "Tokyo", "Austin", "Oslo"]
+MERCHANTS = [None, None, "Uber", "Starbucks", "Tesco", "Airbnb", "Shell", "Lidl", "Pret"]
+WORDS = ["Dinner", "Lunch", "Taxi", "Train", "Hotel", "Groceries", "Museum", "Coffee", "Drinks", "Fuel"]
+FREQUENCIES = ["daily", "weekly", "monthly", "yearly"]
+BATCH = 1000
+
+def group_size(rng: random.Random, max_size: int) -> int:
+    """Most groups are small (couples, flatmates), a few are large (trips, clubs)."""
+    return min(max_size, max(2, int(rng.paretovariate(1.3)) + 1))
+
+async def insert_returning_ids(db, model, rows):
+    ids = []
+    for i in range(0, len(rows), BATCH):
+        result = await db.execute(
+            insert(model).returning(model.id, sort_by_parameter_order=True), rows[i:i + BATCH]
+        )
+        ids.extend(result.scalars().all())
+    return ids
+
+async def insert_rows(db, model, rows):
+    # Plain batched INSERT; tables without JSON columns go through dialect.copy_rows (COPY on Postgres)
+    for i in range(0, len(rows), BATCH):
+        await db.execute(insert(model), rows[i:i + BATCH])
+
+async def seed(args) -> dict:
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    started = time.perf_counter()
+    # One bcrypt hash for everybody; the load driver logs in with --password
+    password_hash = pwd_context.hash(args.password)
+
+    async with AsyncSessionLocal() as db:
+        users = [
+            {
+                "username": f"{args.prefix}{i}",
+                "email": f"{args.prefix}{i}@example.com",
+                "password_hash": password_hash,
+                "is_active": True,
+                "created_at": now - timedelta(days=rng.randint(0, args.days)),
+            }
+            for i in range(args.users)
+        ]
+        user_ids = await insert_returning_ids(db, User, users)
+
+        groups = []
+        memberships = []
+        for g in range(args.groups):
+            members = rng.sample(user_ids, group_size(rng, min(args.max_group_size, len(user_ids))))
+            groups.append({
+                "name": f"{rng.choice(PLACES)} {rng.choice(['Trip', 'Flat', 'Team', 'Club'])} {g}",
+                "description": None,
+                "base_currency": rng.choice(CURRENCIES),
+                "created_by": members[0],
+                "created_at": now - timedelta(days=args.days),
+            })
+            memberships.append(members)
+        group_ids = await insert_returning_ids(db, Group, groups)
+        await dialect.copy_rows(db, GroupMember, [
+            {"group_id": gid, "user_id": uid, "joined_at": now - timedelta(days=args.days)}
+            for gid, members in zip(group_ids, memberships) for uid in members
+        ])
+
+        counts = {"users": len(user_ids), "groups": len(group_ids), "memberships": sum(len(m) for m in memberships),
+                  "expenses": 0, "splits": 0, "settlements": 0, "recurring": 0, "notifications": 0}
+        for gid, group, members in zip(group_ids, groups, memberships):
+            n_expenses = max(1, int(rng.expovariate(1 / args.expenses_per_group)))
+            expenses = []
+            planned_splits = []
+            for _ in range(n_expenses):
+                amount = round(rng.lognormvariate(3.2, 1.0), 2)
+                participants = rng.sample(members, rng.randint(2, len(members)))
+                share = round(amount / len(participants), 2)
+                when = now - timedelta(days=rng.random() * args.days)
+                currency = rng.choice(CURRENCIES)
+                rate = settlement_service.get_exchange_rate(currency, group["base_currency"])
+                expenses.append({
+                    "group_id": gid,
+                    "payer_id": rng.choice(participants),
+                    "description": f"{rng.choice(WORDS)} in {rng.choice(PLACES)}",
+                    "amount": amount,
+                    "currency": currency,
+                    "fx_rate": rate,
+                    "base_amount": amount * rate,
+                    "category": rng.choice(CATEGORIES),
+                    "merchant": rng.choice(MERCHANTS),
+                    "date": when,
+                    "created_at": when,
+                })
+                planned_splits.append([(uid, share) for uid in participants])
+            expense_ids = await insert_returning_ids(db, Expense, expenses)
+
+            splits = [
+                {"expense_id": eid, "user_id": uid, "amount_owed": owed, "base_amount_owed": owed * expense["fx_rate"]}
+                for eid, expense, pairs in zip(expense_ids, expenses, planned_splits) for uid, owed in pairs
+            ]
+            await dialect.copy_rows(db, ExpenseSplit, splits)
+
+            # Rollups computed in memory instead of one upsert per expense
+            deltas = {}
+            for expense, pairs in zip(expenses, planned_splits):
+                row = Expense(**expense)
+                split_dicts = [{"user_id": uid, "amount_owed": owed} for uid, owed in pairs]
+                for key, (paid, owed, n) in analytics_service.expense_deltas(row, split_dicts, group["base_currency"]).items():
+                    cell = deltas.setdefault(key, [0.0, 0.0, 0])
+                    cell[0] += paid
+                    cell[1] += owed
+                    cell[2] += n
+            await dialect.copy_rows(db, SpendRollup, [
+                {"group_id": gid, "period": p, "category": c, "user_id": uid,
+                 "paid_amount": paid, "share_amount": owed, "expense_count": n}
+                for (p, c, uid), (paid, owed, n) in deltas.items()
+            ])
+
+            settlements = []
+            for _ in range(int(n_expenses * args.settlement_ratio)):
+                payer, payee = rng.sample(members, 2)
+                amount = round(rng.uniform(5, 200), 2)
+                settlements.append({
+                    "group_id": gid, "payer_id": payer, "payee_id": payee,
+                    "amount": amount, "currency": group["base_currency"], "fx_rate": 1.0, "base_amount": amount,
+                    "status": "completed", "created_at": now - timedelta(days=rng.random() * args.days),
+                })
+            await dialect.copy_rows(db, Settlement, settlements)
+
+            recurring = []
+            if rng.random() < args.recurring_ratio:
+                amount = round(rng.uniform(10, 1500), 2)
+                recurring.append({
+                    "group_id": gid, "payer_id": members[0], "description": f"{rng.choice(['Rent', 'Internet', 'Gym'])}",
+                    "amount": amount, "currency": group["base_currency"], "category": "Utilities",
+                    "frequency": rng.choice(FREQUENCIES), "status": "active",
+                    "next_spawn_date": now + timedelta(days=rng.randint(1, 30)),
+                    "splits": [{"user_id": uid, "amount_owed": round(amount / len(members), 2)} for uid in members],
+                    "created_at": now,
+                })
+                await insert_rows(db, RecurringExpense, recurring)
+
+            notifications = [
+                {"user_id": uid, "message": f"New expense in '{group['name']}'", "type": "expense",
+                 "is_read": rng.random() < 0.7, "created_at": now - timedelta(days=rng.random() * args.days)}
+                for uid in members for _ in range(rng.randint(0, args.notifications_per_member))
+            ]
+            await dialect.copy_rows(db, Notification, notifications)
+
+            counts["expenses"] += len(expense_ids)
+            counts["splits"] += len(splits)
+            counts["settlements"] += len(settlements)
+            counts["recurring"] += len(recurring)
+            counts["notifications"] += len(notifications)
+
+        # Pairs span groups, so their balances are summed once at the end in SQL
+        counts["pair_balances"] = await pair_balance_service.rebuild(db)
+        await db.commit()
+
+    return {
+        "seed": args.seed,
+        "login": {"email_pattern": f"{args.prefix}{{n}}@example.com", "users": args.users, "password": args.password},
+        "counts": counts,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a realistic synthetic dataset")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--groups", type=int, default=100)
+    parser.add_argument("--max-group-size", type=int, default=30)
+    parser.add_argument("--expenses-per-group", type=float, default=50, help="Mean; actual counts are exponential")
+    parser.add_argument("--settlement-ratio", type=float, default=0.1, help="Settlements per expense")
+    parser.add_argument("--recurring-ratio", type=float, default=0.3, help="Share of groups with a recurring template")
+    parser.add_argument("--notifications-per-member", type=int, default=5)
+    parser.add_argument("--days", type=int, default=730, help="History length")
+    parser.add_argument("--prefix", default="loaduser", help="Username/email prefix (must be unique per run)")
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            return await seed(args)
+        finally:
+            await engine.dispose()
+
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+if __name__ == "__main__":
+    main()
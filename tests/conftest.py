@@ -0,0 +1,97 @@
+"""
+Tests run the app in-process against a migrated SQLite database in a temporary
+directory. The settings are read at import time, so the environment is set up
+before anything from app is imported.
+"""
+import asyncio
+import os
+import tempfile
+
+_DB_DIR = tempfile.mkdtemp(prefix="expense-splitter-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["RECEIPT_STORE_DIR"] = os.path.join(_DB_DIR, "receipts")
+
+import httpx
+import pytest
+from alembic import command
+
+from app.api import deps
+from app.db import migrations
+from app.db.session import AsyncSessionLocal, engine
+from app.main import app
+from app.models.expense import Expense, ExpenseSplit
+from app.models.group import Group, GroupMember
+from app.models.settlement import Settlement
+from app.models.user import User
+from app.services import pair_balance_service, settlement_service
+
+pytest_plugins = ["app.testing.pytest_plugin"]
+
+# Several groups with several members each, so a per-group or per-member query shows
+# up as a repeated statement rather than hiding behind a single row
+GROUPS = 3
+MEMBERS = 4
+EXPENSES_PER_GROUP = 5
+
+async def _seed() -> None:
+    async with AsyncSessionLocal() as db:
+        # scripts/check_users.py looks up "yug"
+        names = ["yug"] + [f"user{i}" for i in range(1, MEMBERS + 1)]
+        users = [User(username=name, email=f"{name}@example.com", password_hash="x") for name in names]
+        db.add_all(users)
+        await db.flush()
+        for g in range(GROUPS):
+            group = Group(name=f"Group {g}", base_currency="USD", created_by=users[0].id)
+            db.add(group)
+            await db.flush()
+            members = users[:MEMBERS] if g % 2 == 0 else users[1:]
+            db.add_all(GroupMember(group_id=group.id, user_id=u.id) for u in members)
+            for e in range(EXPENSES_PER_GROUP):
+                payer = members[e % len(members)]
+                currency = "EUR" if e % 3 == 0 else "USD"
+                expense = Expense(group_id=group.id, payer_id=payer.id, description=f"Expense {e}",
+                                  amount=40.0 + e, currency=currency)
+                db.add(expense)
+                await db.flush()
+                splits = [ExpenseSplit(expense_id=expense.id, user_id=u.id, amount_owed=expense.amount / len(members))
+                          for u in members]
+                settlement_service.convert_expense(expense, splits, group.base_currency)
+                db.add_all(splits)
+            settlement = Settlement(group_id=group.id, payer_id=members[1].id, payee_id=members[0].id,
+                                    amount=10.0, currency="USD", status="completed")
+            settlement_service.convert_settlement(settlement, group.base_currency)
+            db.add(settlement)
+        await pair_balance_service.rebuild(db)
+        await db.commit()
+    await engine.dispose()
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    command.upgrade(migrations.alembic_config(), "head")
+    asyncio.run(_seed())
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+async def current_user():
+    async with AsyncSessionLocal() as db:
+        return await db.get(User, 1)
+
+@pytest.fixture
+async def client(current_user):
+    app.dependency_overrides[deps.get_current_user] = lambda: current_user
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+    # Each test runs on its own event loop; pooled connections must not outlive it
+    await engine.dispose()
+
+@pytest.fixture
+async def db():
+    async with AsyncSessionLocal() as session:
+        yield session
+    await engine.dispose()
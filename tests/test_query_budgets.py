@@ -0,0 +1,38 @@
+"""
+Query budgets for the endpoints whose N+1 patterns were removed. A budget failing
+means a change added statements; the message names the repeated shapes and call sites.
+"""
+import importlib.util
+import os
+import pytest
+
+from app.services import debt_simplification
+
+pytestmark = pytest.mark.anyio
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+
+async def test_group_balances(client, query_budget):
+    with query_budget(3, max_repeats=1):
+        response = await client.get("/api/v1/groups/1/balances")
+    assert response.status_code == 200
+    assert response.json()["balances"]
+
+async def test_global_summary(client, query_budget):
+    with query_budget(3, max_repeats=1):
+        response = await client.get("/api/v1/groups/summary")
+    assert response.status_code == 200
+    assert response.json()["group_count"] == 2
+
+async def test_calculate_debts(db, query_budget):
+    with query_budget(2, max_repeats=1):
+        debts = await debt_simplification.calculate_debts(db, group_id=1)
+    assert debts
+
+async def test_check_users(query_budget, capsys):
+    spec = importlib.util.spec_from_file_location("check_users", os.path.join(SCRIPTS_DIR, "check_users.py"))
+    check_users = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(check_users)
+    with query_budget(2, max_repeats=1):
+        await check_users.check()
+    assert "belongs to" in capsys.readouterr().out